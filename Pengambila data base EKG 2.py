@@ -1,46 +1,33 @@
-import serial
+import os
 import sys
-import csv
-import time
-from collections import deque
 from PyQt5 import QtWidgets, QtCore
 import pyqtgraph as pg
 
+# Filter, detektor beat dan protokol serial bersama ada di code/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "code", "python"))
+from legacy_recorder import RecorderCore
+from ring_buffer import RingBuffer
+from serial_protocol import open_serial
+
 # ----------------------
 # Konfigurasi Serial
 # ----------------------
 port = 'COM5'
-baudrate = 9600
+baudrate = 115200  # sama dengan BAUD_RATE di code/arduino/arduino2.ino
+sample_rate = 500  # Hz, arduino2.ino (delay(2) per sampel)
 
 try:
-    ser = serial.Serial(port, baudrate, timeout=1)
+    ser, decoder = open_serial(port, "ascii", baud_rate=baudrate, timeout=0)
     print(f"✅ Terhubung ke {port} dengan baudrate {baudrate}")
 except Exception as e:
     print("❌ Gagal membuka port serial:", e)
     sys.exit()
 
 # ----------------------
-# File CSV untuk data EKG dan BPM
-# ----------------------
-ekg_file = open("dataset_ekg.csv", mode='w', newline='')
-ekg_writer = csv.writer(ekg_file)
-ekg_writer.writerow(["timestamp", "raw", "ema", "diff", "label"])
-
-bpm_file = open("bpm_log.csv", mode='w', newline='')
-bpm_writer = csv.writer(bpm_file)
-bpm_writer.writerow(["timestamp", "bpm"])
-
-# ----------------------
-# Filter EMA
+# File CSV untuk data EKG dan BPM (dataset_ekg.csv, bpm_log.csv), EMA dan detektor beat
 # ----------------------
-alpha = 0.1
-prev_ema = 512
-
-def exponential_moving_average(new_value):
-    global prev_ema
-    ema = (alpha * new_value) + (1 - alpha) * prev_ema
-    prev_ema = ema
-    return int(ema)
+threshold = 20  # threshold minimum; threshold efektif menyesuaikan amplitudo QRS
+core = RecorderCore(ser, decoder, sample_rate, threshold, display_len=500)
 
 # ----------------------
 # PyQt5 GUI Application
@@ -59,13 +46,11 @@ class BPMMonitor(QtWidgets.QWidget):
         self.ekg_plot = pg.PlotWidget(title="Sinyal Detak Jantung (Raw)")
         self.ekg_plot.setYRange(0, 1023)
         self.ekg_curve = self.ekg_plot.plot(pen='y')
-        self.ekg_data = deque([0]*500, maxlen=500)
 
         # Grafik BPM
         self.bpm_plot = pg.PlotWidget(title="Grafik Detak Jantung (BPM)")
         self.bpm_plot.setYRange(40, 160)
         self.bpm_curve = self.bpm_plot.plot(pen='g')
-        self.bpm_data = deque([0]*120, maxlen=120)
 
         # Tombol kontrol
         self.start_button = QtWidgets.QPushButton("▶️ Start")
@@ -87,10 +72,8 @@ class BPMMonitor(QtWidgets.QWidget):
         self.layout.addWidget(self.ekg_plot)
         self.layout.addWidget(self.bpm_plot)
 
-        self.is_recording = False
-        self.threshold = 20
-        self.beat_count = 0
-        self.start_bpm_time = time.time()
+        # Riwayat BPM per beat (prealokasi, tanpa salinan list saat setData)
+        self.bpm_data = RingBuffer(120, "f4")
 
         # Timer update data
         self.timer = QtCore.QTimer()
@@ -98,53 +81,33 @@ class BPMMonitor(QtWidgets.QWidget):
         self.timer.start(5)  # Lebih cepat untuk raw signal
 
     def start_recording(self):
-        self.is_recording = True
+        core.recording = True
         print("▶️  Perekaman dimulai...")
-        self.start_bpm_time = time.time()
-        self.beat_count = 0
 
     def stop_recording(self):
-        self.is_recording = False
+        core.recording = False
         print("⏹️  Perekaman dihentikan.")
 
     def update_data(self):
         try:
-            while ser.in_waiting:
-                line = ser.readline().decode('utf-8').strip()
-                if line.isdigit():
-                    raw = int(line)
-                    ema = exponential_moving_average(raw)
-                    diff = raw - ema
-                    timestamp = time.time()
-
-                    # Update grafik EKG mentah
-                    self.ekg_data.append(raw)
-                    self.ekg_curve.setData(list(self.ekg_data))
-
-                    if self.is_recording:
-                        ekg_writer.writerow([timestamp, raw, ema, diff, 0])
-
-                        if raw > ema + self.threshold:
-                            self.beat_count += 1
-
-                        elapsed = timestamp - self.start_bpm_time
-                        if elapsed >= 1:
-                            bpm = int((self.beat_count / elapsed) * 60)
-                            bpm_writer.writerow([timestamp, bpm])
-                            print(f"🫀 {bpm} BPM  | 🎯 Target: {self.target_input.value()}")
-
-                            self.bpm_data.append(bpm)
-                            self.bpm_curve.setData(list(self.bpm_data))
-
-                            self.beat_count = 0
-                            self.start_bpm_time = timestamp
+            # Semua byte yang menunggu dibaca sekaligus; satu setData per kurva per tick
+            n, beats = core.poll()
+            if n:
+                self.ekg_curve.setData(core.display.view())
+            if core.recording and len(beats):
+                # BPM per beat dari rata-rata R-R beberapa beat terakhir
+                self.bpm_data.extend(beats["bpm"])
+                self.bpm_curve.setData(self.bpm_data.view())
+                print(f"🫀 {beats['bpm'][-1]} BPM  | 🎯 Target: {self.target_input.value()}")
         except Exception as e:
             print("❗ Error:", e)
 
     def closeEvent(self, event):
         try:
-            bpm_file.close()
-            ekg_file.close()
+            self.timer.stop()
+            error = core.close()
+            if error:
+                print("❗ Gagal menulis file:", error)
             ser.close()
             print("✅ File dan serial port ditutup dengan aman.")
         except:
@@ -3,10 +3,69 @@ const int OUTPUT_PIN = A0; // Pin output sinyal EKG
 const int LO_PLUS_PIN = 10;  // Pin Leads-Off Detection +
 const int LO_MINUS_PIN = 11; // Pin Leads-Off Detection -
 
+// --- KONFIGURASI SERIAL ---
+// Default mengirim ASCII (satu angka per baris). Jika host mengirim karakter 'B',
+// firmware beralih ke frame biner 12 byte (lihat sendSample); 'A' kembali ke ASCII.
+const long BAUD_RATE = 115200;
+const byte SYNC_0 = 0xA5;
+const byte SYNC_1 = 0x5A;
+const uint8_t FLAG_LEADS_OFF = 0x01;
+bool binaryMode = false;
+uint16_t seqNo = 0;
+
+// CRC-8 (polinom 0x07) atas byte seq..flags
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+// Cek perintah mode dari host ('B' = biner, 'A' = ASCII)
+void checkHostCommand() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == 'B') {
+      binaryMode = true;
+      seqNo = 0;
+    } else if (c == 'A') {
+      binaryMode = false;
+    }
+  }
+}
+
+// Frame biner (little-endian): sync(2) seq(2) t_us(4) sampel 10-bit(2) flags(1) crc(1)
+void sendSample(int value, unsigned long tUs, uint8_t flags) {
+  if (!binaryMode) {
+    // Mode ASCII lama: elektroda lepas dikirim sebagai -1
+    Serial.println((flags & FLAG_LEADS_OFF) ? -1 : value);
+    return;
+  }
+  uint8_t frame[12];
+  frame[0] = SYNC_0;
+  frame[1] = SYNC_1;
+  frame[2] = seqNo & 0xFF;
+  frame[3] = seqNo >> 8;
+  frame[4] = tUs & 0xFF;
+  frame[5] = (tUs >> 8) & 0xFF;
+  frame[6] = (tUs >> 16) & 0xFF;
+  frame[7] = (tUs >> 24) & 0xFF;
+  frame[8] = value & 0xFF;
+  frame[9] = (value >> 8) & 0x03;
+  frame[10] = flags;
+  frame[11] = crc8(frame + 2, 9);
+  Serial.write(frame, 12);
+  seqNo++;
+}
+
 void setup() {
-  // Mulai komunikasi serial dengan baud rate 9600
+  // Mulai komunikasi serial dengan BAUD_RATE
   // Pastikan baud rate ini sama dengan yang di program Python
-  Serial.begin(9600);
+  Serial.begin(BAUD_RATE);
 
   // Inisialisasi pin untuk deteksi elektroda terlepas
   pinMode(LO_PLUS_PIN, INPUT);
@@ -14,17 +73,19 @@ void setup() {
 }
 
 void loop() {
+  checkHostCommand();
+
   // Memeriksa apakah elektroda terpasang dengan benar
   // Jika tidak, sinyal EKG tidak akan akurat
   if ((digitalRead(LO_PLUS_PIN) == 1) || (digitalRead(LO_MINUS_PIN) == 1)) {
-    // Anda bisa mengirimkan sinyal error, misal nilai -1
-    Serial.println(-1);
+    // Kirim sinyal error: -1 di mode ASCII, flag leads-off di mode biner
+    sendSample(0, micros(), FLAG_LEADS_OFF);
   } else {
     // Jika elektroda terpasang, baca nilai analog dari sensor
     int ekgValue = analogRead(OUTPUT_PIN);
     
     // Kirim nilai yang dibaca ke port serial
-    Serial.println(ekgValue);
+    sendSample(ekgValue, micros(), 0);
   }
   
   // Beri jeda singkat untuk mengatur laju sampling (sampling rate)
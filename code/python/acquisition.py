@@ -0,0 +1,221 @@
+"""
+Akuisisi multi-perangkat: beberapa board AD8232 dalam satu proses.
+
+Tiap port mendapat `DeviceChannel` sendiri (thread pembaca dengan
+SerialSource asyncio, rekonstruksi waktu, antrian blok, filter streaming,
+detektor beat, ring buffer). Thread pembaca hanya membaca dan mendekode; semua pemrosesan
+dilakukan per blok (vektor) saat `AcquisitionManager.poll()` dipanggil dari
+loop Tk, jadi biaya per tick tumbuh dengan jumlah sampel, bukan jumlah
+pemanggilan per sampel. Semua kanal memakai jam host yang sama
+(`t0` manager), sehingga trace bisa ditumpuk pada sumbu waktu bersama.
+"""
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+import serial.tools.list_ports
+
+from async_sources import SerialSource
+from beat_detector import MIN_BEAT_INTERVAL_SEC, StreamingBeatDetector
+from block_queue import BlockQueue
+from pipeline import auto_threshold
+from recorder import RecordingWriter
+from ring_buffer import RingBuffer
+from streaming_filter import StreamingFilter
+from timeline import TimelineReconstructor
+
+# Record per sampel di ring buffer kanal: waktu (detik sejak t0 manager)
+CHANNEL_DTYPE = np.dtype([("t", "f8"), ("signal", "f4"), ("filtered", "f4"), ("bpm", "f4")])
+CHANNEL_COLUMNS = ["time", "signal", "signal_filtered", "bpm_filtered"]
+CHANNEL_FMT = "%.6f,%d,%.3f,%.3f"
+AUTO_THRESHOLD_SEC = 3.0  # data terfilter yang dipakai untuk threshold otomatis
+
+ARDUINO_DESCRIPTIONS = ("Arduino", "CH340", "USB Serial")
+ARDUINO_DEVICES = ("ttyACM", "ttyUSB")
+
+
+def is_arduino_port(port):
+    """True jika port (hasil list_ports.comports) kemungkinan adalah Arduino."""
+    return (any(s in port.description for s in ARDUINO_DESCRIPTIONS)
+            or any(s in port.device for s in ARDUINO_DEVICES))
+
+
+def detect_serial_ports():
+    """Semua port yang kemungkinan Arduino, misal ['COM3', 'COM5']."""
+    return [port.device for port in serial.tools.list_ports.comports() if is_arduino_port(port)]
+
+
+class DeviceChannel:
+    """
+    Satu perangkat serial beserta seluruh state pemrosesannya.
+    Port dibuka di thread pembacanya sendiri, jadi jeda reset Arduino
+    (2 detik per port) berjalan paralel untuk semua perangkat.
+    """
+
+    def __init__(self, port, fs, capacity, lowcut, highcut, notch, threshold=None,
+                 mode="auto", min_interval=MIN_BEAT_INTERVAL_SEC):
+        self.port = port
+        self.name = os.path.basename(port)
+        self.mode = mode
+        self.fs = fs
+        self.queue = BlockQueue()
+        self.timeline = TimelineReconstructor(fs)
+        self.buffer = RingBuffer(capacity, CHANNEL_DTYPE)
+        self.filter = StreamingFilter(fs, lowcut, highcut, notch, capacity=1)
+        self.beats = StreamingBeatDetector(threshold, min_interval)
+        self.source = None
+        self.recorder = None
+        self.error = None
+        self.current_bpm = 0.0
+        self._auto_threshold = threshold is None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def decoder(self):
+        """Decoder hasil negosiasi protokol (None selama port masih dibuka)."""
+        if self.source is None or self.source.ser is None:
+            return None
+        return self.source.decoder
+
+    @property
+    def connected(self):
+        return self.decoder is not None and self.error is None
+
+    def start(self, record_filename=None):
+        if record_filename:
+            self.recorder = RecordingWriter(record_filename, CHANNEL_COLUMNS, CHANNEL_FMT)
+        self._stop.clear()
+        self.source = SerialSource(self.port, self.mode, self.fs, timeline=self.timeline)
+        self._thread = threading.Thread(target=self._run, name=f"serial-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Hentikan pembaca dan tutup rekaman. Mengembalikan error rekaman (atau None)."""
+        self._stop.set()
+        if self.source:
+            self.source.stop_threadsafe()  # port ditutup oleh sumbernya sendiri
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+        error = self.recorder.close() if self.recorder else None
+        self.recorder = None
+        return error
+
+    def _run(self):
+        try:
+            asyncio.run(self._pump())
+        except Exception as e:
+            if not self._stop.is_set():
+                self.error = e
+
+    async def _pump(self):
+        async for block in self.source:
+            self.queue.put(block)
+
+    def poll(self, t0):
+        """
+        Proses semua blok yang menunggu. Mengembalikan record CHANNEL_DTYPE
+        baru (atau None) agar view bisa memperbarui envelope-nya.
+        """
+        block = self.queue.drain()
+        if block is None or len(block) == 0:
+            return None
+        t = block["t"] - t0
+        y = self.filter.process(block["value"])
+        records = np.empty(len(block), dtype=CHANNEL_DTYPE)
+        records["t"] = t
+        records["signal"] = block["value"]
+        records["filtered"] = y
+        if self._auto_threshold and self.beats.threshold is None:
+            # Tunggu cukup data terfilter sebelum menetapkan threshold
+            history = np.concatenate((self.buffer.view()["filtered"], y))
+            if len(history) < AUTO_THRESHOLD_SEC * self.fs:
+                records["bpm"] = 0.0
+                self.buffer.extend(records)
+                self._record(records)
+                return records
+            self.beats.threshold = auto_threshold(history)
+        _, bpm = self.beats.process(t, y)
+        records["bpm"] = bpm
+        self.current_bpm = float(bpm[-1])
+        self.buffer.extend(records)
+        self._record(records)
+        return records
+
+    def _record(self, records):
+        # Penulis yang sudah gagal tidak diberi blok lagi; errornya tampil di stats()
+        if self.recorder and self.recorder.error is None:
+            self.recorder.write(records)
+
+    def configure_filter(self, lowcut, highcut, notch):
+        """Ganti parameter filter; detektor beat di-reset bila filter berubah."""
+        if self.filter.configure(self.fs, lowcut, highcut, notch):
+            self.beats.reset()
+            if self._auto_threshold:
+                self.beats.threshold = None
+
+    def stats(self):
+        st = {"name": self.name, "bpm": self.current_bpm, "queue": self.queue.depth,
+              "lag": self.queue.last_lag, "fs": self.timeline.fs_estimate,
+              "gaps": self.timeline.gaps,
+              "error": self.error or (self.recorder.error if self.recorder else None)}
+        if self.decoder is not None:
+            st["decoder"] = self.decoder.stats()
+        return st
+
+
+class AcquisitionManager:
+    """
+    Kumpulan DeviceChannel dengan jam bersama. `poll()` dipanggil periodik
+    dari loop GUI (atau loop headless) dan memproses semua kanal sekaligus.
+    """
+
+    def __init__(self, ports, fs, window_sec, lowcut=0.5, highcut=40.0, notch=50.0,
+                 threshold=None, mode="auto"):
+        capacity = int(fs * window_sec)
+        self.channels = [DeviceChannel(port, fs, capacity, lowcut, highcut, notch, threshold, mode)
+                         for port in ports]
+        self.t0 = None
+
+    def start(self, record_prefix=None):
+        """
+        Mulai semua kanal. Jika `record_prefix` diisi, tiap kanal direkam ke
+        {record_prefix}_{nama port}.csv.
+        """
+        self.t0 = time.time()
+        for ch in self.channels:
+            filename = f"{record_prefix}_{ch.name}.csv" if record_prefix else None
+            ch.start(filename)
+
+    def stop(self):
+        """Hentikan semua kanal. Mengembalikan {nama kanal: error rekaman}."""
+        errors = {}
+        for ch in self.channels:
+            error = ch.stop()
+            if error:
+                errors[ch.name] = error
+        return errors
+
+    def poll(self):
+        """Proses blok baru di semua kanal. Mengembalikan {kanal: record baru}."""
+        if self.t0 is None:
+            return {}
+        updates = {}
+        for ch in self.channels:
+            records = ch.poll(self.t0)
+            if records is not None:
+                updates[ch] = records
+        return updates
+
+    def configure_filter(self, lowcut, highcut, notch):
+        for ch in self.channels:
+            ch.configure_filter(lowcut, highcut, notch)
+
+    @property
+    def t_latest(self):
+        """Waktu sampel terbaru di semua kanal (ujung kanan plot bersama)."""
+        latest = [float(ch.buffer.view(1)["t"][0]) for ch in self.channels if len(ch.buffer)]
+        return max(latest) if latest else 0.0
@@ -0,0 +1,94 @@
+"""
+Analisis batch tanpa GUI untuk satu direktori rekaman
+{label}_{gender}_{age}_{condition}.csv (atau .ekgs).
+
+Tiap file diproses di proses terpisah (ProcessPoolExecutor): filter,
+deteksi R-peak, ringkasan BPM/HRV dan ritme. Hasilnya satu tabel ringkasan CSV.
+
+Contoh:
+    python analyze.py data/ -o ringkasan.csv --workers 8 --highcut 35
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from chunked import BEATS_SUFFIX
+from pipeline import DEFAULT_FS, DEFAULT_SETTINGS, analyze_file
+from rhythm import EPISODES_SUFFIX
+from session_format import SESSION_EXT, parse_subject_filename
+
+SUMMARY_FILENAME = "ringkasan_analisis.csv"
+
+
+def find_recordings(directory, pattern=None, include_all=False, exclude=()):
+    """
+    File rekaman di `directory`. Tanpa `include_all`, hanya file yang namanya
+    mengikuti konvensi subjek yang diambil. File pendamping (_beats,
+    _episodes), tabel ringkasan default dan path di `exclude` dilewati.
+    """
+    patterns = [pattern] if pattern else ["*.csv", "*" + SESSION_EXT]
+    skip = {os.path.realpath(p) for p in (os.path.join(directory, SUMMARY_FILENAME), *exclude)}
+    paths = sorted({p for pat in patterns for p in glob.glob(os.path.join(directory, pat))
+                    if not p.endswith((BEATS_SUFFIX, EPISODES_SUFFIX)) and os.path.realpath(p) not in skip})
+    if not include_all:
+        paths = [p for p in paths if parse_subject_filename(p)]
+    return paths
+
+
+def analyze_directory(paths, settings=None, fs=DEFAULT_FS, workers=None):
+    """Analisis paralel; urutan baris sama dengan urutan `paths`."""
+    job = partial(analyze_file, settings=settings, fs=fs)
+    if workers == 1 or len(paths) <= 1:
+        rows = [job(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(job, paths, chunksize=max(1, len(paths) // 64)))
+    summary = pd.DataFrame(rows)
+    for col in ("n_beats", "n_rr", "n_pvc"):
+        if col in summary:
+            summary[col] = summary[col].astype("Int64")  # tetap bulat walau ada baris gagal
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis batch rekaman EKG")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--output", help=f"tabel ringkasan (default: <directory>/{SUMMARY_FILENAME})")
+    parser.add_argument("--pattern", help="pola glob file (default: *.csv dan *.ekgs)")
+    parser.add_argument("--all", action="store_true", help="sertakan file di luar konvensi nama subjek")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses (default: jumlah CPU)")
+    parser.add_argument("--fs", type=float, default=DEFAULT_FS,
+                        help="laju sampel jika file tidak punya waktu per sampel")
+    parser.add_argument("--lowcut", type=float, default=DEFAULT_SETTINGS["lowcut"])
+    parser.add_argument("--highcut", type=float, default=DEFAULT_SETTINGS["highcut"])
+    parser.add_argument("--notch", type=float, default=DEFAULT_SETTINGS["notch"])
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="threshold R-peak pada sinyal terfilter (default: otomatis)")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_SETTINGS["min_interval"])
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(args.directory, SUMMARY_FILENAME)
+    paths = find_recordings(args.directory, args.pattern, args.all, exclude=[output])
+    if not paths:
+        print(f"Tidak ada rekaman di {args.directory}", file=sys.stderr)
+        return 1
+    settings = {
+        "lowcut": args.lowcut, "highcut": args.highcut, "notch": args.notch,
+        "threshold": args.threshold, "min_interval": args.min_interval,
+    }
+    start = time.perf_counter()
+    summary = analyze_directory(paths, settings, args.fs, args.workers)
+    summary.to_csv(output, index=False, float_format="%.3f")
+    failed = int((summary["error"] != "").sum())
+    print(f"{len(paths)} rekaman ({failed} gagal) dalam {time.perf_counter() - start:.1f} detik -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+"""
+Inti akuisisi berbasis asyncio.
+
+Setiap sumber (serial, TCP, UDP, replay file) adalah async iterator yang
+menghasilkan blok RAW_DTYPE (waktu epoch per sampel, nilai ADC):
+
+    async for block in SerialSource("COM3"):
+        ...
+
+Pembacaan dilakukan oleh task produser yang mengisi antrian terbatas
+(`max_blocks`). Jika konsumen tertinggal, kebijakan `overflow` berlaku:
+"block" menahan produser (TCP/replay: tekanan balik sampai ke pengirim),
+"drop_oldest" membuang blok tertua (serial/UDP: perangkat tidak bisa
+ditahan) dan mencatatnya di statistik. `merge_sources` menggabungkan
+beberapa sumber menjadi satu aliran (sumber, blok).
+
+Contoh (perekam headless):
+    python async_sources.py serial COM3 COM4 --record sesi
+    python async_sources.py tcp 192.168.1.20:5000 --protocol binary
+    python async_sources.py replay dataset_ekg.csv --speed 4 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+import serial
+
+from block_queue import RAW_DTYPE
+from recorder import RecordingWriter
+from serial_protocol import (BAUD_RATE, LEGACY_BAUD_RATE, AsciiLineDecoder, BinaryFrameDecoder,
+                             open_serial)
+from session_format import iter_recording_blocks
+from timeline import TimelineReconstructor
+
+DEFAULT_FS = 250.0
+DEFAULT_MAX_BLOCKS = 256
+RAW_COLUMNS = ["timestamp", "raw"]
+RAW_FMT = "%.6f,%d"
+
+_END = object()
+
+
+def make_decoder(protocol):
+    return BinaryFrameDecoder() if protocol == "binary" else AsciiLineDecoder()
+
+
+class SourceStats:
+    """Counter per sumber; hanya ditulis dari event loop sumber itu."""
+
+    def __init__(self, name):
+        self.name = name
+        self.blocks = 0
+        self.samples = 0
+        self.bytes = 0
+        self.dropped_blocks = 0  # dibuang karena konsumen tertinggal
+        self.dropped_samples = 0
+        self.max_depth = 0  # antrian terpanjang (blok)
+        self.started = None
+        self.last_block = None
+
+    @property
+    def rate(self):
+        """Laju sampel rata-rata sejak mulai (sampel/detik)."""
+        if not self.started or not self.last_block or self.last_block <= self.started:
+            return 0.0
+        return self.samples / (self.last_block - self.started)
+
+    def as_dict(self):
+        return {
+            "name": self.name, "blocks": self.blocks, "samples": self.samples,
+            "bytes": self.bytes, "rate": self.rate, "dropped_blocks": self.dropped_blocks,
+            "dropped_samples": self.dropped_samples, "max_depth": self.max_depth,
+        }
+
+
+class BlockSource:
+    """
+    Dasar semua sumber. Turunan cukup mengimplementasikan `_produce()`
+    yang memanggil `await self._emit(block)` atau `await self._feed(data)`
+    untuk byte mentah, dan opsional `_close()`.
+    """
+    overflow = "drop_oldest"
+
+    def __init__(self, name, fs=DEFAULT_FS, protocol="ascii", max_blocks=DEFAULT_MAX_BLOCKS,
+                 overflow=None, timeline=None, probe=None):
+        self.name = name
+        self.fs = fs
+        self.max_blocks = max_blocks
+        if overflow:
+            self.overflow = overflow
+        self.decoder = make_decoder(protocol)
+        self.timeline = timeline or TimelineReconstructor(fs)
+        self.stats = SourceStats(name)
+        self.probe = probe  # opsional Instrumentation: durasi dekode per pembacaan
+        self.error = None
+        self._queue = None
+        self._loop = None
+        self._task = None
+        self._stop_requested = False
+
+    def __aiter__(self):
+        return self.blocks()
+
+    async def blocks(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.max_blocks)
+        self.stats.started = time.time()
+        self._task = asyncio.ensure_future(self._run())
+        if self._stop_requested:
+            self._task.cancel()
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is _END:
+                    break
+                yield item
+            if self.error:
+                raise self.error
+        finally:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            await self._close()
+
+    def stop_threadsafe(self):
+        """Hentikan sumber dari thread lain (mis. thread GUI)."""
+        self._stop_requested = True
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+
+    def snapshot(self):
+        """Statistik sumber + decoder + timeline dalam satu dict."""
+        st = self.stats.as_dict()
+        st["depth"] = self._queue.qsize() if self._queue else 0
+        st["decoder"] = self.decoder.stats()
+        st["fs_estimate"] = self.timeline.fs_estimate
+        st["gaps"] = self.timeline.gaps
+        st["error"] = self.error
+        return st
+
+    async def _run(self):
+        try:
+            await self._produce()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            if self._queue.full():
+                self._queue.get_nowait()  # beri tempat untuk penanda akhir
+            self._queue.put_nowait(_END)
+
+    async def _produce(self):
+        raise NotImplementedError
+
+    async def _close(self):
+        pass
+
+    async def _feed(self, data, arrival_time=None):
+        """Dekode byte mentah, beri waktu per sampel, lalu kirim sebagai blok."""
+        arrival_time = time.time() if arrival_time is None else arrival_time
+        start = time.perf_counter()
+        self.stats.bytes += len(data)
+        values, seq, t_us = self.decoder.feed(data)
+        if len(values) == 0:
+            return
+        block = np.empty(len(values), dtype=RAW_DTYPE)
+        block["t"] = self.timeline.push(arrival_time, len(values), seq, t_us)
+        block["value"] = values
+        if self.probe is not None:
+            self.probe.record("decode", time.perf_counter() - start)
+        await self._emit(block)
+
+    async def _emit(self, block):
+        queue = self._queue
+        if queue.full() and self.overflow == "drop_oldest":
+            dropped = queue.get_nowait()
+            self.stats.dropped_blocks += 1
+            self.stats.dropped_samples += len(dropped)
+        await queue.put(block)
+        self.stats.blocks += 1
+        self.stats.samples += len(block)
+        self.stats.last_block = time.time()
+        self.stats.max_depth = max(self.stats.max_depth, queue.qsize())
+
+
+class SerialSource(BlockSource):
+    """
+    Port serial. Di POSIX descriptor port didaftarkan ke event loop
+    (add_reader) dan dibaca non-blocking saat siap; di Windows pembacaan
+    blocking dengan timeout dijalankan di thread executor. Bisa memakai
+    port yang sudah dibuka (`ser` + `decoder`, mis. dari EkgApp) atau
+    membuka sendiri dengan negosiasi protokol open_serial.
+    """
+
+    def __init__(self, port=None, mode="auto", fs=DEFAULT_FS, ser=None, decoder=None, **kwargs):
+        super().__init__(port or getattr(ser, "port", "serial"), fs, **kwargs)
+        self.port = port
+        self.mode = mode
+        self.ser = ser
+        self._owns_port = ser is None
+        if decoder is not None:
+            self.decoder = decoder
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        if self.ser is None:
+            self.ser, self.decoder = await loop.run_in_executor(None, self._open)
+        if os.name == "posix" and hasattr(self.ser, "fileno"):
+            await self._read_nonblocking(loop)
+        else:
+            await self._read_executor(loop)
+
+    def _open(self):
+        ser, decoder = open_serial(self.port, self.mode, BAUD_RATE, LEGACY_BAUD_RATE)
+        if self._stop_requested:
+            ser.close()  # dihentikan selama jeda reset Arduino
+            raise serial.SerialException("dihentikan saat membuka port")
+        return ser, decoder
+
+    async def _read_nonblocking(self, loop):
+        ready = asyncio.Event()
+        fd = self.ser.fileno()
+        self.ser.timeout = 0  # read() tidak pernah menunggu
+        loop.add_reader(fd, ready.set)
+        try:
+            while self.ser.is_open:
+                await ready.wait()
+                ready.clear()
+                data = self.ser.read(max(1, self.ser.in_waiting))
+                if data:
+                    await self._feed(data)
+        finally:
+            loop.remove_reader(fd)
+
+    async def _read_executor(self, loop):
+        ser = self.ser
+        while ser.is_open:
+            data = await loop.run_in_executor(None, lambda: ser.read(max(1, ser.in_waiting)))
+            if data:
+                await self._feed(data)
+
+    async def _close(self):
+        if self._owns_port and self.ser is not None:
+            self.ser.close()
+
+
+class TcpSource(BlockSource):
+    """
+    Stream TCP (mis. bridge ESP/serial-over-network). Overflow "block":
+    saat konsumen tertinggal, pembacaan berhenti dan flow control TCP
+    menahan pengirim.
+    """
+    overflow = "block"
+
+    def __init__(self, host, port, fs=DEFAULT_FS, **kwargs):
+        super().__init__(f"tcp://{host}:{port}", fs, **kwargs)
+        self.host = host
+        self.port = port
+        self._writer = None
+
+    async def _produce(self):
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        while True:
+            data = await reader.read(1 << 16)
+            if not data:
+                break  # koneksi ditutup pengirim
+            await self._feed(data)
+
+    async def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _DatagramQueue(asyncio.DatagramProtocol):
+    def __init__(self, source, queue):
+        self.source = source
+        self.queue = queue
+
+    def datagram_received(self, data, addr):
+        if self.queue.full():
+            self.source.stats.dropped_blocks += 1  # datagram dibuang sebelum didekode
+            return
+        self.queue.put_nowait((time.time(), data))
+
+
+class UdpSource(BlockSource):
+    """
+    Datagram UDP yang diterima di (host, port) lokal. Satu datagram boleh
+    berisi beberapa baris/frame; datagram hilang tercatat sebagai gap oleh
+    decoder biner atau timeline.
+    """
+
+    def __init__(self, host, port, fs=DEFAULT_FS, **kwargs):
+        super().__init__(f"udp://{host}:{port}", fs, **kwargs)
+        self.host = host
+        self.port = port
+        self._transport = None
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        datagrams = asyncio.Queue(self.max_blocks)
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramQueue(self, datagrams), local_addr=(self.host, self.port))
+        while True:
+            arrival_time, data = await datagrams.get()
+            await self._feed(data, arrival_time)
+
+    async def _close(self):
+        if self._transport is not None:
+            self._transport.close()
+
+
+class FileReplaySource(BlockSource):
+    """
+    Putar ulang rekaman CSV/.ekgs per blok `block_sec`. `speed` 1.0 = waktu
+    nyata, N = N kali lebih cepat, 0/None = secepat mungkin. Waktu sampel
+    tetap mengikuti rekaman (t0 + t rekaman), hanya jeda antar blok yang
+    diskalakan. Overflow "block": replay melambat mengikuti konsumen.
+    """
+    overflow = "block"
+
+    def __init__(self, path, fs=DEFAULT_FS, speed=1.0, block_sec=0.02, read_sec=10.0, **kwargs):
+        super().__init__(f"replay:{os.path.basename(path)}", fs, **kwargs)
+        self.path = path
+        self.speed = speed
+        self.block_sec = block_sec
+        self.read_sec = read_sec
+
+    def _chunks(self):
+        """Potongan (t rekaman, nilai) berurutan; diganti oleh sumber sintetis."""
+        for t_rec, signal, _ in iter_recording_blocks(self.path, int(self.read_sec * self.fs), self.fs):
+            yield t_rec, signal
+
+    async def _produce(self):
+        t0 = time.time()
+        step = max(1, int(self.block_sec * self.fs))
+        for t_rec, signal in self._chunks():
+            for i in range(0, len(signal), step):
+                t = t_rec[i:i + step]
+                if self.speed:
+                    delay = t0 + t[-1] / self.speed - time.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                block = np.empty(len(t), dtype=RAW_DTYPE)
+                block["t"] = t0 + t
+                block["value"] = signal[i:i + step]
+                await self._emit(block)
+            await asyncio.sleep(0)  # beri giliran sumber lain saat speed=0
+
+
+async def merge_sources(sources):
+    """
+    Gabungkan beberapa sumber menjadi satu aliran (sumber, blok). Antrian
+    gabungan terbatas, jadi tekanan balik tetap diteruskan ke tiap sumber.
+    Error sumber disimpan di `source.error`, sumber lain tetap berjalan.
+    """
+    merged = asyncio.Queue(4 * len(sources))
+
+    async def pump(source):
+        stream = source.blocks()
+        try:
+            async for block in stream:
+                await merged.put((source, block))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            source.error = e
+        finally:
+            await stream.aclose()
+        await merged.put((source, None))
+
+    tasks = [asyncio.ensure_future(pump(s)) for s in sources]
+    remaining = len(sources)
+    try:
+        while remaining:
+            source, block = await merged.get()
+            if block is None:
+                remaining -= 1
+                continue
+            yield source, block
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "0.0.0.0", int(port)
+
+
+def build_sources(args):
+    kwargs = {"fs": args.fs}
+    if args.kind == "serial":
+        return [SerialSource(port, args.mode, **kwargs) for port in args.targets]
+    if args.kind == "replay":
+        return [FileReplaySource(path, speed=args.speed, **kwargs) for path in args.targets]
+    cls = TcpSource if args.kind == "tcp" else UdpSource
+    return [cls(*_parse_address(t), protocol=args.protocol, **kwargs) for t in args.targets]
+
+
+async def run_recorder(sources, record_prefix=None, duration=None, report_sec=1.0):
+    """
+    Perekam headless: setiap sumber direkam ke {record_prefix}_{n}.csv dan
+    statistik dicetak setiap `report_sec` detik.
+    """
+    writers = {}
+    if record_prefix:
+        writers = {s: RecordingWriter(f"{record_prefix}_{i}.csv", RAW_COLUMNS, RAW_FMT)
+                   for i, s in enumerate(sources)}
+    start = last_report = time.time()
+    stream = merge_sources(sources)
+    try:
+        async for source, block in stream:
+            if source in writers:
+                writers[source].write(block)
+            now = time.time()
+            if now - last_report >= report_sec:
+                last_report = now
+                for s in sources:
+                    st = s.snapshot()
+                    print(f"{st['name']}: {st['samples']} sampel, {st['rate']:.1f}/s, "
+                          f"antrian {st['depth']}, drop {st['dropped_blocks']} blok")
+            if duration and now - start >= duration:
+                break
+    finally:
+        await stream.aclose()
+        for writer in writers.values():
+            writer.close()
+    for s in sources:
+        if s.error:
+            print(f"{s.name}: error {s.error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akuisisi EKG headless berbasis asyncio")
+    parser.add_argument("kind", choices=["serial", "tcp", "udp", "replay"])
+    parser.add_argument("targets", nargs="+", help="port serial, host:port, atau file rekaman")
+    parser.add_argument("--protocol", choices=["ascii", "binary"], default="ascii",
+                        help="format byte untuk tcp/udp")
+    parser.add_argument("--mode", default="auto", help="mode serial: auto, binary, ascii")
+    parser.add_argument("--fs", type=float, default=DEFAULT_FS)
+    parser.add_argument("--speed", type=float, default=1.0, help="kecepatan replay (0 = secepat mungkin)")
+    parser.add_argument("--record", help="prefix file CSV rekaman per sumber")
+    parser.add_argument("--duration", type=float, help="berhenti setelah N detik")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_recorder(build_sources(args), args.record, args.duration))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import numpy as np
+
+MIN_BEAT_INTERVAL_SEC = 0.25  # detik, minimal antar beat
+
+
+def rising_edge_crossings(signal, threshold, prev_value=None):
+    """
+    Indeks sampel i di mana signal[i] > threshold dan sampel sebelumnya <= threshold.
+    `prev_value` adalah sampel terakhir blok sebelumnya (mode bertahap).
+    """
+    signal = np.asarray(signal)
+    if len(signal) == 0:
+        return np.empty(0, dtype=np.intp)
+    above = signal > threshold
+    if prev_value is None:
+        prev_below = np.concatenate(([False], ~above[:-1]))
+    else:
+        prev_below = np.concatenate(([prev_value <= threshold], ~above[:-1]))
+    return np.flatnonzero(above & prev_below)
+
+
+def apply_refractory(t, candidates, min_interval, last_beat_time=None):
+    """
+    Buang kandidat beat yang jaraknya <= min_interval dari beat yang diterima
+    sebelumnya. Loop hanya berjalan atas kandidat (beberapa per detak),
+    bukan atas seluruh sampel.
+    """
+    if len(candidates) == 0:
+        return candidates
+    cand_t = np.asarray(t)[candidates]
+    gaps = np.diff(cand_t)
+    first_ok = last_beat_time is None or (cand_t[0] - last_beat_time) > min_interval
+    if first_ok and np.all(gaps > min_interval):
+        return candidates  # jalur cepat: tidak ada kandidat yang berdekatan
+    keep = []
+    last = last_beat_time
+    for idx, bt in zip(candidates, cand_t):
+        if last is None or (bt - last) > min_interval:
+            keep.append(idx)
+            last = bt
+    return np.asarray(keep, dtype=np.intp)
+
+
+def detect_beats(t, signal, threshold, min_interval=MIN_BEAT_INTERVAL_SEC):
+    """
+    Deteksi R-peak berbasis crossing threshold (naik) dengan periode refrakter.
+    Mengembalikan indeks sampel beat.
+    """
+    return apply_refractory(t, rising_edge_crossings(signal, threshold), min_interval)
+
+
+def instantaneous_bpm(t, beat_idx, n_samples, prev_beat_times=()):
+    """
+    BPM instan per sampel: 60 / (selisih dua beat terakhir sampai sampel itu),
+    0 jika belum ada dua beat. Diisi dengan np.searchsorted, tanpa loop Python.
+    `prev_beat_times` berisi waktu beat dari blok sebelumnya (maks. 2 dipakai).
+    """
+    t = np.asarray(t)
+    beat_times = np.concatenate((np.asarray(prev_beat_times, dtype=np.float64)[-2:], t[beat_idx]))
+    n_prev = len(beat_times) - len(beat_idx)
+    intervals = np.diff(beat_times)
+    with np.errstate(divide="ignore"):
+        beat_bpm = np.where(intervals > 0, 60.0 / np.where(intervals > 0, intervals, 1.0), 0.0)
+    beat_bpm = np.concatenate(([0.0], beat_bpm))  # BPM yang berlaku setelah beat ke-k
+    # Jumlah beat (termasuk dari blok sebelumnya) sampai dan termasuk sampel i
+    count = np.searchsorted(beat_idx, np.arange(n_samples), side="right") + n_prev
+    bpm = np.zeros(n_samples, dtype=np.float64)
+    has_two = count >= 2
+    bpm[has_two] = beat_bpm[count[has_two] - 1]
+    return bpm
+
+
+class StreamingBeatDetector:
+    """
+    Versi bertahap dari detect_beats + instantaneous_bpm: setiap pemanggilan
+    `process` hanya memproses blok sampel baru, state crossing, refrakter dan
+    dua beat terakhir dibawa antar blok.
+    """
+
+    def __init__(self, threshold, min_interval=MIN_BEAT_INTERVAL_SEC):
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.reset()
+
+    def reset(self):
+        self._last_value = None
+        self._beat_times = []  # maksimal dua beat terakhir
+        self.beat_count = 0
+
+    @property
+    def last_beat_time(self):
+        return self._beat_times[-1] if self._beat_times else None
+
+    def process(self, t, signal):
+        """
+        Proses blok baru. Mengembalikan (indeks beat di dalam blok, BPM per sampel).
+        """
+        t = np.asarray(t, dtype=np.float64)
+        signal = np.asarray(signal)
+        n = len(signal)
+        if n == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        candidates = rising_edge_crossings(signal, self.threshold, self._last_value)
+        beats = apply_refractory(t, candidates, self.min_interval, self.last_beat_time)
+        bpm = instantaneous_bpm(t, beats, n, self._beat_times)
+        if len(beats):
+            self._beat_times = (self._beat_times + t[beats[-2:]].tolist())[-2:]
+            self.beat_count += len(beats)
+        self._last_value = signal[-1]
+        return beats, bpm
@@ -0,0 +1,100 @@
+"""
+Benchmark deteksi beat: loop Python lama (_calculate_bpm_from_signal)
+vs. detektor vektor NumPy (beat_detector.py) pada dataset_ekg.csv.
+
+Jalankan dari root repo:
+    python code/python/benchmarks/bench_beat_detector.py
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from beat_detector import StreamingBeatDetector, detect_beats, instantaneous_bpm  # noqa: E402
+
+DEFAULT_CSV = os.path.join(HERE, "..", "..", "..", "dataset_ekg.csv")
+
+
+def legacy_calculate_bpm(t, signal, threshold, min_interval=0.25):
+    # Salinan apa adanya dari EkgApp._calculate_bpm_from_signal sebelum divektorkan
+    last_beat_time = None
+    beat_times = []
+    bpm_list = []
+    for i in range(1, len(signal)):
+        if signal[i] > threshold and signal[i-1] <= threshold:
+            if last_beat_time is None or (t[i] - last_beat_time) > min_interval:
+                beat_times.append(t[i])
+                last_beat_time = t[i]
+        if len(beat_times) >= 2:
+            interval = beat_times[-1] - beat_times[-2]
+            if interval > 0:
+                bpm = 60.0 / interval
+            else:
+                bpm = 0
+        else:
+            bpm = 0
+        bpm_list.append(bpm)
+    bpm_list = [0] + bpm_list
+    return bpm_list
+
+
+def vectorized_calculate_bpm(t, signal, threshold):
+    beats = detect_beats(t, signal, threshold)
+    return instantaneous_bpm(t, beats, len(signal))
+
+
+def load_signal(path, seconds, fs):
+    raw = np.loadtxt(path, delimiter=",", skiprows=1, usecols=1)
+    n = int(seconds * fs)
+    signal = np.resize(raw, n).astype(np.float64)  # ulangi dataset sampai n sampel
+    # Timestamp di CSV berupa detik bulat (banyak yang identik), jadi pakai n/fs
+    t = np.arange(n) / fs
+    return t, signal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--fs", type=float, default=250.0)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="default: persentil 98 sinyal (BPM_THRESHOLD=620 terlalu tinggi untuk dataset ini)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'window':>8} {'loop (ms)':>10} {'numpy (ms)':>11} {'speedup':>8} {'stream/blk (us)':>16} {'beats':>6}")
+    for seconds in (10, 60, 600):
+        t, signal = load_signal(args.csv, seconds, args.fs)
+        threshold = args.threshold if args.threshold is not None else float(np.percentile(signal, 98))
+
+        ref = np.asarray(legacy_calculate_bpm(t, signal, threshold))
+        out = vectorized_calculate_bpm(t, signal, threshold)
+        assert np.allclose(ref, out), "hasil detektor vektor berbeda dari loop lama"
+
+        loop_s = min(timeit.repeat(lambda: legacy_calculate_bpm(t, signal, threshold),
+                                   number=1, repeat=args.repeat))
+        vec_s = min(timeit.repeat(lambda: vectorized_calculate_bpm(t, signal, threshold),
+                                  number=1, repeat=args.repeat))
+
+        # Mode bertahap: blok ~50 sampel (200 ms @ 250 Hz), seperti satu redraw
+        block = max(1, int(0.2 * args.fs))
+        det = StreamingBeatDetector(threshold)
+
+        def stream():
+            det.reset()
+            for i in range(0, len(signal), block):
+                det.process(t[i:i + block], signal[i:i + block])
+
+        stream_s = min(timeit.repeat(stream, number=1, repeat=args.repeat))
+        per_block_us = stream_s / max(1, len(signal) // block) * 1e6
+        n_beats = len(detect_beats(t, signal, threshold))
+        print(f"{seconds:>7}s {loop_s * 1e3:>10.2f} {vec_s * 1e3:>11.2f} {loop_s / vec_s:>7.1f}x "
+              f"{per_block_us:>16.1f} {n_beats:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+Benchmark end-to-end jalur akuisisi -> pemrosesan -> plot -> ekspor
+pada input 250, 500 dan 1000 Hz (sinyal sintetis test.ino, deterministik).
+
+Tahap yang diukur (padanan metode EkgApp dalam kurung):
+    parse_ascii_legacy   readline pyserial + int() + time.time() + Queue.put per sampel
+                         (_serial_worker lama, lewat FakeSerial)
+    parse_ascii_batch    AsciiLineDecoder.feed per pembacaan (_serial_worker)
+    parse_binary         BinaryFrameDecoder.feed per pembacaan (_serial_worker)
+    queue_drain          BlockQueue put/drain + deteksi beat + ring buffer (_process_serial_queue)
+    stream_filter        StreamingFilter per tick (_update_filtered_buffer)
+    apply_filter         filter zero-phase seluruh sinyal (apply_filter)
+    bpm_calculation      detect_beats + BPM per sampel (_calculate_bpm_from_signal)
+    plot_update          envelope + set_data + blit di canvas Agg (_update_plot_from_buffer)
+    csv_record           RecordingWriter streaming (rekaman selama start_task)
+    csv_export           ekspor kolom filtered per blok (stop_task)
+    end_to_end           semua tahap per tick; latensi sampel-ke-piksel
+
+Untuk tiap tahap dicatat sampel/detik, latensi p50/p99 per pemanggilan
+(end_to_end: latensi sampel-ke-piksel) dan puncak memori (tracemalloc).
+Hasil disimpan sebagai JSON (default benchmarks/bench_results.json) agar
+bisa dibandingkan antar versi.
+
+Jalankan dari root repo:
+    python code/python/benchmarks/bench_pipeline.py -o hasil_baru.json
+    python code/python/benchmarks/bench_pipeline.py --compare hasil_lama.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import matplotlib  # noqa: E402
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from beat_detector import StreamingBeatDetector  # noqa: E402
+from block_queue import RAW_DTYPE, BlockQueue  # noqa: E402
+from chunked import process_recording  # noqa: E402
+from decimate import MinMaxDecimator  # noqa: E402
+from pipeline import bpm_from_signal, filter_signal  # noqa: E402
+from plot_renderer import BlitRenderer  # noqa: E402
+from recorder import RecordingWriter  # noqa: E402
+from replay import SyntheticEkg  # noqa: E402
+from ring_buffer import RingBuffer  # noqa: E402
+from serial_protocol import AsciiLineDecoder, BinaryFrameDecoder, encode_frames  # noqa: E402
+from streaming_filter import StreamingFilter  # noqa: E402
+
+RATES = (250, 500, 1000)
+READ_SEC = 0.01  # satu pembacaan serial per 10 ms
+TICK_SEC = 0.033  # interval redraw minimum BlitRenderer
+WINDOW_SEC = 10
+REPEATS = 5  # pengulangan untuk tahap satu-pemanggilan (offline)
+RAW_THRESHOLD = 620  # BPM_THRESHOLD di gui.py
+FILTER = (0.5, 40.0, 50.0)
+SAMPLE_DTYPE = np.dtype([("t", "f8"), ("signal", "f4"), ("bpm", "f4")])
+RECORD_COLUMNS = ["time", "signal", "bpm"]
+RECORD_FMT = "%.6f,%d,%.3f"
+
+STAGES = {}
+
+
+def stage(fn):
+    STAGES[fn.__name__] = fn
+    return fn
+
+
+class Data:
+    """Sinyal uji untuk satu laju sampel, plus byte ASCII/biner seperti firmware."""
+
+    def __init__(self, fs, seconds):
+        self.fs = fs
+        self.t, self.values = SyntheticEkg(fs).samples(0, int(seconds * fs))
+        self.ascii = b"".join(b"%d\r\n" % v for v in self.values.tolist())
+        self.binary = encode_frames(self.values, 0, np.round(self.t * 1e6).astype(np.uint64))
+        per_read = max(1, int(READ_SEC * fs))
+        self.read_bounds = list(range(0, len(self.values), per_read)) + [len(self.values)]
+
+    def ascii_reads(self):
+        """Potongan byte ASCII per pembacaan (batas baris mengikuti sampel)."""
+        offsets = np.concatenate(([0], np.cumsum([len(b"%d\r\n" % v) for v in self.values.tolist()])))
+        return [self.ascii[offsets[a]:offsets[b]] for a, b in zip(self.read_bounds[:-1], self.read_bounds[1:])]
+
+    def binary_reads(self):
+        return [self.binary[a * 12:b * 12] for a, b in zip(self.read_bounds[:-1], self.read_bounds[1:])]
+
+    def ticks(self):
+        """Batas sampel per tick GUI."""
+        per_tick = max(1, int(TICK_SEC * self.fs))
+        return list(range(0, len(self.values), per_tick)) + [len(self.values)]
+
+
+def _timed_calls(calls):
+    """Jalankan daftar callable, kembalikan latensi per pemanggilan (detik)."""
+    lat = np.empty(len(calls))
+    for i, call in enumerate(calls):
+        start = time.perf_counter()
+        call()
+        lat[i] = time.perf_counter() - start
+    return lat
+
+
+class FakeSerial(io.RawIOBase):
+    """
+    Port serial palsu dengan jalur baca seperti pyserial: serial.Serial
+    turunan io.RawIOBase tanpa peek, jadi readline() dari IOBase memanggil
+    read(1) per byte. Byte masuk lewat `arrive` (satu pembacaan firmware).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buf = bytearray()
+        self._pos = 0
+
+    def arrive(self, data):
+        del self._buf[:self._pos]
+        self._pos = 0
+        self._buf.extend(data)
+
+    @property
+    def in_waiting(self):
+        return len(self._buf) - self._pos
+
+    def readable(self):
+        return True
+
+    def read(self, size=1):
+        out = bytes(self._buf[self._pos:self._pos + size])
+        self._pos += len(out)
+        return out
+
+
+@stage
+def parse_ascii_legacy(data):
+    ser = FakeSerial()
+    samples = queue.Queue()
+    reads = data.ascii_reads()
+
+    def worker_pass(chunk):
+        # Satu putaran `while ser.in_waiting` dari _serial_worker lama
+        ser.arrive(chunk)
+        while ser.in_waiting:
+            line = ser.readline().decode("utf-8").strip()
+            if not line or line == "!":
+                continue
+            try:
+                value = int(line)
+            except ValueError:
+                continue
+            samples.put((time.time(), value))
+
+    return len(data.values), _timed_calls([lambda r=r: worker_pass(r) for r in reads])
+
+
+@stage
+def parse_ascii_batch(data):
+    decoder = AsciiLineDecoder()
+    reads = data.ascii_reads()
+    return len(data.values), _timed_calls([lambda r=r: decoder.feed(r) for r in reads])
+
+
+@stage
+def parse_binary(data):
+    decoder = BinaryFrameDecoder()
+    reads = data.binary_reads()
+    return len(data.values), _timed_calls([lambda r=r: decoder.feed(r) for r in reads])
+
+
+def _raw_blocks(data):
+    blocks = []
+    for a, b in zip(data.read_bounds[:-1], data.read_bounds[1:]):
+        block = np.empty(b - a, dtype=RAW_DTYPE)
+        block["t"] = data.t[a:b]
+        block["value"] = data.values[a:b]
+        blocks.append(block)
+    return blocks
+
+
+class QueueConsumer:
+    """Versi tanpa Tk dari EkgApp._process_serial_queue."""
+
+    def __init__(self, fs):
+        self.queue = BlockQueue()
+        self.buffer = RingBuffer(int(fs * 600), SAMPLE_DTYPE)
+        self.beats = StreamingBeatDetector(RAW_THRESHOLD)
+
+    def drain(self):
+        block = self.queue.drain()
+        if block is None:
+            return None
+        _, bpm = self.beats.process(block["t"], block["value"])
+        records = np.empty(len(block), dtype=SAMPLE_DTYPE)
+        records["t"] = block["t"]
+        records["signal"] = block["value"]
+        records["bpm"] = bpm
+        self.buffer.extend(records)
+        return records
+
+
+def _blocks_per_tick(data, blocks):
+    reads_per_tick = max(1, int(round(TICK_SEC / READ_SEC)))
+    return [blocks[i:i + reads_per_tick] for i in range(0, len(blocks), reads_per_tick)]
+
+
+@stage
+def queue_drain(data):
+    consumer = QueueConsumer(data.fs)
+
+    def tick(group):
+        for block in group:
+            consumer.queue.put(block)
+        consumer.drain()
+
+    groups = _blocks_per_tick(data, _raw_blocks(data))
+    return len(data.values), _timed_calls([lambda g=g: tick(g) for g in groups])
+
+
+@stage
+def stream_filter(data):
+    flt = StreamingFilter(data.fs, *FILTER, capacity=int(data.fs * 600))
+    bounds = data.ticks()
+    x = data.values.astype(np.float64)
+    calls = [lambda a=a, b=b: flt.push(data.t[a:b], x[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    return len(x), _timed_calls(calls)
+
+
+@stage
+def apply_filter(data):
+    x = data.values.astype(np.float64)
+    filter_signal(x[:100], data.fs, *FILTER)  # desain SOS masuk cache seperti setelah tick pertama
+    return len(x) * REPEATS, _timed_calls([lambda: filter_signal(x, data.fs, *FILTER)] * REPEATS)
+
+
+@stage
+def bpm_calculation(data):
+    filtered = filter_signal(data.values.astype(np.float64), data.fs, *FILTER)
+    threshold = 0.6 * float(np.percentile(filtered, 99.5))
+    return len(filtered) * REPEATS, _timed_calls([lambda: bpm_from_signal(data.t, filtered, threshold)] * REPEATS)
+
+
+class PlotHarness:
+    """
+    Versi tanpa Tk dari EkgApp._update_plot_from_buffer: 4 axes, envelope
+    min/max, histeresis axis dan blitting, di canvas Agg offscreen.
+    """
+
+    def __init__(self, fs, width_px=1400, height_px=800):
+        self.fs = fs
+        self.fig = Figure(figsize=(width_px / 100, height_px / 100), dpi=100)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.axes = [self.fig.add_subplot(221 + i) for i in range(4)]
+        self.lines = [ax.plot([], [], lw=1.5)[0] for ax in self.axes]
+        self.renderer = BlitRenderer(self.canvas, self.axes)
+        self.canvas.draw()
+        px = max(100, int(self.axes[0].bbox.width))
+        bucket = max(1, int(WINDOW_SEC * fs) // px)
+        capacity = int(1.5 * WINDOW_SEC * fs / bucket) + 2
+        self.envelopes = [MinMaxDecimator(bucket, capacity) for _ in self.axes]
+
+    def update(self, t, signal, bpm, filtered, bpm_filt):
+        for env, y in zip(self.envelopes, (signal, bpm, filtered, bpm_filt)):
+            env.push(t, y)
+        t_max = float(t[-1])
+        for ax, line, env in zip(self.axes, self.lines, self.envelopes):
+            te, ye = env.view()
+            start = np.searchsorted(te, t_max - WINDOW_SEC, side="left")
+            te, ye = te[start:], ye[start:]
+            line.set_data(te, ye)
+            self.renderer.scroll_x(ax, t_max, WINDOW_SEC)
+            if len(ye):
+                self.renderer.fit_y(ax, float(ye.min()), float(ye.max()), 5)
+        self.renderer.draw()
+
+
+@stage
+def plot_update(data):
+    plot = PlotHarness(data.fs)
+    bounds = data.ticks()
+    x = data.values.astype(np.float32)
+    zeros = np.zeros(len(x), dtype=np.float32)
+    calls = [lambda a=a, b=b: plot.update(data.t[a:b], x[a:b], zeros[a:b], x[a:b], zeros[a:b])
+             for a, b in zip(bounds[:-1], bounds[1:])]
+    return len(x), _timed_calls(calls)
+
+
+def _records(data):
+    records = np.empty(len(data.values), dtype=SAMPLE_DTYPE)
+    records["t"] = data.t
+    records["signal"] = data.values
+    records["bpm"] = 0.0
+    return records
+
+
+@stage
+def csv_record(data):
+    records = _records(data)
+    bounds = data.ticks()
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = RecordingWriter(os.path.join(tmp, "rec.csv"), RECORD_COLUMNS, RECORD_FMT)
+        calls = [lambda a=a, b=b: writer.write(records[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+        calls.append(lambda: writer.close())  # termasuk flush + fsync terakhir
+        return len(records), _timed_calls(calls)
+
+
+@stage
+def csv_export(data):
+    records = _records(data)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rec.csv")
+        writer = RecordingWriter(path, RECORD_COLUMNS, RECORD_FMT)
+        writer.write(records)
+        writer.close()
+        settings = dict(zip(("lowcut", "highcut", "notch"), FILTER), threshold=100.0)
+        export = [lambda: process_recording(path, os.path.join(tmp, "out.csv"), settings=settings, fs=data.fs)]
+        return len(records) * REPEATS, _timed_calls(export * REPEATS)
+
+
+@stage
+def end_to_end(data):
+    """
+    Simulasi kejadian diskret dengan biaya nyata: sampel tiba per pembacaan
+    10 ms, GUI memproses per tick (decode, antrian, filter, plot). Waktu
+    tick berikutnya mundur jika biaya tick melebihi interval (backlog).
+    Latensi sampel-ke-piksel = waktu selesai tick - waktu sampel dibuat.
+    """
+    decoder = BinaryFrameDecoder()
+    consumer = QueueConsumer(data.fs)
+    flt = StreamingFilter(data.fs, *FILTER, capacity=1)
+    beats_f = StreamingBeatDetector(100.0)
+    plot = PlotHarness(data.fs)
+    reads = data.binary_reads()
+    arrival = np.array([data.t[min(b, len(data.t)) - 1] for b in data.read_bounds[1:]])
+
+    latencies = []
+    clock = 0.0
+    next_read = 0
+    while next_read < len(reads):
+        clock += TICK_SEC
+        start = time.perf_counter()
+        due = next_read
+        while due < len(reads) and arrival[due] <= clock:
+            due += 1
+        if due == next_read:
+            continue
+        for r in reads[next_read:due]:
+            values, seq, t_us = decoder.feed(r)
+            block = np.empty(len(values), dtype=RAW_DTYPE)
+            block["t"] = t_us * 1e-6
+            block["value"] = values
+            consumer.queue.put(block)
+        records = consumer.drain()
+        y = flt.process(records["signal"])
+        _, bpm_f = beats_f.process(records["t"], y)
+        plot.update(records["t"], records["signal"], records["bpm"], y, bpm_f)
+        cost = time.perf_counter() - start
+        done = clock + cost
+        latencies.append(done - records["t"])
+        clock = max(clock, done - TICK_SEC)  # tick berikutnya tertunda jika ada backlog
+        next_read = due
+    return len(data.values), np.concatenate(latencies)
+
+
+def run_stage(name, data, measure_memory=True):
+    fn = STAGES[name]
+    start = time.perf_counter()
+    n, lat = fn(data)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if measure_memory:
+        tracemalloc.start()
+        fn(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    lat_ms = np.asarray(lat) * 1000
+    busy = float(np.sum(lat)) if name != "end_to_end" else elapsed
+    return {
+        "samples": int(n),
+        "samples_per_sec": n / busy if busy > 0 else float("inf"),
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "calls": int(len(lat_ms)),
+        "peak_mem_mb": peak / 1e6 if peak is not None else None,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nDibandingkan dengan {baseline_path} ({baseline['meta'].get('git')})")
+    print(f"{'fs':>5} {'tahap':<20} {'sampel/s':>10} {'p99 ms':>10}")
+    for fs, stages in results["results"].items():
+        for name, r in stages.items():
+            old = baseline["results"].get(fs, {}).get(name)
+            if not old:
+                continue
+            speed = r["samples_per_sec"] / old["samples_per_sec"] if old["samples_per_sec"] else float("nan")
+            p99 = r["p99_ms"] / old["p99_ms"] if old["p99_ms"] else float("nan")
+            flag = "  <-- regresi" if speed < 0.8 or p99 > 1.25 else ""
+            print(f"{fs:>5} {name:<20} {speed:>9.2f}x {p99:>9.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end pipeline EKG")
+    parser.add_argument("--rates", type=int, nargs="+", default=list(RATES))
+    parser.add_argument("--seconds", type=float, default=30.0, help="panjang sinyal uji per laju")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--no-memory", action="store_true", help="lewati pengukuran tracemalloc")
+    parser.add_argument("-o", "--output", default=os.path.join(HERE, "bench_results.json"))
+    parser.add_argument("--compare", help="file JSON hasil sebelumnya")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "git": _git_revision(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__, "platform": platform.platform(),
+            "seconds": args.seconds, "read_sec": READ_SEC, "tick_sec": TICK_SEC,
+        },
+        "results": {},
+    }
+    print(f"{'fs':>5} {'tahap':<20} {'sampel/s':>12} {'p50 ms':>9} {'p99 ms':>9} {'mem MB':>8}")
+    for fs in args.rates:
+        data = Data(fs, args.seconds)
+        stages = results["results"][str(fs)] = {}
+        for name in args.stages:
+            r = stages[name] = run_stage(name, data, not args.no_memory)
+            mem = f"{r['peak_mem_mb']:.1f}" if r["peak_mem_mb"] is not None else "-"
+            print(f"{fs:>5} {name:<20} {r['samples_per_sec']:>12.0f} {r['p50_ms']:>9.3f} "
+                  f"{r['p99_ms']:>9.3f} {mem:>8}")
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nHasil disimpan ke {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
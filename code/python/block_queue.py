@@ -0,0 +1,64 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Satu sampel mentah dari thread serial: waktu (epoch detik) dan nilai ADC
+RAW_DTYPE = np.dtype([("t", "f8"), ("value", "i2")])
+
+
+class BlockQueue:
+    """
+    Antrian blok sampel satu produser / satu konsumer (thread serial -> Tk).
+
+    Produser memasukkan satu array NumPy per pembacaan serial, konsumer
+    mengambil semuanya sekaligus dengan `drain`. `deque.append`/`popleft`
+    atomik di CPython, jadi tidak ada lock per sampel. Counter masuk/keluar
+    masing-masing hanya ditulis oleh satu thread.
+    """
+
+    def __init__(self):
+        self._blocks = deque()
+        self.samples_in = 0  # hanya ditulis produser
+        self.samples_out = 0  # hanya ditulis konsumer
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def depth(self):
+        """Jumlah sampel yang menunggu diproses GUI."""
+        return self.samples_in - self.samples_out
+
+    def put(self, block):
+        self._blocks.append((time.time(), block))
+        self.samples_in += len(block)
+
+    def drain(self):
+        """
+        Ambil semua blok yang tersedia sebagai satu array, atau None jika kosong.
+        Lag = umur blok tertua saat diambil (seberapa jauh GUI tertinggal).
+        """
+        blocks = []
+        oldest = None
+        while True:
+            try:
+                arrived, block = self._blocks.popleft()
+            except IndexError:
+                break
+            if oldest is None:
+                oldest = arrived
+            blocks.append(block)
+        if not blocks:
+            return None
+        out = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+        self.samples_out += len(out)
+        self.last_lag = time.time() - oldest
+        self.max_lag = max(self.max_lag, self.last_lag)
+        return out
+
+    def clear(self):
+        self._blocks.clear()
+        self.samples_in = 0
+        self.samples_out = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
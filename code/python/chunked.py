@@ -0,0 +1,201 @@
+"""
+Pemrosesan out-of-core untuk rekaman sangat panjang (Holter beberapa jam).
+
+Rekaman dibaca per blok, difilter, dideteksi beat-nya, lalu hasilnya
+langsung ditulis ke disk, jadi memori puncak hanya sebesar beberapa blok
+berapa pun panjang rekaman:
+- mode kausal: state `zi` filter SOS dibawa antar blok (hasil identik
+  dengan satu kali sosfilt atas seluruh sinyal);
+- mode zero-phase: tiap blok difilter maju-mundur bersama konteks
+  `pad` sampel di kiri dan kanan, hanya bagian tengah yang dikeluarkan.
+  Konteks cukup panjang untuk meluruhkan respons transien filter, sehingga
+  hasilnya praktis sama dengan sosfiltfilt atas seluruh sinyal.
+
+Contoh:
+    python chunked.py rekaman_24jam.csv -o hasil.csv --beats beat.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.signal import sosfiltfilt
+
+from beat_detector import StreamingBeatDetector
+from hrv import HRV_KEYS, StreamingHrv
+from rhythm import RhythmClassifier, rhythm_summary, write_episodes
+from pipeline import DEFAULT_FS, DEFAULT_SETTINGS, RrSummary, auto_threshold
+from session_format import iter_recording_blocks
+from streaming_filter import StreamingFilter, design_sos
+
+DEFAULT_BLOCK_SEC = 60.0
+ZERO_PHASE_PAD_SEC = 10.0  # konteks per sisi; transien band-pass 0.5 Hz luruh jauh sebelum ini
+OUTPUT_COLUMNS = ("signal_filtered", "bpm_filtered")
+BEAT_COLUMNS = ["time", "bpm"] + list(HRV_KEYS)  # HRV jendela 5 menit yang berlaku di tiap beat
+BEAT_FMT = "%.6f,%.3f," + ",".join(["%.3f"] * len(HRV_KEYS))
+BEATS_SUFFIX = "_beats.csv"  # file beat pendamping rekaman GUI
+
+
+class OverlapZeroPhaseFilter:
+    """
+    sosfiltfilt per blok dengan konteks `pad` sampel di kedua sisi. Keluaran
+    tertunda `pad` sampel (butuh konteks kanan); sisa dikeluarkan oleh
+    `flush()`. Array lain yang sejajar dengan sinyal (waktu, records) bisa
+    diteruskan sebagai `payload` agar tetap selaras dengan keluaran.
+    """
+
+    def __init__(self, sos, pad):
+        self.sos = sos
+        self.pad = int(pad)
+        self._left = np.empty(0, dtype=np.float64)  # konteks kiri (sudah dikeluarkan)
+        self._pending = None  # [x, *payload] yang belum dikeluarkan
+
+    def push(self, x, *payload):
+        """Tambah blok; kembalikan (y, *payload) yang sudah punya konteks kanan penuh."""
+        arrays = [np.asarray(x, dtype=np.float64)] + list(payload)
+        if self._pending is None:
+            self._pending = arrays
+        else:
+            self._pending = [np.concatenate((a, b)) for a, b in zip(self._pending, arrays)]
+        emit = len(self._pending[0]) - self.pad
+        if emit <= self.pad:
+            return None  # konteks kanan belum cukup, tunggu blok berikutnya
+        return self._emit(emit)
+
+    def flush(self):
+        if self._pending is None or len(self._pending[0]) == 0:
+            return None
+        return self._emit(len(self._pending[0]))
+
+    def _emit(self, emit):
+        x = self._pending[0]
+        segment = np.concatenate((self._left, x))
+        # Rekaman sangat pendek: perpendek padding tepi bawaan sosfiltfilt
+        padlen = min(3 * (2 * len(self.sos) + 1), len(segment) - 1)
+        y = sosfiltfilt(self.sos, segment, padlen=padlen)[len(self._left):len(self._left) + emit]
+        self._left = segment[:len(self._left) + emit][-self.pad:]
+        out = [y] + [a[:emit] for a in self._pending[1:]]
+        self._pending = [a[emit:] for a in self._pending]
+        return out
+
+
+def process_recording(in_path, out_path=None, beats_path=None, settings=None, fs=DEFAULT_FS,
+                      zero_phase=True, block_sec=DEFAULT_BLOCK_SEC, pad_sec=ZERO_PHASE_PAD_SEC,
+                      episodes_path=None):
+    """
+    Filter + deteksi beat per blok. `out_path` menerima semua kolom asli
+    ditambah signal_filtered dan bpm_filtered (boleh sama dengan `in_path`,
+    file ditulis ke .tmp lalu diganti). `beats_path` menerima satu baris per
+    beat (time, bpm, metrik HRV), `episodes_path` episode ritme (rhythm.py).
+    Mengembalikan ringkasan BPM/HRV seperti pipeline.rr_summary (dihitung
+    bertahap oleh RrSummary) + ringkasan ritme.
+
+    Dengan threshold otomatis, threshold ditetapkan dari blok terfilter
+    pertama (seluruh sinyal tidak pernah ada di memori).
+    """
+    s = dict(DEFAULT_SETTINGS, **(settings or {}))
+    block_samples = max(1, int(block_sec * fs))
+    blocks = iter_recording_blocks(in_path, block_samples, fs)
+    sos = design_sos(float(s["lowcut"]), float(s["highcut"]), float(s["notch"]), float(fs))
+    if zero_phase:
+        stage = OverlapZeroPhaseFilter(sos, int(pad_sec * fs))
+    else:
+        stage = StreamingFilter(fs, s["lowcut"], s["highcut"], s["notch"], capacity=1)
+    detector = StreamingBeatDetector(s["threshold"], s["min_interval"])
+    hrv = StreamingHrv()
+    classifier = RhythmClassifier(fs)
+    rr_stats = RrSummary()
+    n_samples = 0
+
+    out_tmp = out_path + ".tmp" if out_path else None
+    beats_tmp = beats_path + ".tmp" if beats_path else None
+    out_file = open(out_tmp, "w", newline="") if out_tmp else None
+    beats_file = open(beats_tmp, "w", newline="") if beats_tmp else None
+    try:
+        if beats_file:
+            beats_file.write(",".join(BEAT_COLUMNS) + "\n")
+
+        def consume(y, t, rec):
+            nonlocal n_samples
+            if detector.threshold is None:
+                detector.threshold = auto_threshold(y)
+            beats, bpm = detector.process(t, y)
+            rr_stats.push(t[beats])
+            classifier.process(t, y, beats)
+            if out_file:
+                df = pd.DataFrame(rec)
+                df = df.drop(columns=[c for c in OUTPUT_COLUMNS if c in df])
+                df["signal_filtered"] = y
+                df["bpm_filtered"] = bpm
+                df.to_csv(out_file, header=n_samples == 0, index=False)
+            if beats_file and len(beats):
+                rows = []
+                for beat_time, beat_bpm in zip(t[beats].tolist(), bpm[beats].tolist()):
+                    hrv.push(beat_time)
+                    m = hrv.metrics()
+                    rows.append([beat_time, beat_bpm] + [m[k] for k in HRV_KEYS])
+                np.savetxt(beats_file, np.array(rows), fmt=BEAT_FMT)
+            n_samples += len(y)
+
+        for t, x, rec in blocks:
+            if zero_phase:
+                out = stage.push(x, t, rec)
+                if out is not None:
+                    consume(*out)
+            else:
+                consume(stage.process(x), t, rec)
+        if zero_phase:
+            out = stage.flush()
+            if out is not None:
+                consume(*out)
+    except BaseException:
+        for f, tmp in ((out_file, out_tmp), (beats_file, beats_tmp)):
+            if f:
+                f.close()
+                os.remove(tmp)
+        raise
+    for f, tmp, final in ((out_file, out_tmp, out_path), (beats_file, beats_tmp, beats_path)):
+        if f:
+            f.close()
+            if n_samples:
+                os.replace(tmp, final)
+            else:
+                os.remove(tmp)  # rekaman kosong: tidak ada yang ditulis
+
+    classifier.flush()
+    if episodes_path and n_samples:
+        write_episodes(episodes_path, classifier.episodes)
+    summary = rr_stats.summary()
+    summary.update(rhythm_summary(classifier.episodes))
+    summary["n_samples"] = n_samples
+    summary["threshold"] = detector.threshold
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pemrosesan rekaman EKG panjang per blok")
+    parser.add_argument("input", help="rekaman .csv atau .ekgs")
+    parser.add_argument("-o", "--output", help="CSV keluaran dengan kolom terfilter")
+    parser.add_argument("--beats", help="CSV keluaran waktu beat + BPM + HRV")
+    parser.add_argument("--episodes", help="CSV keluaran episode ritme")
+    parser.add_argument("--causal", action="store_true", help="filter kausal (tanpa zero-phase)")
+    parser.add_argument("--fs", type=float, default=DEFAULT_FS)
+    parser.add_argument("--block-sec", type=float, default=DEFAULT_BLOCK_SEC)
+    parser.add_argument("--pad-sec", type=float, default=ZERO_PHASE_PAD_SEC)
+    parser.add_argument("--lowcut", type=float, default=DEFAULT_SETTINGS["lowcut"])
+    parser.add_argument("--highcut", type=float, default=DEFAULT_SETTINGS["highcut"])
+    parser.add_argument("--notch", type=float, default=DEFAULT_SETTINGS["notch"])
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    settings = {"lowcut": args.lowcut, "highcut": args.highcut, "notch": args.notch,
+                "threshold": args.threshold}
+    summary = process_recording(args.input, args.output, args.beats, settings, args.fs,
+                                zero_phase=not args.causal, block_sec=args.block_sec,
+                                pad_sec=args.pad_sec, episodes_path=args.episodes)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
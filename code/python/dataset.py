@@ -0,0 +1,330 @@
+"""
+Pembangun dataset berjendela untuk pelatihan CNN.
+
+Alur per rekaman {label}_{gender}_{age}_{condition}.csv (atau .ekgs):
+filter zero-phase + deteksi beat (sekali, di-cache), lalu potong jendela
+berpusat di puncak R ("beat") atau jendela tetap dengan stride ("fixed").
+Pemotongan divektorkan lewat sliding_window_view, tanpa loop per jendela.
+
+Tata letak cache:
+    <cache>/digests.json                      sha1 isi file (dimemo per ukuran + mtime)
+    <cache>/filtered/<hash filter>/<sha1>.npz sinyal terfilter + indeks beat
+    <cache>/windows/<hash konfigurasi>/
+        manifest.json                         konfigurasi + shard per file
+        shards/<sha1>.npy                     float32 (n_jendela, panjang), bisa di-memmap
+        index.csv                             satu baris per jendela
+
+Nama shard = sha1 isi rekaman, jadi membangun ulang setelah menambah satu
+subjek hanya memproses subjek itu; file yang berubah diproses ulang dan
+file yang hilang dikeluarkan dari index. Konfigurasi jendela berbeda
+memakai ulang cache filter yang sama.
+
+Contoh:
+    python dataset.py data/ -o cache/ --mode beat --window 0.8 --pre 0.3
+    python dataset.py data/ -o cache/ --mode fixed --window 5 --stride 2.5
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from analyze import find_recordings
+from beat_detector import detect_beats
+from pipeline import DEFAULT_FS, DEFAULT_SETTINGS, auto_threshold, filter_signal, load_recording
+from rhythm import R_SEARCH_SEC
+from session_format import SESSION_EXT, SessionReader, parse_subject_filename
+
+BUILDER_VERSION = 1  # naikkan jika cara memotong/menormalisasi berubah
+FILTER_KEYS = ("fs", "lowcut", "highcut", "notch", "threshold", "min_interval")
+DEFAULT_CONFIG = dict(
+    DEFAULT_SETTINGS,
+    fs=DEFAULT_FS,  # laju sampel dataset; rekaman lain diinterpolasi ke laju ini
+    mode="beat",  # "beat" (berpusat puncak R) atau "fixed" (stride tetap)
+    window_sec=0.8,
+    pre_sec=0.3,  # mode beat: panjang jendela sebelum puncak R
+    stride_sec=2.5,  # mode fixed
+    normalize="zscore",  # "zscore" per jendela atau None
+)
+INDEX_COLUMNS = ["shard", "row", "file", "label", "gender", "age", "condition", "center_sec", "target"]
+TARGET_COLUMN = "label"  # label per sampel di CSV perekam (dataset_ekg.csv), -1 jika tidak ada
+
+
+def config_digest(config, keys=None):
+    """Hash pendek konfigurasi (hanya `keys` jika diberikan)."""
+    items = {k: config[k] for k in (keys or sorted(config))}
+    items["version"] = BUILDER_VERSION
+    return hashlib.sha1(json.dumps(items, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def file_digest(path, memo=None):
+    """sha1 isi file. `memo` (dict) melewatkan hashing ulang bila ukuran dan mtime sama."""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    stamp = [st.st_size, st.st_mtime_ns]
+    if memo is not None and key in memo and memo[key][:2] == stamp:
+        return memo[key][2]
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    digest = h.hexdigest()
+    if memo is not None:
+        memo[key] = stamp + [digest]
+    return digest
+
+
+def _sample_targets(path):
+    """Kolom label per sampel dari rekaman, atau None."""
+    if path.endswith(SESSION_EXT):
+        reader = SessionReader(path)
+        if TARGET_COLUMN not in reader.column_names:
+            return None
+        return np.asarray(reader.read(columns=[TARGET_COLUMN])[TARGET_COLUMN], dtype=np.int16)
+    if TARGET_COLUMN not in pd.read_csv(path, nrows=0).columns:
+        return None
+    return pd.read_csv(path, usecols=[TARGET_COLUMN])[TARGET_COLUMN].to_numpy(dtype=np.int16)
+
+
+def load_filtered(path, digest, config, cache_dir):
+    """
+    Sinyal terfilter (pada config["fs"]), indeks beat dan label per sampel
+    satu rekaman. Dihitung sekali per (isi file, pengaturan filter).
+    """
+    path_cache = os.path.join(cache_dir, "filtered", config_digest(config, FILTER_KEYS), digest + ".npz")
+    if os.path.exists(path_cache):
+        with np.load(path_cache) as data:
+            targets = data["targets"] if data["targets"].size else None
+            return data["filtered"], data["beats"], targets
+    fs = config["fs"]
+    t, signal, file_fs = load_recording(path, fs)
+    targets = _sample_targets(path)
+    if abs(file_fs - fs) > 0.01 * fs:
+        # Samakan laju sampel agar panjang jendela (sampel) sama untuk semua subjek
+        t_new = np.arange(0.0, t[-1], 1.0 / fs)
+        if targets is not None:
+            targets = targets[np.minimum(np.searchsorted(t, t_new), len(t) - 1)]
+        signal = np.interp(t_new, t, signal)
+    t = np.arange(len(signal)) / fs
+    filtered = filter_signal(signal, fs, config["lowcut"], config["highcut"], config["notch"])
+    threshold = auto_threshold(filtered) if config["threshold"] is None else config["threshold"]
+    beats = detect_beats(t, filtered, threshold, config["min_interval"])
+    filtered = filtered.astype(np.float32)
+    os.makedirs(os.path.dirname(path_cache), exist_ok=True)
+    tmp = path_cache + ".tmp.npz"
+    np.savez(tmp, filtered=filtered, beats=beats,
+             targets=targets if targets is not None else np.empty(0, np.int16))
+    os.replace(tmp, path_cache)
+    return filtered, beats, targets
+
+
+def window_starts(filtered, beats, config):
+    """
+    Indeks sampel awal dan pusat tiap jendela. Mode beat: crossing threshold
+    digeser ke puncak R terdekat (maks lokal di R_SEARCH_SEC).
+    """
+    fs = config["fs"]
+    length = int(round(config["window_sec"] * fs))
+    n = len(filtered)
+    if config["mode"] == "fixed":
+        starts = np.arange(0, n - length + 1, max(1, int(round(config["stride_sec"] * fs))))
+        return starts, starts + length // 2
+    lo, hi = (int(round(s * fs)) for s in R_SEARCH_SEC)
+    beats = beats[(beats + lo >= 0) & (beats + hi < n)]
+    if len(beats) == 0:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    peaks = beats + lo + np.argmax(sliding_window_view(filtered, hi - lo + 1)[beats + lo], axis=1)
+    starts = peaks - int(round(config["pre_sec"] * fs))
+    valid = (starts >= 0) & (starts + length <= n)
+    return starts[valid], peaks[valid]
+
+
+def normalize_windows(windows, normalize="zscore"):
+    """Normalisasi per jendela (in-place); dipakai juga oleh inferensi live."""
+    if normalize == "zscore" and len(windows):
+        windows -= windows.mean(axis=1, keepdims=True)
+        windows /= np.maximum(windows.std(axis=1, keepdims=True), 1e-6)
+    return windows
+
+
+def cut_windows(filtered, starts, length, normalize="zscore"):
+    """Matriks (n_jendela, length) float32; view tanpa salinan sampai dinormalisasi."""
+    windows = sliding_window_view(filtered, length)[starts].astype(np.float32)
+    return normalize_windows(windows, normalize)
+
+
+def build_shard(job, config, cache_dir, shard_dir):
+    """Proses satu rekaman menjadi satu shard. Mengembalikan baris index-nya."""
+    path, digest = job
+    filtered, beats, targets = load_filtered(path, digest, config, cache_dir)
+    length = int(round(config["window_sec"] * config["fs"]))
+    starts, centers = window_starts(filtered, beats, config)
+    windows = cut_windows(filtered, starts, length, config["normalize"])
+    tmp = os.path.join(shard_dir, digest + ".tmp.npy")
+    np.save(tmp, windows)
+    os.replace(tmp, os.path.join(shard_dir, digest + ".npy"))
+    rows = pd.DataFrame({
+        "shard": digest,
+        "row": np.arange(len(windows)),
+        "file": os.path.basename(path),
+        "center_sec": centers / config["fs"],
+        "target": targets[centers] if targets is not None else -1,
+    })
+    for key, value in parse_subject_filename(path).items():
+        rows[key] = value
+    return rows.reindex(columns=INDEX_COLUMNS)
+
+
+def _load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def build_dataset(paths, cache_dir, config=None, workers=None):
+    """
+    Bangun (atau perbarui) dataset untuk `paths`. Hanya rekaman yang shard-nya
+    belum ada untuk konfigurasi ini yang diproses. Mengembalikan dict berisi
+    dataset_dir, n_windows, built (file baru diproses) dan reused.
+    """
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    dataset_dir = os.path.join(cache_dir, "windows", config_digest(config))
+    shard_dir = os.path.join(dataset_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+
+    memo_path = os.path.join(cache_dir, "digests.json")
+    memo = _load_json(memo_path, {})
+    digests = {path: file_digest(path, memo) for path in paths}
+    _save_json(memo_path, memo)
+
+    manifest_path = os.path.join(dataset_dir, "manifest.json")
+    index_path = os.path.join(dataset_dir, "index.csv")
+    manifest = _load_json(manifest_path, {"config": config, "shards": {}})
+    old_index = pd.read_csv(index_path, dtype={"shard": str}) if os.path.exists(index_path) else None
+    wanted = set(digests.values())
+    reused = {d for d in wanted if d in manifest["shards"] and old_index is not None
+              and os.path.exists(os.path.join(shard_dir, d + ".npy"))}
+    jobs = [(path, d) for path, d in digests.items() if d not in reused]
+    # Isi file sama dengan nama berbeda cukup diproses sekali
+    jobs = list({d: (path, d) for path, d in jobs}.values())
+
+    job = partial(build_shard, config=config, cache_dir=cache_dir, shard_dir=shard_dir)
+    if workers == 1 or len(jobs) <= 1:
+        new_rows = [job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            new_rows = list(pool.map(job, jobs))
+
+    parts = [old_index[old_index["shard"].isin(reused)]] if reused else []
+    index = pd.concat(parts + new_rows, ignore_index=True).reindex(columns=INDEX_COLUMNS)
+    index = index.sort_values(["file", "row"], kind="stable", ignore_index=True)
+    index.to_csv(index_path + ".tmp", index=False, float_format="%.3f")
+    os.replace(index_path + ".tmp", index_path)
+    counts = index["shard"].value_counts()
+    manifest = {"config": config, "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "window_len": int(round(config["window_sec"] * config["fs"])),
+                "shards": {d: {"file": os.path.basename(path), "n": int(counts.get(d, 0))}
+                           for path, d in digests.items()}}
+    _save_json(manifest_path, manifest)
+    # Shard yang tidak lagi dirujuk (file dihapus/berubah) dibuang
+    for name in os.listdir(shard_dir):
+        if name.endswith(".npy") and name[:-4] not in wanted:
+            os.remove(os.path.join(shard_dir, name))
+    return {"dataset_dir": dataset_dir, "n_windows": len(index),
+            "built": [path for path, _ in jobs], "reused": len(reused)}
+
+
+class WindowDataset:
+    """
+    Akses dataset hasil build_dataset tanpa memuat semua shard: tiap shard
+    dibuka sebagai np.memmap saat pertama dipakai. `dataset[i]` memberi
+    (jendela, baris index); `take(indices)` mengumpulkan batch (n, panjang).
+    """
+
+    def __init__(self, dataset_dir):
+        self.dataset_dir = dataset_dir
+        self.manifest = _load_json(os.path.join(dataset_dir, "manifest.json"), None)
+        if self.manifest is None:
+            raise FileNotFoundError(f"manifest.json tidak ditemukan di {dataset_dir}")
+        self.index = pd.read_csv(os.path.join(dataset_dir, "index.csv"), dtype={"shard": str})
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def shard(self, digest):
+        arr = self._shards.get(digest)
+        if arr is None:
+            arr = self._shards[digest] = np.load(
+                os.path.join(self.dataset_dir, "shards", digest + ".npy"), mmap_mode="r")
+        return arr
+
+    def __getitem__(self, i):
+        row = self.index.iloc[i]
+        return self.shard(row["shard"])[row["row"]], row
+
+    def take(self, indices):
+        rows = self.index.iloc[np.asarray(indices)]
+        out = np.empty((len(rows), self.manifest["window_len"]), dtype=np.float32)
+        for digest, group in rows.groupby("shard", sort=False):
+            out[rows.index.get_indexer(group.index)] = self.shard(digest)[group["row"].to_numpy()]
+        return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun dataset jendela EKG untuk pelatihan CNN")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--cache", default="dataset_cache", help="direktori cache/dataset")
+    parser.add_argument("--pattern", help="pola glob file (default: *.csv dan *.ekgs)")
+    parser.add_argument("--all", action="store_true", help="sertakan file di luar konvensi nama subjek")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses (default: jumlah CPU)")
+    parser.add_argument("--fs", type=float, default=DEFAULT_CONFIG["fs"])
+    parser.add_argument("--mode", choices=("beat", "fixed"), default=DEFAULT_CONFIG["mode"])
+    parser.add_argument("--window", type=float, default=DEFAULT_CONFIG["window_sec"], help="panjang jendela (detik)")
+    parser.add_argument("--pre", type=float, default=DEFAULT_CONFIG["pre_sec"], help="mode beat: detik sebelum puncak R")
+    parser.add_argument("--stride", type=float, default=DEFAULT_CONFIG["stride_sec"], help="mode fixed: stride (detik)")
+    parser.add_argument("--no-normalize", action="store_true", help="tanpa z-score per jendela")
+    parser.add_argument("--lowcut", type=float, default=DEFAULT_CONFIG["lowcut"])
+    parser.add_argument("--highcut", type=float, default=DEFAULT_CONFIG["highcut"])
+    parser.add_argument("--notch", type=float, default=DEFAULT_CONFIG["notch"])
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="threshold R-peak pada sinyal terfilter (default: otomatis)")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_CONFIG["min_interval"])
+    args = parser.parse_args(argv)
+
+    paths = find_recordings(args.directory, args.pattern, args.all)
+    if not paths:
+        print(f"Tidak ada rekaman di {args.directory}", file=sys.stderr)
+        return 1
+    config = {
+        "fs": args.fs, "mode": args.mode, "window_sec": args.window, "pre_sec": args.pre,
+        "stride_sec": args.stride, "normalize": None if args.no_normalize else "zscore",
+        "lowcut": args.lowcut, "highcut": args.highcut, "notch": args.notch,
+        "threshold": args.threshold, "min_interval": args.min_interval,
+    }
+    start = time.perf_counter()
+    result = build_dataset(paths, args.cache, config, args.workers)
+    print(f"{result['n_windows']} jendela dari {len(paths)} rekaman "
+          f"({len(result['built'])} diproses, {result['reused']} dari cache) "
+          f"dalam {time.perf_counter() - start:.1f} detik -> {result['dataset_dir']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
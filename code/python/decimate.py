@@ -0,0 +1,91 @@
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+ENVELOPE_DTYPE = np.dtype([("t", "f8"), ("y", "f4")])
+
+
+def minmax_envelope(t, y, bucket_size):
+    """
+    Reduksi min/max per bucket berisi `bucket_size` sampel (hanya bucket penuh).
+    Tiap bucket menghasilkan dua titik (min dan max) dalam urutan waktu aslinya,
+    jadi lonjakan QRS tetap terlihat walau jumlah titik jauh berkurang.
+    """
+    n = len(y) // bucket_size
+    if n == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float32)
+    Y = np.asarray(y[:n * bucket_size]).reshape(n, bucket_size)
+    T = np.asarray(t[:n * bucket_size]).reshape(n, bucket_size)
+    i_min = Y.argmin(axis=1)
+    i_max = Y.argmax(axis=1)
+    first = np.minimum(i_min, i_max)
+    second = np.maximum(i_min, i_max)
+    rows = np.arange(n)
+    t_out = np.empty(2 * n, dtype=np.float64)
+    y_out = np.empty(2 * n, dtype=np.float32)
+    t_out[0::2] = T[rows, first]
+    t_out[1::2] = T[rows, second]
+    y_out[0::2] = Y[rows, first]
+    y_out[1::2] = Y[rows, second]
+    return t_out, y_out
+
+
+class MinMaxDecimator:
+    """
+    Envelope min/max bertahap untuk satu trace. Hanya bucket yang baru penuh
+    yang dihitung pada tiap `push`; sisa sampel disimpan sebagai bucket parsial.
+    Dengan bucket_size=1 trace diteruskan apa adanya.
+    """
+
+    def __init__(self, bucket_size, capacity_buckets):
+        self.bucket_size = max(1, int(bucket_size))
+        points_per_bucket = 1 if self.bucket_size == 1 else 2
+        self._env = RingBuffer(points_per_bucket * max(1, int(capacity_buckets)), ENVELOPE_DTYPE)
+        self._pending_t = np.empty(self.bucket_size, dtype=np.float64)
+        self._pending_y = np.empty(self.bucket_size, dtype=np.float32)
+        self._n_pending = 0
+
+    def reset(self):
+        self._env.clear()
+        self._n_pending = 0
+
+    def push(self, t, y):
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float32)
+        if len(y) == 0:
+            return
+        if self.bucket_size == 1:
+            self._extend_env(t, y)
+            return
+        if self._n_pending:
+            # Lengkapi bucket parsial dulu
+            t = np.concatenate((self._pending_t[:self._n_pending], t))
+            y = np.concatenate((self._pending_y[:self._n_pending], y))
+        full = (len(y) // self.bucket_size) * self.bucket_size
+        if full:
+            self._extend_env(*minmax_envelope(t[:full], y[:full], self.bucket_size))
+        rest = len(y) - full
+        self._pending_t[:rest] = t[full:]
+        self._pending_y[:rest] = y[full:]
+        self._n_pending = rest
+
+    def _extend_env(self, t, y):
+        block = np.empty(len(y), dtype=ENVELOPE_DTYPE)
+        block["t"] = t
+        block["y"] = y
+        self._env.extend(block)
+
+    def view(self):
+        """
+        (t, y) envelope termasuk bucket parsial terakhir, siap untuk Line2D.set_data.
+        """
+        env = self._env.view()
+        if self._n_pending == 0:
+            return env["t"], env["y"]
+        pt = self._pending_t[:self._n_pending]
+        py = self._pending_y[:self._n_pending]
+        if self._n_pending > 2:
+            i_min, i_max = int(py.argmin()), int(py.argmax())
+            keep = sorted({i_min, i_max})
+            pt, py = pt[keep], py[keep]
+        return np.concatenate((env["t"], pt)), np.concatenate((env["y"], py))
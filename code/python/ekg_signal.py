@@ -0,0 +1,293 @@
+"""
+Filter dan penghitung beat bersama untuk semua alat: GUI, perekam
+PyQtGraph dan skrip monitor matplotlib di root repo.
+
+Semua objek berstate per instance (tanpa variabel global). `process(x)`
+menerima satu sampel (skalar -> skalar) atau blok NumPy (array -> array);
+state dibawa antar pemanggilan, jadi memproses per sampel atau per blok
+memberi hasil yang sama.
+
+    Ema(alpha)                   EMA orde satu (lfilter + zi untuk blok)
+    MovingAverage(n)             rata-rata n sampel terakhir (running sum)
+    BandPass(fs, low, high)      Butterworth band-pass (SOS)
+    Notch(fs, freq)              notch IIR (SOS)
+    Chain(f1, f2, ...)           rangkaian filter
+    BeatCounter(threshold, fs)   crossing naik + periode refrakter
+    AdaptiveBeatDetector(fs)     idem dengan threshold adaptif + BPM dari R-R
+    RrBpm(n)                     BPM dari rata-rata n interval R-R terakhir
+
+Contoh:
+    ema = Ema(0.1, initial=512)
+    counter = BeatCounter(20, fs=500)
+    diff = block - ema.process(block)
+    n_beats = len(counter.process(diff))
+"""
+from collections import deque
+
+import numpy as np
+from scipy.signal import butter, iirnotch, lfilter, sosfilt, sosfilt_zi, tf2sos
+
+from beat_detector import MIN_BEAT_INTERVAL_SEC, apply_refractory, rising_edge_crossings
+from hrv import RR_RANGE_SEC
+
+DEFAULT_EMA_ALPHA = 0.1
+ADC_MIDPOINT = 512  # nilai awal EMA: tengah rentang ADC 10-bit
+RR_BEATS = 8  # interval R-R yang dirata-rata untuk BPM
+PEAK_SEARCH_SEC = 0.08  # puncak beat dicari sejauh ini setelah crossing
+THRESHOLD_RATIO = 0.4  # threshold = noise + rasio x (puncak - noise)
+LEVEL_WEIGHT = 0.125  # bobot beat baru pada level puncak (seperti Pan-Tompkins)
+NOISE_TAU_SEC = 2.0  # konstanta waktu level noise
+MISSED_BEAT_SEC = 2.0  # tanpa beat selama ini -> level puncak diturunkan
+
+
+class Ema:
+    """y[n] = alpha * x[n] + (1 - alpha) * y[n-1]."""
+
+    def __init__(self, alpha=DEFAULT_EMA_ALPHA, initial=ADC_MIDPOINT):
+        self.alpha = alpha
+        self.initial = initial
+        self.reset()
+
+    def reset(self):
+        self.value = float(self.initial)
+
+    def process(self, x):
+        if np.ndim(x) == 0:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+            return self.value
+        x = np.asarray(x, dtype=np.float64)
+        if len(x) == 0:
+            return x
+        y, _ = lfilter([self.alpha], [1.0, self.alpha - 1.0], x, zi=[(1 - self.alpha) * self.value])
+        self.value = float(y[-1])
+        return y
+
+
+class MovingAverage:
+    """
+    Rata-rata `window` sampel terakhir. Sebelum jendela penuh, rata-rata
+    sampel yang ada. Per sampel O(1) (running sum), per blok lewat cumsum.
+    """
+
+    def __init__(self, window=5):
+        self.window = int(window)
+        self.reset()
+
+    def reset(self):
+        self._recent = deque(maxlen=self.window)
+        self._sum = 0.0
+
+    def process(self, x):
+        if np.ndim(x) == 0:
+            if len(self._recent) == self.window:
+                self._sum -= self._recent[0]
+            self._recent.append(x)
+            self._sum += x
+            return self._sum / len(self._recent)
+        x = np.asarray(x, dtype=np.float64)
+        if len(x) == 0:
+            return x
+        history = np.fromiter(self._recent, dtype=np.float64, count=len(self._recent))
+        ext = np.concatenate((history, x))
+        csum = np.concatenate(([0.0], np.cumsum(ext)))
+        end = np.arange(len(history) + 1, len(ext) + 1)
+        start = np.maximum(end - self.window, 0)
+        y = (csum[end] - csum[start]) / (end - start)
+        self._recent.extend(ext[-self.window:].tolist())
+        self._sum = float(sum(self._recent))
+        return y
+
+
+class SosFilter:
+    """Filter IIR kausal (second-order sections) dengan state zi antar blok."""
+
+    def __init__(self, sos):
+        self.sos = sos
+        self.reset()
+
+    def reset(self):
+        self._zi = None
+
+    def process(self, x):
+        scalar = np.ndim(x) == 0
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        if len(x) == 0:
+            return x
+        if self._zi is None:
+            # Mulai dari kondisi tunak pada sampel pertama agar tidak ada lonjakan awal
+            self._zi = sosfilt_zi(self.sos) * x[0]
+        y, self._zi = sosfilt(self.sos, x, zi=self._zi)
+        return float(y[0]) if scalar else y
+
+
+class BandPass(SosFilter):
+    def __init__(self, fs, lowcut=0.5, highcut=40.0, order=5):
+        super().__init__(butter(order, [lowcut, highcut], btype="band", fs=fs, output="sos"))
+
+
+class Notch(SosFilter):
+    def __init__(self, fs, freq=50.0, q=30.0):
+        super().__init__(tf2sos(*iirnotch(freq, q, fs)))
+
+
+class Chain:
+    """Beberapa filter berurutan, dengan antarmuka yang sama."""
+
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def reset(self):
+        for f in self.filters:
+            f.reset()
+
+    def process(self, x):
+        for f in self.filters:
+            x = f.process(x)
+        return x
+
+
+class BeatCounter:
+    """
+    Beat = crossing naik di atas `threshold` yang berjarak > min_interval
+    dari beat sebelumnya. Waktu sampel dihitung dari jumlah sampel / fs.
+    Blok -> indeks beat di dalam blok; skalar -> True jika sampel ini beat.
+    """
+
+    def __init__(self, threshold, fs, min_interval=MIN_BEAT_INTERVAL_SEC):
+        self.threshold = threshold
+        self.fs = fs
+        self.min_interval = min_interval
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.last_beat_time = None
+        self._last_value = None
+        self._n = 0  # sampel yang sudah diproses
+
+    def process(self, x):
+        scalar = np.ndim(x) == 0
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        t = (self._n + np.arange(len(x))) / self.fs
+        beats = apply_refractory(t, rising_edge_crossings(x, self.threshold, self._last_value),
+                                 self.min_interval, self.last_beat_time)
+        if len(x):
+            self._last_value = x[-1]
+            self._n += len(x)
+        if len(beats):
+            self.count += len(beats)
+            self.last_beat_time = float(t[beats[-1]])
+        return bool(len(beats)) if scalar else beats
+
+
+class RrBpm:
+    """
+    BPM = 60 / rata-rata `n_beats` interval R-R terakhir. Interval di luar
+    RR_RANGE_SEC (beat terlewat/ganda) diabaikan.
+    """
+
+    def __init__(self, n_beats=RR_BEATS):
+        self.n_beats = n_beats
+        self.reset()
+
+    def reset(self):
+        self._rr = deque(maxlen=self.n_beats)
+        self._last = None
+        self.bpm = 0.0
+
+    def push(self, beat_times):
+        """Tambah waktu beat (detik, naik). Mengembalikan BPM terkini."""
+        for bt in np.atleast_1d(beat_times).tolist():
+            if self._last is not None and RR_RANGE_SEC[0] <= bt - self._last <= RR_RANGE_SEC[1]:
+                self._rr.append(bt - self._last)
+            self._last = bt
+        if self._rr:
+            self.bpm = 60.0 * len(self._rr) / sum(self._rr)
+        return self.bpm
+
+
+class AdaptiveBeatDetector:
+    """
+    Detektor beat untuk sinyal deteksi tanpa offset (mis. raw - EMA).
+    Threshold = noise + THRESHOLD_RATIO x (puncak - noise), minimal
+    `min_threshold`: level puncak diperbarui dari amplitudo tiap beat,
+    level noise dari rata-rata |x| per blok, dan level puncak diturunkan
+    bila tidak ada beat selama MISSED_BEAT_SEC (amplitudo turun).
+    Crossing naik + periode refrakter seperti BeatCounter; BPM dari R-R.
+
+    `process(x)` (skalar atau blok) mengembalikan (indeks beat di blok, BPM).
+    Biaya per blok: beberapa operasi NumPy + loop atas beat saja.
+    """
+
+    def __init__(self, fs, min_threshold=20.0, min_interval=MIN_BEAT_INTERVAL_SEC, rr_beats=RR_BEATS):
+        self.fs = fs
+        self.min_threshold = min_threshold
+        self.min_interval = min_interval
+        self.rr = RrBpm(rr_beats)
+        self.reset()
+
+    def reset(self):
+        self.rr.reset()
+        self.count = 0
+        self.last_beat_time = None
+        self.peak_level = None  # belum ada beat: pakai min_threshold
+        self.noise_level = 0.0
+        self._last_value = None
+        self._n = 0
+        self._tail = np.empty(0)  # sampel setelah crossing terakhir untuk mencari puncaknya
+        self._pending_peak = False
+        self._last_event = None  # beat atau penurunan level puncak terakhir
+
+    @property
+    def threshold(self):
+        if self.peak_level is None:
+            return self.min_threshold
+        return max(self.min_threshold,
+                   self.noise_level + THRESHOLD_RATIO * (self.peak_level - self.noise_level))
+
+    @property
+    def bpm(self):
+        return self.rr.bpm
+
+    def _update_peak(self, amplitude):
+        if self.peak_level is None:
+            self.peak_level = amplitude
+        else:
+            self.peak_level += LEVEL_WEIGHT * (amplitude - self.peak_level)
+
+    def process(self, x):
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        n = len(x)
+        if n == 0:
+            return np.empty(0, dtype=np.intp), self.bpm
+        search = max(1, int(PEAK_SEARCH_SEC * self.fs))
+        if self._pending_peak:
+            # Puncak beat terakhir di blok sebelumnya mungkin baru tercapai di blok ini
+            self._tail = np.concatenate((self._tail, x[:search - len(self._tail)]))
+            if len(self._tail) >= search:
+                self._update_peak(float(self._tail.max()))
+                self._pending_peak = False
+        t = (self._n + np.arange(n)) / self.fs
+        beats = apply_refractory(t, rising_edge_crossings(x, self.threshold, self._last_value),
+                                 self.min_interval, self.last_beat_time)
+        for b in beats.tolist():
+            segment = x[b:b + search]
+            if len(segment) == search:
+                self._update_peak(float(segment.max()))
+            else:
+                self._tail = segment
+                self._pending_peak = True
+        alpha = 1.0 - np.exp(-n / (NOISE_TAU_SEC * self.fs))
+        self.noise_level += alpha * (float(np.abs(x).mean()) - self.noise_level)
+        self._last_value = x[-1]
+        self._n += n
+        if len(beats):
+            beat_times = t[beats]
+            self.count += len(beats)
+            self.last_beat_time = self._last_event = float(beat_times[-1])
+            self.rr.push(beat_times)
+        elif (self.peak_level is not None and self._last_event is not None
+              and t[-1] - self._last_event > MISSED_BEAT_SEC):
+            self.peak_level *= 0.5
+            self._last_event = float(t[-1])  # turunkan lagi setelah MISSED_BEAT_SEC berikutnya
+        return beats, self.bpm
@@ -1,4 +1,5 @@
 import sys
+import argparse
 import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttk
@@ -7,36 +8,69 @@ import serial
 import serial.tools.list_ports
 import time
 import numpy as np
-import pandas as pd
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 import threading
-import queue
+import asyncio
 import os
-from scipy.signal import butter, filtfilt, iirnotch  # Tambahkan import untuk filter
+from ring_buffer import RingBuffer
+from streaming_filter import StreamingFilter
+from pipeline import bpm_from_signal, filter_signal
+from chunked import BEATS_SUFFIX, process_recording
+from serial_protocol import open_serial
+from block_queue import BlockQueue
+from timeline import TimelineReconstructor
+from plot_renderer import BlitRenderer
+from decimate import MinMaxDecimator
+from recorder import RecordingWriter
+from acquisition import detect_serial_ports
+from async_sources import SerialSource
+from replay import is_replay_port, open_replay, replay_port
+from multi_view import MultiDeviceWindow
+from instrumentation import Instrumentation
+from running_stats import BpmStats
+from hrv import StreamingHrv
+from rhythm import EPISODES_SUFFIX, RHYTHM_NAMES, RhythmClassifier, write_episodes
+from inference import InferenceStage
+from beat_detector import (MIN_BEAT_INTERVAL_SEC, StreamingBeatDetector, apply_refractory,
+                           rising_edge_crossings)
 
 # --- KONFIGURASI ---
 SERIAL_PORT = None  # Akan diatur otomatis
-BAUD_RATE = 9600
+BAUD_RATE = 115200  # firmware dengan framing biner (test.ino, arduino2.ino)
+LEGACY_BAUD_RATE = 9600  # fallback untuk firmware lama (ASCII saja)
+SERIAL_MODE = "auto"  # "auto" (negosiasi), "binary", atau "ascii"
+REPLAY_SPEED = 1.0  # untuk port replay (--replay): 1 = waktu nyata, 0 = secepat mungkin
+PERF_DUMP_PATH = None  # jika diisi (--perf-dump), statistik performa disimpan saat Stop
+MODEL_PATH = None  # model aritmia (.onnx/.npz, --model), dijalankan di proses worker
+PERF_OVERLAY_INTERVAL_SEC = 0.5
 SAMPLING_RATE_HZ = 250
 PLOT_WINDOW_SAMPLES = 10 * SAMPLING_RATE_HZ
+PLOT_WINDOW_CHOICES_SEC = (10, 30, 60, 300, 600)  # pilihan jendela tampilan
+MAX_PLOT_WINDOW_SEC = max(PLOT_WINDOW_CHOICES_SEC)  # kapasitas ring buffer
 
 BPM_THRESHOLD = 620
 BPM_AVG_WINDOW = 15
 THEME_NAME = "cyborg" # Tema gelap (pilihan lain: darkly, solar)
 
+# Satu record per sampel di ring buffer: waktu (detik sejak start), sinyal, BPM
+SAMPLE_DTYPE = np.dtype([("t", "f8"), ("signal", "f4"), ("bpm", "f4")])
+RECORD_COLUMNS = ["time", "signal", "bpm"]
+RECORD_FMT = "%.6f,%d,%.3f"  # satu baris CSV per record SAMPLE_DTYPE
+# BPM instan dari sinyal terfilter, sejajar dengan buffer hasil filter
+BPM_DTYPE = np.dtype([("t", "f8"), ("bpm", "f4")])
+
 def detect_serial_port():
     """
     Deteksi otomatis port serial yang kemungkinan adalah Arduino.
     Mengembalikan nama port (misal: 'COM3') atau None jika tidak ditemukan.
     """
-    ports = list(serial.tools.list_ports.comports())
-    for port in ports:
-        # Deteksi berdasarkan nama/manufaktur yang umum pada Arduino
-        if ("Arduino" in port.description) or ("CH340" in port.description) or ("USB Serial" in port.description) or ("ttyACM" in port.device) or ("ttyUSB" in port.device):
-            return port.device
+    ports = detect_serial_ports()
+    if ports:
+        return ports[0]
     # Jika tidak ada yang cocok, kembalikan port pertama jika ada
+    ports = list(serial.tools.list_ports.comports())
     if ports:
         return ports[0].device
     return None
@@ -51,10 +85,12 @@ class EkgApp:
         self.is_started = False
         self.csv_file = None
         self.ser = None  # Serial object
+        self.decoder = None  # decoder protokol (biner/ASCII), dipilih saat start
         self.sampling_rate = SAMPLING_RATE_HZ
         self.plot_window_sec = 10  # window plot dalam detik
-        self.buffer_maxlen = self.sampling_rate * self.plot_window_sec
-        self.data_buffer = []  # list of tuple (t, signal, bpm)
+        # Buffer menampung jendela terpanjang; jendela aktif dipotong dengan searchsorted
+        self.buffer_maxlen = self.sampling_rate * MAX_PLOT_WINDOW_SEC
+        self.data_buffer = RingBuffer(self.buffer_maxlen, SAMPLE_DTYPE)  # record (t, signal, bpm)
         self.last_beat_time = 0
         self.beat_timestamps = []
         self.current_bpm = 0
@@ -63,22 +99,50 @@ class EkgApp:
 
         # Filter settings (pindahkan ke sini sebelum _create_widgets)
         self.filter_enabled = tk.BooleanVar(value=True)
-        self.filtered_buffer = []  # buffer untuk hasil filter
-        self.bpm_filtered_buffer = []  # buffer BPM hasil filtered
         self.filter_lowcut = tk.DoubleVar(value=0.5)
         self.filter_highcut = tk.DoubleVar(value=40.0)
         self.filter_notch = tk.DoubleVar(value=50.0)
         self.filter_threshold = tk.IntVar(value=BPM_THRESHOLD)
+        # Filter streaming (SOS + state zi), hanya memproses sampel baru
+        self.stream_filter = StreamingFilter(
+            self.sampling_rate, self.filter_lowcut.get(), self.filter_highcut.get(),
+            self.filter_notch.get(), self.buffer_maxlen
+        )
+        self.filtered_buffer = self.stream_filter.buffer  # buffer untuk hasil filter
+        self.bpm_filtered_buffer = RingBuffer(self.buffer_maxlen, BPM_DTYPE)  # buffer BPM hasil filtered
+        self.filtered_beats = StreamingBeatDetector(self.filter_threshold.get(), MIN_BEAT_INTERVAL_SEC)
+        self._filtered_total = 0  # jumlah sampel data_buffer yang sudah difilter
+        # Statistik BPM per beat (sesi + jendela tampilan), diperbarui O(1) tiap beat
+        self.bpm_stats = BpmStats(self.plot_window_sec)
+        self.bpm_filt_stats = BpmStats(self.plot_window_sec)
+        self._bpm_stats_shown = None  # versi statistik yang sedang tampil di Treeview
+        # HRV dari aliran beat sinyal mentah (jendela 5 menit), diperbarui per beat
+        self.hrv = StreamingHrv()
+        self._hrv_shown = None
+        # Klasifikasi ritme per beat dari sinyal mentah (lebar QRS tidak terdistorsi filter kausal)
+        self.rhythm = RhythmClassifier(self.sampling_rate)
+        self._rhythm_shown = None
+        self.inference = None  # InferenceStage selama perekaman jika --model diberikan
+        # Envelope min/max per trace untuk plot (dibangun saat lebar axes diketahui)
+        self._envelopes = {}
+        self._envelope_bucket = None
+        # Histogram durasi per tahap + counter, selalu aktif (biaya ~1 us per catatan)
+        self.perf = Instrumentation()
+        self._perf_overlay_updated = 0.0
 
         self._create_widgets()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.csv_filename = None  # simpan nama file untuk ekspor pandas
+        self.recorder = None  # penulis CSV streaming, aktif selama perekaman
+        self._recorder_error_shown = False
         self.last_saved_filename = None
         self.last_subject_info = None
 
         # Tambahan untuk threading & queue
         self.serial_thread = None
-        self.serial_queue = queue.Queue()
+        self.serial_source = None  # SerialSource asyncio, aktif selama perekaman
+        self.serial_queue = BlockQueue()  # blok NumPy per pembacaan serial
+        self.timeline = TimelineReconstructor(SAMPLING_RATE_HZ)  # waktu per sampel & estimasi fs
         self.serial_thread_stop = threading.Event()
         self.is_paused = False
 
@@ -98,6 +162,7 @@ class EkgApp:
         left_frame.rowconfigure(0, weight=0)  # meta_frame
         left_frame.rowconfigure(1, weight=1)  # notebook
         left_frame.rowconfigure(2, weight=0)  # bpm_frame
+        left_frame.rowconfigure(3, weight=0)  # hrv_frame
 
         # Metadata Frame
         meta_frame = ttk.Labelframe(left_frame, text="Informasi Subjek", padding=15)
@@ -163,6 +228,19 @@ class EkgApp:
         )
         self.filter_checkbox.grid(row=5, column=0, sticky="nsew", pady=5)
 
+        # Status link serial: mode protokol dan counter drop/resync
+        self.link_status_var = tk.StringVar(value="Link: -")
+        ttk.Label(control_frame, textvariable=self.link_status_var, font=("Helvetica", 8), bootstyle="secondary").grid(row=6, column=0, sticky=W, pady=(5, 0))
+
+        # Monitor beberapa board sekaligus di jendela terpisah
+        self.multi_button = ttk.Button(control_frame, text="Multi Perangkat", command=self.open_multi_device, bootstyle="info-outline")
+        self.multi_button.grid(row=7, column=0, sticky="nsew", pady=(10, 5))
+
+        # Panel performa (overlay di atas plot): durasi per tahap, fps, antrian, drop
+        self.perf_overlay_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Panel Performa", variable=self.perf_overlay_var,
+                        bootstyle="round-toggle", command=self._toggle_perf_overlay).grid(row=8, column=0, sticky="nsew", pady=5)
+
         # Pengaturan Filter Tab
         filter_param_frame = ttk.Frame(notebook, padding=10)
         filter_param_frame.columnconfigure([0,1], weight=1)
@@ -183,6 +261,13 @@ class EkgApp:
         ttk.Entry(filter_param_frame, textvariable=self.filter_threshold, width=6,
                   validate='focusout', validatecommand=self._on_filter_toggle).grid(row=3, column=1, sticky=W)
 
+        ttk.Label(filter_param_frame, text="Jendela Plot (detik):").grid(row=4, column=0, sticky=W)
+        self.window_var = tk.StringVar(value=str(self.plot_window_sec))
+        window_combo = ttk.Combobox(filter_param_frame, textvariable=self.window_var, width=5,
+                                    values=[str(s) for s in PLOT_WINDOW_CHOICES_SEC], state="readonly")
+        window_combo.grid(row=4, column=1, sticky=W)
+        window_combo.bind("<<ComboboxSelected>>", self._on_window_change)
+
         # Tambahkan tab ke notebook
         notebook.add(control_frame, text="Kontrol Rekaman")
         notebook.add(filter_param_frame, text="Pengaturan Filter")
@@ -192,7 +277,9 @@ class EkgApp:
         bpm_frame.grid(row=2, column=0, sticky="nsew")
         bpm_frame.rowconfigure(0, weight=0)
         bpm_frame.rowconfigure(1, weight=0)
-        bpm_frame.rowconfigure(2, weight=1)
+        bpm_frame.rowconfigure(2, weight=0)
+        bpm_frame.rowconfigure(3, weight=0)
+        bpm_frame.rowconfigure(4, weight=1)
 
         ttk.Label(bpm_frame, text="BPM", font=("Helvetica", 20), anchor="center", justify="center").grid(row=0, column=0, sticky="ew", pady=(20,0))
         self.bpm_label_var = tk.StringVar(value="--")
@@ -204,33 +291,61 @@ class EkgApp:
             anchor="center",
             justify="center"
         ).grid(row=1, column=0, sticky="sew")
+        # Ritme saat ini + jumlah PVC sesi
+        self.rhythm_label_var = tk.StringVar(value=RHYTHM_NAMES["unknown"])
+        ttk.Label(
+            bpm_frame,
+            textvariable=self.rhythm_label_var,
+            font=("Helvetica", 12, "bold"),
+            bootstyle="warning",
+            anchor="center",
+            justify="center"
+        ).grid(row=2, column=0, sticky="ew")
+        # Prediksi model CNN (jika --model) + latensi
+        self.model_label_var = tk.StringVar(value="Model: tidak aktif")
+        ttk.Label(bpm_frame, textvariable=self.model_label_var, font=("Helvetica", 9),
+                  bootstyle="secondary", anchor="center").grid(row=3, column=0, sticky="ew")
 
-        # Treeview untuk statistik BPM
+        # Treeview untuk statistik BPM per beat: sesi penuh dan jendela plot
         self.bpm_stats_tree = ttk.Treeview(
             bpm_frame,
-            columns=("avg", "max", "min", "count"),
+            columns=("source", "avg", "max", "min", "count"),
             show="headings",
-            height=2,
+            height=4,
             bootstyle="secondary"
         )
-        self.bpm_stats_tree.grid(row=2, column=0, sticky="ew", pady=(10, 10))
+        self.bpm_stats_tree.grid(row=4, column=0, sticky="ew", pady=(10, 10))
+        self.bpm_stats_tree.heading("source", text="BPM")
         self.bpm_stats_tree.heading("avg", text="Rata-rata")
         self.bpm_stats_tree.heading("max", text="Maks")
         self.bpm_stats_tree.heading("min", text="Min")
-        self.bpm_stats_tree.heading("count", text="Jumlah")
-        self.bpm_stats_tree.insert("", "end", iid="bpm", values=("--", "--", "--", "0"))
-        self.bpm_stats_tree.insert("", "end", iid="bpm_filt", values=("--", "--", "--", "0"))
+        self.bpm_stats_tree.heading("count", text="Beat")
         self.bpm_stats_tree.tag_configure("bpm", background="#222", foreground="#fff")
         self.bpm_stats_tree.tag_configure("bpm_filt", background="#333", foreground="#fff")
-        self.bpm_stats_tree["displaycolumns"] = ("avg", "max", "min", "count")
+        for iid, label, tag in [("bpm", "Asli (sesi)", "bpm"), ("bpm_win", "Asli (jendela)", "bpm"),
+                                ("bpm_filt", "Filtered (sesi)", "bpm_filt"),
+                                ("bpm_filt_win", "Filtered (jendela)", "bpm_filt")]:
+            self.bpm_stats_tree.insert("", "end", iid=iid, values=(label, "--", "--", "--", "0"), tags=(tag,))
+        self.bpm_stats_tree.column("source", anchor="w", width=110)
         self.bpm_stats_tree.column("avg", anchor="center", width=70)
         self.bpm_stats_tree.column("max", anchor="center", width=60)
         self.bpm_stats_tree.column("min", anchor="center", width=60)
         self.bpm_stats_tree.column("count", anchor="center", width=60)
 
-        # Label baris
-        self.bpm_stats_tree.insert("", "end", iid="label_bpm", values=("BPM Asli", "", "", ""), tags=("bpm",))
-        self.bpm_stats_tree.insert("", "end", iid="label_bpm_filt", values=("BPM Filtered", "", "", ""), tags=("bpm_filt",))
+        # Tile HRV (jendela 5 menit terakhir)
+        hrv_frame = ttk.Labelframe(left_frame, text="HRV (5 menit)", padding=10)
+        hrv_frame.grid(row=3, column=0, sticky="ew")
+        hrv_frame.columnconfigure([0, 1, 2], weight=1)
+        self.hrv_tile_vars = {}
+        tiles = [("sdnn_ms", "SDNN (ms)"), ("rmssd_ms", "RMSSD (ms)"), ("pnn50", "pNN50 (%)"),
+                 ("sd1_ms", "SD1 (ms)"), ("sd2_ms", "SD2 (ms)"), ("lf_hf", "LF/HF")]
+        for i, (key, title) in enumerate(tiles):
+            tile = ttk.Frame(hrv_frame, padding=4)
+            tile.grid(row=i // 3, column=i % 3, sticky="nsew")
+            ttk.Label(tile, text=title, font=("Helvetica", 8), bootstyle="secondary").pack()
+            var = tk.StringVar(value="--")
+            ttk.Label(tile, textvariable=var, font=("Helvetica", 16, "bold"), bootstyle="info").pack()
+            self.hrv_tile_vars[key] = var
 
         # --- FRAME KANAN (PLOT) ---
         right_frame = ttk.Frame(main_frame)
@@ -255,6 +370,7 @@ class EkgApp:
         self.ax_signal.set_facecolor('#3a3a3a')
         self.ax_signal.set_title("Sinyal EKG", color='white')
         self.ax_signal.set_ylabel("Nilai ADC", color='white')
+        self.ax_signal.set_xlabel("Waktu (detik)", color='white')
         self.ax_bpm.set_facecolor('#3a3a3a')
         self.ax_bpm.set_title("Denyut Jantung (BPM)", color='white')
         self.ax_bpm.set_ylabel("BPM", color='white')
@@ -264,6 +380,7 @@ class EkgApp:
         self.ax_signal_filt.set_facecolor('#3a3a3a')
         self.ax_signal_filt.set_title("Sinyal EKG (Filtered)", color='white')
         self.ax_signal_filt.set_ylabel("Nilai ADC", color='white')
+        self.ax_signal_filt.set_xlabel("Waktu (detik)", color='white')
         self.ax_bpm_filt.set_facecolor('#3a3a3a')
         self.ax_bpm_filt.set_title("Denyut Jantung (BPM, Filtered)", color='white')
         self.ax_bpm_filt.set_ylabel("BPM", color='white')
@@ -291,6 +408,18 @@ class EkgApp:
         self.canvas = FigureCanvasTkAgg(self.fig, master=right_frame)
         self.canvas.get_tk_widget().grid(row=0, column=0, columnspan=2, sticky="nsew")
         self.fig.tight_layout()  # pastikan layout tidak tumpang tindih
+        # Renderer blitting: hanya garis yang digambar ulang tiap frame
+        self.renderer = BlitRenderer(
+            self.canvas, [self.ax_signal, self.ax_bpm, self.ax_signal_filt, self.ax_bpm_filt]
+        )
+
+        # Overlay performa, ditampilkan lewat place() di pojok kanan atas plot
+        self.perf_frame = ttk.Frame(right_frame, padding=8, bootstyle="dark")
+        self.perf_text_var = tk.StringVar(value="Menunggu data...")
+        ttk.Label(self.perf_frame, textvariable=self.perf_text_var, font=("Courier", 8),
+                  bootstyle="inverse-dark", justify=LEFT).grid(row=0, column=0, sticky=W)
+        ttk.Button(self.perf_frame, text="Simpan Statistik", command=self.dump_perf,
+                   bootstyle="secondary-outline").grid(row=1, column=0, sticky="ew", pady=(6, 0))
 
     def _process_serial_queue(self):
         """
@@ -298,29 +427,35 @@ class EkgApp:
         """
         updated = False
         if not self.is_paused:
-            while not self.serial_queue.empty():
-                try:
-                    current_time, value = self.serial_queue.get_nowait()
-                except queue.Empty:
-                    break
-                is_beat = value > BPM_THRESHOLD and self.last_value <= BPM_THRESHOLD
-                if is_beat and (current_time - self.last_beat_time > 0.25):
-                    interval_ms = (current_time - self.last_beat_time) * 1000
-                    instant_bpm = 60000 / interval_ms
-                    if 40 < instant_bpm < 200:
-                        self.beat_timestamps.append(instant_bpm)
-                        if len(self.beat_timestamps) > BPM_AVG_WINDOW:
-                            self.beat_timestamps = self.beat_timestamps[-BPM_AVG_WINDOW:]
-                        self.current_bpm = np.mean(self.beat_timestamps)
-                    self.last_beat_time = current_time
-                t = current_time - self.start_time if self.start_time else 0
-                # Simpan ke buffer, rolling window
-                self.data_buffer.append((t, value, self.current_bpm))
-                if len(self.data_buffer) > self.buffer_maxlen:
-                    self.data_buffer = self.data_buffer[-self.buffer_maxlen:]
+            # Ambil semua blok yang menunggu sekaligus, proses per blok
+            self.perf.gauge("queue_depth", self.serial_queue.depth)
+            block = self.serial_queue.drain()
+            if block is not None and len(block) > 0:
+                start = time.perf_counter()
+                self.perf.record("queue_lag", self.serial_queue.last_lag)
+                beats, bpm = self._detect_beats_in_block(block["t"], block["value"])
+                records = np.empty(len(block), dtype=SAMPLE_DTYPE)
+                records["t"] = block["t"] - self.start_time if self.start_time else 0
+                records["signal"] = block["value"]
+                records["bpm"] = bpm
+                with self.perf.timed("rhythm"):
+                    self.rhythm.process(records["t"], records["signal"], beats)
+                # Simpan ke ring buffer (otomatis membuang sampel terlama)
+                self.data_buffer.extend(records)
+                if self.recorder and self.recorder.error is None:
+                    if self.record_start_time != self.start_time:
+                        # Reset plot hanya menggeser basis waktu tampilan; rekaman tetap dari Start
+                        recorded = records.copy()
+                        recorded["t"] = block["t"] - self.record_start_time
+                        self.recorder.write(recorded)
+                    else:
+                        self.recorder.write(records)
+                if self._envelopes:
+                    self._envelopes["signal"].push(records["t"], records["signal"])
+                    self._envelopes["bpm"].push(records["t"], records["bpm"])
                 if self.current_bpm > 0:
                     self.bpm_label_var.set(f"{int(self.current_bpm)}")
-                self.last_value = value
+                self.perf.record("queue", time.perf_counter() - start)
                 updated = True
         # Jadwalkan polling queue berikutnya
         if self.is_started:
@@ -331,6 +466,35 @@ class EkgApp:
             if not hasattr(self, '_buffer_update_scheduled') or not self._buffer_update_scheduled:
                 self._schedule_buffer_update()
 
+    def _detect_beats_in_block(self, t, values):
+        """
+        Deteksi beat sinyal mentah untuk satu blok sampel: crossing BPM_THRESHOLD
+        dengan refrakter 0.25 s, BPM instan 40-200 dirata-rata BPM_AVG_WINDOW.
+        Mengembalikan (indeks beat di dalam blok, BPM rata-rata yang berlaku di tiap sampel).
+        """
+        candidates = rising_edge_crossings(values, BPM_THRESHOLD, self.last_value)
+        beats = apply_refractory(t, candidates, MIN_BEAT_INTERVAL_SEC, self.last_beat_time)
+        self.last_value = values[-1]
+        bpm_before = self.current_bpm
+        if len(beats) == 0:
+            return beats, np.full(len(values), bpm_before, dtype=np.float32)
+        bpm_after = np.empty(len(beats), dtype=np.float32)
+        # Loop hanya atas beat (beberapa per blok), bukan atas sampel
+        for k, beat_time in enumerate(t[beats]):
+            instant_bpm = 60.0 / (beat_time - self.last_beat_time)
+            if 40 < instant_bpm < 200:
+                self.bpm_stats.push(beat_time - (self.start_time or 0), instant_bpm)
+                self.beat_timestamps.append(instant_bpm)
+                if len(self.beat_timestamps) > BPM_AVG_WINDOW:
+                    self.beat_timestamps = self.beat_timestamps[-BPM_AVG_WINDOW:]
+                self.current_bpm = np.mean(self.beat_timestamps)
+            self.hrv.push(beat_time - (self.start_time or 0))
+            self.last_beat_time = beat_time
+            bpm_after[k] = self.current_bpm
+        # BPM di sampel i = nilai setelah beat terakhir <= i (atau sebelum blok)
+        idx = np.searchsorted(beats, np.arange(len(values)), side="right")
+        return beats, np.where(idx == 0, bpm_before, bpm_after[np.maximum(idx - 1, 0)]).astype(np.float32)
+
     def _schedule_buffer_update(self):
         # Update plot/statistik dari buffer setiap interval tertentu
         if hasattr(self, '_buffer_update_scheduled') and self._buffer_update_scheduled:
@@ -338,47 +502,128 @@ class EkgApp:
         self._buffer_update_scheduled = True
         def update():
             self._buffer_update_scheduled = False
-            self._update_plot_from_buffer()
-            self._update_bpm_stats_from_buffer()
-            self.canvas.draw_idle()
+            with self.perf.timed("plot"):
+                self._update_plot_from_buffer()
+            with self.perf.timed("bpm_stats"):
+                self._update_bpm_stats_from_buffer()
+            with self.perf.timed("hrv"):
+                self._update_hrv_tiles()
+            self._update_rhythm_label()
+            if self.inference:
+                self._poll_inference()
+            self._update_sampling_rate()
+            self._update_link_status()
+            self._check_recorder()
+            with self.perf.timed("draw"):
+                self.renderer.draw()
+            self.perf.frame()
+            self._update_perf_overlay()
             if self.is_started:
                 self._buffer_update_scheduled = True
-                self.root.after(200, update)
-        self.root.after(200, update)
-
-    def butter_bandpass_filter(self, data, lowcut, highcut, fs, order=5):
-        nyq = 0.5 * fs
-        low = lowcut / nyq
-        high = highcut / nyq
-        b, a = butter(order, [low, high], btype='band')
-        y = filtfilt(b, a, data)
-        return y
-
-    def notch_filter(self, data, notch_freq, fs, Q=30):
-        b, a = iirnotch(notch_freq, Q, fs)
-        y = filtfilt(b, a, data)
-        return y
+                # Interval adaptif: secepat mungkin (min 33 ms) sesuai biaya gambar terukur
+                self.root.after(self.renderer.interval_ms, update)
+        self.root.after(self.renderer.interval_ms, update)
 
     def apply_filter(self, signal):
+        # Zero-phase (filtfilt), hanya untuk ekspor offline.
+        # Jalur realtime memakai self.stream_filter (kausal, bertahap).
         FS = self.sampling_rate
         LOWCUT = self.filter_lowcut.get()
         HIGHCUT = self.filter_highcut.get()
         NOTCH_FREQ = self.filter_notch.get()
-        bandpassed = self.butter_bandpass_filter(signal, LOWCUT, HIGHCUT, FS)
-        filtered = self.notch_filter(bandpassed, NOTCH_FREQ, FS)
-        return filtered
+        return filter_signal(signal, FS, LOWCUT, HIGHCUT, NOTCH_FREQ)
+
+    def _update_filtered_buffer(self):
+        """
+        Filter hanya sampel yang masuk sejak pemanggilan sebelumnya.
+        Jika parameter filter berubah, window yang ada difilter ulang sekali.
+        Mengembalikan False jika parameter filter tidak valid.
+        """
+        try:
+            changed = self.stream_filter.configure(
+                self.sampling_rate, self.filter_lowcut.get(),
+                self.filter_highcut.get(), self.filter_notch.get()
+            )
+        except Exception:
+            return False
+        if changed:
+            self._filtered_total = self.data_buffer.total - len(self.data_buffer)
+            self.filtered_beats.reset()
+            self.bpm_filt_stats.reset()
+            self.bpm_filtered_buffer.clear()
+            if self.inference:
+                self.inference.reset()  # jendela lama difilter ulang, jangan dikirim dua kali
+            if self._envelopes:
+                self._envelopes["signal_filt"].reset()
+                self._envelopes["bpm_filt"].reset()
+        try:
+            self.filtered_beats.threshold = self.filter_threshold.get()
+        except Exception:
+            pass  # entry sedang diedit, pakai threshold sebelumnya
+        new = self.data_buffer.total - self._filtered_total
+        if new > 0:
+            block = self.data_buffer.view(new)
+            y = self.stream_filter.push(block["t"], block["signal"])
+            # Deteksi beat hanya pada sampel baru, state dibawa antar redraw
+            beats, bpm = self.filtered_beats.process(block["t"], y)
+            if self.inference:
+                self.inference.push(block["t"], y)
+            # BPM di sampel beat = BPM instan beat itu (0 untuk beat pertama)
+            for beat_time, beat_bpm in zip(block["t"][beats].tolist(), bpm[beats].tolist()):
+                if beat_bpm > 0:
+                    self.bpm_filt_stats.push(beat_time, beat_bpm)
+            bpm_block = np.empty(len(bpm), dtype=BPM_DTYPE)
+            bpm_block["t"] = block["t"]
+            bpm_block["bpm"] = bpm
+            self.bpm_filtered_buffer.extend(bpm_block)
+            self._filtered_total = self.data_buffer.total
+            if self._envelopes:
+                self._envelopes["signal_filt"].push(block["t"], y)
+                self._envelopes["bpm_filt"].push(block["t"], bpm)
+        return True
+
+    def _ensure_envelopes(self):
+        """
+        Ukuran bucket = sampel per jendela / lebar axes (piksel), jadi tiap trace
+        diplot sebagai ~2x lebar piksel titik. Jika berubah (resize atau ganti
+        jendela), envelope dibangun ulang sekali dari ring buffer; selebihnya
+        hanya bucket baru yang dihitung saat sampel masuk.
+        """
+        px = max(100, int(self.ax_signal.bbox.width))
+        window_samples = int(self.plot_window_sec * self.sampling_rate)
+        bucket = max(1, window_samples // px)
+        if bucket == self._envelope_bucket:
+            return
+        self._envelope_bucket = bucket
+        capacity = int(1.5 * window_samples / bucket) + 2
+        self._envelopes = {name: MinMaxDecimator(bucket, capacity)
+                           for name in ("signal", "bpm", "signal_filt", "bpm_filt")}
+        n = int(1.5 * window_samples)
+        win = self.data_buffer.view(n)
+        self._envelopes["signal"].push(win["t"], win["signal"])
+        self._envelopes["bpm"].push(win["t"], win["bpm"])
+        filt = self.filtered_buffer.view(n)
+        bpm_filt = self.bpm_filtered_buffer.view(len(filt))
+        self._envelopes["signal_filt"].push(filt["t"], filt["signal"])
+        self._envelopes["bpm_filt"].push(bpm_filt["t"], bpm_filt["bpm"])
+
+    def _envelope_window(self, name, t_min):
+        t, y = self._envelopes[name].view()
+        start = np.searchsorted(t, t_min, side="left")
+        return t[start:], y[start:]
 
     def _update_plot_from_buffer(self):
         # Plot dari buffer, bukan DataFrame
         show_filtered = self.filter_enabled.get()
         # --- handle subplot visibility ---
-        self.ax_signal_filt.set_visible(show_filtered)
-        self.ax_bpm_filt.set_visible(show_filtered)
-        self.line_signal_filt.set_visible(show_filtered)
-        self.line_bpm_filt.set_visible(show_filtered)
-        self.canvas.draw_idle()
+        if self.ax_signal_filt.get_visible() != show_filtered:
+            self.ax_signal_filt.set_visible(show_filtered)
+            self.ax_bpm_filt.set_visible(show_filtered)
+            self.line_signal_filt.set_visible(show_filtered)
+            self.line_bpm_filt.set_visible(show_filtered)
+            self.renderer.invalidate()
 
-        if not self.data_buffer:
+        if len(self.data_buffer) == 0:
             self.line_signal.set_data([], [])
             self.line_bpm.set_data([], [])
             self.line_signal_filt.set_data([], [])
@@ -389,119 +634,108 @@ class EkgApp:
             self.ax_bpm.set_ylim(0, 200)
             self.ax_signal_filt.set_ylim(0, 1024)
             self.ax_bpm_filt.set_ylim(0, 200)
-            self.fig.tight_layout()
+            self.renderer.invalidate()
             return
-        arr = np.array(self.data_buffer)
-        t = arr[:, 0]
-        y_signal = arr[:, 1]
-        y_bpm = arr[:, 2]
+        self._ensure_envelopes()
         window_sec = self.plot_window_sec
-        t_max = t[-1]
+        t_max = float(self.data_buffer.view(1)["t"][0])
         t_min = max(0, t_max - window_sec)
-        idx = t >= t_min
-        t_win = t[idx]
-        y_signal_win = y_signal[idx]
-        y_bpm_win = y_bpm[idx]
+        # Plot envelope min/max (bukan semua sampel), dipotong ke jendela aktif
+        t_win, y_signal_win = self._envelope_window("signal", t_min)
+        t_bpm, y_bpm_win = self._envelope_window("bpm", t_min)
+        if len(t_win) == 0:
+            return
         self.line_signal.set_data(t_win, y_signal_win)
-        self.line_bpm.set_data(t_win, y_bpm_win)
-        self.ax_signal.set_xlim(
-            t_win[0] if len(t_win) > 0 else 0,
-            t_win[-1] if len(t_win) > 0 else window_sec
-        )
-        self.ax_bpm.set_xlim(
-            t_win[0] if len(t_win) > 0 else 0,
-            t_win[-1] if len(t_win) > 0 else window_sec
-        )
-        if len(y_signal_win) > 0:
-            y_min = min(y_signal_win)
-            y_max = max(y_signal_win)
-            pad = max(10, (y_max - y_min) * 0.1)
-            self.ax_signal.set_ylim(y_min - pad, y_max + pad)
-        else:
-            self.ax_signal.set_ylim(0, 1024)
-        if len(y_bpm_win) > 0:
-            yb_min = min(y_bpm_win)
-            yb_max = max(y_bpm_win)
-            padb = max(5, (yb_max - yb_min) * 0.1)
-            self.ax_bpm.set_ylim(max(0, yb_min - padb), yb_max + padb)
-        else:
-            self.ax_bpm.set_ylim(0, 200)
-        self.ax_signal.set_xlabel("Waktu (detik)", color='white')
-        self.ax_bpm.set_xlabel("Waktu (detik)", color='white')
+        self.line_bpm.set_data(t_bpm, y_bpm_win)
+        # Batas axis hanya diubah saat data keluar dari pita histeresis
+        for ax in [self.ax_signal, self.ax_bpm, self.ax_signal_filt, self.ax_bpm_filt]:
+            self.renderer.scroll_x(ax, t_max, window_sec)
+        self.renderer.fit_y(self.ax_signal, float(y_signal_win.min()), float(y_signal_win.max()), 10)
+        self.renderer.fit_y(self.ax_bpm, float(y_bpm_win.min()), float(y_bpm_win.max()), 5, floor=0)
 
         # --- FILTERED PLOT ---
-        if show_filtered and len(y_signal_win) > 10:
-            try:
-                y_signal_filt = self.apply_filter(y_signal_win)
-            except Exception:
-                y_signal_filt = y_signal_win  # fallback jika error
-
-            # --- Hitung BPM filtered realtime ---
-            bpm_filtered = self._calculate_bpm_from_signal(t_win, y_signal_filt)
-            self.bpm_filtered_buffer = list(zip(t_win, y_signal_filt, bpm_filtered))
+        t_win_f = t_win
+        t_bpm_f = []
+        if show_filtered and len(self.data_buffer) > 10:
+            if self._update_filtered_buffer():
+                t_win_f, y_signal_filt = self._envelope_window("signal_filt", t_min)
+                # BPM filtered sudah dihitung bertahap di _update_filtered_buffer
+                t_bpm_f, bpm_filtered = self._envelope_window("bpm_filt", t_min)
+            else:
+                y_signal_filt = y_signal_win  # fallback jika parameter filter tidak valid
+                bpm_filtered = []
         else:
             y_signal_filt = []
             bpm_filtered = []
-            self.bpm_filtered_buffer = []
-        self.line_signal_filt.set_data(t_win, y_signal_filt)
-        self.line_bpm_filt.set_data(t_win, bpm_filtered)
-        self.ax_signal_filt.set_xlim(
-            t_win[0] if len(t_win) > 0 else 0,
-            t_win[-1] if len(t_win) > 0 else window_sec
-        )
-        self.ax_bpm_filt.set_xlim(
-            t_win[0] if len(t_win) > 0 else 0,
-            t_win[-1] if len(t_win) > 0 else window_sec
-        )
+        self.line_signal_filt.set_data(t_win_f, y_signal_filt)
+        self.line_bpm_filt.set_data(t_bpm_f, bpm_filtered)
         if len(y_signal_filt) > 0:
-            y_min_f = min(y_signal_filt)
-            y_max_f = max(y_signal_filt)
-            pad_f = max(10, (y_max_f - y_min_f) * 0.1)
-            self.ax_signal_filt.set_ylim(y_min_f - pad_f, y_max_f + pad_f)
-        else:
-            self.ax_signal_filt.set_ylim(0, 1024)
-        if len(y_bpm_win) > 0:
-            yb_min_f = min(y_bpm_win)
-            yb_max_f = max(y_bpm_win)
-            padb_f = max(5, (yb_max_f - yb_min_f) * 0.1)
-            self.ax_bpm_filt.set_ylim(max(0, yb_min_f - padb_f), yb_max_f + padb_f)
-        else:
-            self.ax_bpm_filt.set_ylim(0, 200)
-        self.ax_signal_filt.set_xlabel("Waktu (detik)", color='white')
-        self.ax_bpm_filt.set_xlabel("Waktu (detik)", color='white')
-        self.fig.tight_layout()
+            self.renderer.fit_y(self.ax_signal_filt, float(np.min(y_signal_filt)), float(np.max(y_signal_filt)), 10)
+        if len(bpm_filtered) > 0:
+            self.renderer.fit_y(self.ax_bpm_filt, float(np.min(bpm_filtered)), float(np.max(bpm_filtered)), 5, floor=0)
 
     def _update_bpm_stats_from_buffer(self):
-        # --- Statistik BPM asli ---
-        avg = mx = mn = count = "--"
-        if self.data_buffer:
-            arr = np.array(self.data_buffer)
-            bpm_nonzero = arr[:, 2][arr[:, 2] > 0]
-            count = len(bpm_nonzero)
-            if count > 0:
-                avg = f"{np.mean(bpm_nonzero):.1f}"
-                mx = f"{np.max(bpm_nonzero):.0f}"
-                mn = f"{np.min(bpm_nonzero):.0f}"
+        """
+        Tampilkan statistik BPM per beat (sesi + jendela plot). Angka dihitung
+        bertahap saat beat terdeteksi; di sini hanya nilai kedaluwarsa jendela
+        dikeluarkan, dan Treeview diubah hanya bila ada yang berubah.
+        """
+        show_filtered = self.filter_enabled.get()
+        if len(self.data_buffer) > 0:
+            t_max = float(self.data_buffer.view(1)["t"][0])
+            self.bpm_stats.expire(t_max)
+            self.bpm_filt_stats.expire(t_max)
+        version = (self.bpm_stats.version, self.bpm_filt_stats.version, show_filtered)
+        if version == self._bpm_stats_shown:
+            return
+        self._bpm_stats_shown = version
+        tree = self.bpm_stats_tree
+        tree.item("bpm", values=("Asli (sesi)",) + BpmStats.row(self.bpm_stats.session))
+        tree.item("bpm_win", values=("Asli (jendela)",) + BpmStats.row(self.bpm_stats.window))
+        empty = ("--", "--", "--", "0")
+        tree.item("bpm_filt", values=("Filtered (sesi)",) + (
+            BpmStats.row(self.bpm_filt_stats.session) if show_filtered else empty))
+        tree.item("bpm_filt_win", values=("Filtered (jendela)",) + (
+            BpmStats.row(self.bpm_filt_stats.window) if show_filtered else empty))
+
+    def _update_hrv_tiles(self):
+        # Hanya saat ada beat baru; LF/HF dihitung ulang paling banyak sekali per beat
+        if self.hrv.version == self._hrv_shown:
+            return
+        self._hrv_shown = self.hrv.version
+        metrics = self.hrv.metrics()
+        for key, var in self.hrv_tile_vars.items():
+            value = metrics[key]
+            if np.isnan(value):
+                var.set("--")
             else:
-                avg = mx = mn = "--"
-                count = "0"
-        self.bpm_stats_tree.item("bpm", values=(avg, mx, mn, count))
-
-        # --- Statistik BPM filtered ---
-        avg_f = mx_f = mn_f = count_f = "--"
-        if self.filter_enabled.get() and self.bpm_filtered_buffer:
-            arr_filt = np.array(self.bpm_filtered_buffer)
-            if arr_filt.shape[1] >= 3:
-                bpm_filt_nonzero = arr_filt[:, 2][arr_filt[:, 2] > 0]
-                count_f = len(bpm_filt_nonzero)
-                if count_f > 0:
-                    avg_f = f"{np.mean(bpm_filt_nonzero):.1f}"
-                    mx_f = f"{np.max(bpm_filt_nonzero):.0f}"
-                    mn_f = f"{np.min(bpm_filt_nonzero):.0f}"
-                else:
-                    avg_f = mx_f = mn_f = "--"
-                    count_f = "0"
-        self.bpm_stats_tree.item("bpm_filt", values=(avg_f, mx_f, mn_f, count_f))
+                var.set(f"{value:.2f}" if key == "lf_hf" else f"{value:.0f}")
+
+    def _update_rhythm_label(self):
+        state = (self.rhythm.current, self.rhythm.pvc_count, self.rhythm.st_episode is not None)
+        if state == self._rhythm_shown:
+            return
+        self._rhythm_shown = state
+        current, pvc_count, st = state
+        text = RHYTHM_NAMES[current]
+        if st:
+            text += " + ST"
+        self.rhythm_label_var.set(f"{text} | PVC: {pvc_count}")
+
+    def _poll_inference(self):
+        # Sinyal terfilter biasanya sudah dihitung untuk plot; jika filter disembunyikan, hitung di sini
+        if not self.filter_enabled.get():
+            self._update_filtered_buffer()
+        predictions = self.inference.poll()
+        if self.inference.error:
+            self.model_label_var.set(f"Model error: {self.inference.error}")
+        elif predictions:
+            _, label, prob = predictions[-1]
+            name = RHYTHM_NAMES.get(label, label)
+            self.model_label_var.set(
+                f"Model ({self.inference.backend}): {name} {prob:.0%} | "
+                f"latensi {self.inference.latency.percentile(50) * 1000:.0f} ms, "
+                f"dibuang {self.inference.dropped}")
 
     def start_task(self):
         if self.save_var.get():
@@ -525,11 +759,17 @@ class EkgApp:
 
         self.is_started = True
         self.is_paused = False
-        self.start_time = time.time()
+        self.start_time = time.time()  # basis waktu tampilan (digeser oleh Reset)
+        self.record_start_time = self.start_time  # basis waktu kolom t di file rekaman
+        self._recorder_error_shown = False
         self.last_beat_time = 0
         self.beat_timestamps = []
         self.current_bpm = 0
         self.last_value = 0
+        self.bpm_stats.reset()
+        self.bpm_filt_stats.reset()
+        self.hrv.reset()
+        self.rhythm.reset()
 
         global SERIAL_PORT
         if SERIAL_PORT is None:
@@ -539,17 +779,47 @@ class EkgApp:
             self.is_started = False
             return
         try:
-            self.ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
-            time.sleep(2)
-        except serial.SerialException as e:
+            if is_replay_port(SERIAL_PORT):
+                # Replay rekaman / sinyal sintetis tanpa hardware, lewat jalur serial yang sama
+                self.ser, self.decoder = open_replay(SERIAL_PORT, REPLAY_SPEED, SAMPLING_RATE_HZ)
+            else:
+                self.ser, self.decoder = open_serial(SERIAL_PORT, SERIAL_MODE, BAUD_RATE, LEGACY_BAUD_RATE)
+        except (serial.SerialException, OSError, ValueError) as e:
             messagebox.showerror("Error Serial", f"Gagal membuka port {SERIAL_PORT}: {e}")
             self.is_started = False
             return
 
+        # Rekaman ditulis bertahap ke disk sejak awal, tidak menunggu tombol Stop
+        if self.csv_filename:
+            try:
+                self.recorder = RecordingWriter(self.csv_filename, RECORD_COLUMNS, RECORD_FMT)
+            except OSError as e:
+                messagebox.showerror("Error File", f"Gagal membuat file {self.csv_filename}: {e}")
+                self.ser.close()
+                self.ser = None
+                self.is_started = False
+                return
+
         # Mulai thread serial
+        self.serial_queue.clear()
+        # Replay tidak seiring jam host (speed != 1): pakai jam perangkat = waktu rekaman
+        self.timeline.device_clock_only = is_replay_port(SERIAL_PORT)
+        self.timeline.reset()
+        self._set_sampling_rate(SAMPLING_RATE_HZ)
         self.serial_thread_stop.clear()
+        self.perf.reset()
+        self.serial_source = SerialSource(ser=self.ser, decoder=self.decoder, fs=SAMPLING_RATE_HZ,
+                                          timeline=self.timeline, probe=self.perf)
         self.serial_thread = threading.Thread(target=self._serial_worker, daemon=True)
         self.serial_thread.start()
+        if MODEL_PATH:
+            try:
+                self.inference = InferenceStage(MODEL_PATH, SAMPLING_RATE_HZ, probe=self.perf)
+                self.inference.start()
+                self.model_label_var.set("Model: memuat...")
+            except (OSError, ValueError, KeyError) as e:
+                self.inference = None
+                self.model_label_var.set(f"Model error: {e}")
         self.root.after(10, self._process_serial_queue)
 
         self.start_button.config(state=DISABLED)
@@ -563,37 +833,39 @@ class EkgApp:
         self.is_started = False
         self.is_paused = False
         self.serial_thread_stop.set()
+        if self.serial_source:
+            self.serial_source.stop_threadsafe()
+        if self.serial_thread:
+            self.serial_thread.join(timeout=1)
+            self.serial_thread = None
+        if self.inference:
+            self.inference.stop()
+            self.inference = None
+        if PERF_DUMP_PATH:
+            try:
+                self._sample_perf_gauges()
+                self.perf.dump(PERF_DUMP_PATH)
+            except OSError as e:
+                print(f"Gagal menyimpan statistik performa: {e}", file=sys.stderr)
+        self.serial_source = None
         if self.ser:
             try:
                 self.ser.close()
             except Exception:
                 pass
             self.ser = None
-        if self.serial_thread:
-            self.serial_thread.join(timeout=1)
-            self.serial_thread = None
-        # Ekspor buffer ke CSV jika diminta
+        # Tutup rekaman streaming (sisa blok ditulis + fsync)
         if self.csv_filename:
             try:
-                # Ekspor seluruh buffer ke DataFrame untuk simpan
-                if self.data_buffer:
-                    df_export = pd.DataFrame(self.data_buffer, columns=["time", "signal", "bpm"])
-                    # Tambahkan kolom filtered jika filter aktif dan hasil tersedia
-                    if self.filter_enabled.get() and self.data_buffer:
-                        arr = np.array(self.data_buffer)
-                        t = arr[:, 0]
-                        y_signal = arr[:, 1]
-                        if len(y_signal) > 10:
-                            try:
-                                y_signal_filt = self.apply_filter(y_signal)
-                            except Exception:
-                                y_signal_filt = y_signal
-                            df_export["signal_filtered"] = y_signal_filt
-
-                            # --- Tambahkan BPM hasil filtered ---
-                            bpm_filtered = self._calculate_bpm_from_signal(t, y_signal_filt)
-                            df_export["bpm_filtered"] = bpm_filtered
-                    df_export.to_csv(self.csv_filename, index=False)
+                error = self.recorder.close() if self.recorder else None
+                self.recorder = None
+                if error:
+                    raise error
+                self.rhythm.flush()
+                write_episodes(os.path.splitext(self.csv_filename)[0] + EPISODES_SUFFIX, self.rhythm.episodes)
+                # Tambahkan kolom filtered (zero-phase) jika filter aktif
+                if self.filter_enabled.get():
+                    self._append_filtered_columns(self.csv_filename)
                 self.last_subject_info = self._extract_subject_info_from_filename(self.csv_filename)
                 self.last_subject_label_var.set(f"Subjek terakhir: {self.last_subject_info}")
                 messagebox.showinfo("Info", f"Perekaman dihentikan dan file telah disimpan sebagai {self.csv_filename}.")
@@ -606,29 +878,28 @@ class EkgApp:
         for widget in [self.label_input, self.gender_combo, self.age_input, self.condition_combo, self.save_checkbox]:
             widget.config(state=NORMAL)
 
+    def _append_filtered_columns(self, filename):
+        """
+        Pass offline setelah rekaman selesai: filter zero-phase per blok lalu
+        tambahkan kolom signal_filtered dan bpm_filtered. Waktu beat beserta
+        metrik HRV per beat ditulis ke {nama}_beats.csv. Memori tetap kecil
+        berapa pun panjang rekaman (lihat chunked.process_recording).
+        """
+        settings = {
+            "lowcut": self.filter_lowcut.get(),
+            "highcut": self.filter_highcut.get(),
+            "notch": self.filter_notch.get(),
+            "threshold": self.filter_threshold.get(),
+            "min_interval": MIN_BEAT_INTERVAL_SEC,
+        }
+        beats_path = os.path.splitext(filename)[0] + BEATS_SUFFIX
+        process_recording(filename, filename, beats_path, settings=settings, fs=self.sampling_rate)
+
     def _calculate_bpm_from_signal(self, t, signal):
+        # Versi batch (vektor) untuk seluruh sinyal, dipakai saat ekspor
         threshold = self.filter_threshold.get()
-        min_interval = 0.25  # detik, minimal antar beat
-        last_beat_time = None
-        beat_times = []
-        bpm_list = []
-        for i in range(1, len(signal)):
-            if signal[i] > threshold and signal[i-1] <= threshold:
-                if last_beat_time is None or (t[i] - last_beat_time) > min_interval:
-                    beat_times.append(t[i])
-                    last_beat_time = t[i]
-            # Hitung BPM instan
-            if len(beat_times) >= 2:
-                interval = beat_times[-1] - beat_times[-2]
-                if interval > 0:
-                    bpm = 60.0 / interval
-                else:
-                    bpm = 0
-            else:
-                bpm = 0
-            bpm_list.append(bpm)
-        bpm_list = [0] + bpm_list
-        return bpm_list
+        _, bpm = bpm_from_signal(t, signal, threshold, MIN_BEAT_INTERVAL_SEC)
+        return bpm
 
     def pause_task(self):
         if not self.is_started:
@@ -642,13 +913,24 @@ class EkgApp:
 
     def reset_plot(self):
         self.data_buffer.clear()
-        self.filtered_buffer.clear()
+        self.stream_filter.reset()
+        self.filtered_beats.reset()
+        self.bpm_filtered_buffer.clear()
+        self.bpm_stats.reset()
+        self.bpm_filt_stats.reset()
+        self.hrv.reset()
+        self.rhythm.reset()
+        if self.inference:
+            self.inference.reset()
+        self._filtered_total = 0
+        for envelope in self._envelopes.values():
+            envelope.reset()
         self.start_time = time.time() if self.is_started else None
         self.bpm_label_var.set("--")
         self._update_bpm_stats_from_buffer()
+        self._update_rhythm_label()
         self._update_plot_from_buffer()
-        self.canvas.draw_idle()
-        self.fig.tight_layout()
+        self.renderer.draw()
 
     def on_closing(self):
         if self.is_started:
@@ -686,32 +968,155 @@ class EkgApp:
 
     def _serial_worker(self):
         """
-        Worker thread untuk membaca data serial dan memasukkan ke queue.
+        Worker thread: event loop asyncio yang membaca port lewat SerialSource
+        (non-blocking, tanpa polling) dan memasukkan blok ke queue GUI.
         """
         try:
-            while not self.serial_thread_stop.is_set() and self.ser and self.ser.is_open:
-                if self.is_paused:
-                    time.sleep(0.05)
-                    continue
-                while self.ser.in_waiting:
-                    line = self.ser.readline().decode('utf-8').strip()
-                    if not line or line == '!':
-                        continue
-                    try:
-                        value = int(line)
-                    except ValueError:
-                        continue
-                    current_time = time.time()
-                    self.serial_queue.put((current_time, value))
-                time.sleep(0.002)  # Hindari busy loop
+            asyncio.run(self._pump_serial())
         except Exception:
             pass
 
+    async def _pump_serial(self):
+        # Satu blok (timestamps + values) per pembacaan, bukan satu item per sampel.
+        # Waktu tiap sampel direkonstruksi oleh self.timeline di dalam sumber.
+        last = None
+        async for block in self.serial_source:
+            # Jarak antar blok dari thread serial: lonjakan = pembacaan tersendat
+            now = time.perf_counter()
+            if last is not None:
+                self.perf.record("serial_gap", now - last)
+            last = now
+            self.perf.count("samples_read", len(block))
+            if self.is_paused:
+                continue  # data tetap dibaca agar tidak menumpuk, tapi tidak diproses
+            self.serial_queue.put(block)
+
+    def _update_sampling_rate(self):
+        """
+        Pakai laju sampel terukur jika berbeda > 2% dari yang dipakai sekarang.
+        Filter streaming otomatis didesain ulang karena fs termasuk kunci cache-nya;
+        klasifikasi ritme dan inferensi ikut memakai fs baru (_set_sampling_rate).
+        Tetap pada SAMPLING_RATE_HZ: kapasitas ring buffer (pada fs lebih tinggi
+        menampung lebih sedikit detik dari MAX_PLOT_WINDOW_SEC) dan nominal_fs
+        timeline/SerialSource (hanya tebakan awal, waktu sampel tetap terukur).
+        Deteksi beat, statistik BPM dan HRV berbasis waktu, jadi tidak bergantung fs.
+        """
+        fs = self.timeline.fs_estimate
+        if fs and abs(fs - self.sampling_rate) > 0.02 * self.sampling_rate:
+            self._set_sampling_rate(round(fs))
+
+    def _set_sampling_rate(self, fs):
+        self.sampling_rate = fs
+        self.rhythm.fs = fs  # durasi (jendela QRS/ST, riwayat) dalam sampel
+        if self.inference:
+            self.inference.set_fs(fs)
+
+    def _check_recorder(self):
+        # Thread penulis gagal (mis. disk penuh): blok tidak ditulis lagi, beri tahu sekali
+        if self.recorder is None or self.recorder.error is None or self._recorder_error_shown:
+            return
+        self._recorder_error_shown = True
+        messagebox.showerror("Error File", f"Perekaman ke {self.csv_filename} berhenti: {self.recorder.error}")
+
+    def _update_link_status(self):
+        if self.decoder is None:
+            return
+        st = self.decoder.stats()
+        if st["mode"] == "binary":
+            text = f"Link: biner | drop {st['dropped']} | resync {st['resyncs']} | CRC {st['crc_errors']}"
+        else:
+            text = f"Link: ASCII | error parse {st['parse_errors']}"
+        # Kedalaman antrian & lag: naik terus berarti GUI tertinggal dari perangkat
+        q = self.serial_queue
+        text += f"\nAntrian {q.depth} sampel | lag {q.last_lag * 1000:.0f} ms (maks {q.max_lag * 1000:.0f} ms)"
+        tl = self.timeline
+        fs_text = f"{tl.fs_estimate:.1f} Hz" if tl.fs_estimate else "-"
+        text += f"\nfs terukur {fs_text} | gap {tl.gaps} ({tl.dropped} sampel) | koreksi t {tl.nonmonotonic}"
+        self.link_status_var.set(text)
+
+    def _sample_perf_gauges(self):
+        # Counter drop diambil dari sumbernya saat dibaca, bukan dicatat per sampel
+        if self.decoder is not None:
+            self.perf.gauge("drop_link", self.decoder.stats().get("dropped", 0))
+        if self.serial_source is not None:
+            self.perf.gauge("drop_queue", self.serial_source.stats.dropped_samples)
+        self.perf.gauge("drop_gap", self.timeline.dropped)
+
+    def _update_perf_overlay(self):
+        if not self.perf_overlay_var.get():
+            return
+        now = time.time()
+        if now - self._perf_overlay_updated < PERF_OVERLAY_INTERVAL_SEC:
+            return
+        self._perf_overlay_updated = now
+        self._sample_perf_gauges()
+        self.perf_text_var.set("\n".join(self.perf.summary_lines()))
+
+    def _toggle_perf_overlay(self):
+        if self.perf_overlay_var.get():
+            self.perf_frame.place(relx=1.0, rely=0.0, x=-10, y=10, anchor="ne")
+            self.perf_frame.lift()
+            self._perf_overlay_updated = 0.0
+            self._update_perf_overlay()
+        else:
+            self.perf_frame.place_forget()
+
+    def dump_perf(self):
+        """Simpan snapshot instrumentasi ke perf_<waktu>.json di folder kerja."""
+        self._sample_perf_gauges()
+        filename = self._get_unique_filename(f"perf_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            self.perf.dump(filename)
+        except OSError as e:
+            messagebox.showerror("Error File", f"Gagal menyimpan statistik performa: {e}")
+            return
+        messagebox.showinfo("Info", f"Statistik performa disimpan sebagai {filename}.")
+
+    def open_multi_device(self):
+        """
+        Buka semua port Arduino yang terdeteksi (kecuali port yang sedang
+        dipakai jendela utama) di jendela monitor multi-perangkat.
+        """
+        in_use = self.ser.port if self.ser else None
+        ports = [p for p in detect_serial_ports() if p != in_use]
+        if not ports:
+            messagebox.showerror("Error Serial", "Tidak ada perangkat serial (Arduino) lain yang terdeteksi.")
+            return
+        record_prefix = f"multi_{time.strftime('%Y%m%d_%H%M%S')}" if self.save_var.get() else None
+        try:
+            filter_params = (self.filter_lowcut.get(), self.filter_highcut.get(), self.filter_notch.get())
+        except Exception:
+            filter_params = (0.5, 40.0, 50.0)
+        MultiDeviceWindow(self.root, ports, SAMPLING_RATE_HZ, self.plot_window_sec, filter_params, record_prefix)
+
+    def _on_window_change(self, event=None):
+        self.plot_window_sec = int(self.window_var.get())
+        self.bpm_stats.set_window(self.plot_window_sec)
+        self.bpm_filt_stats.set_window(self.plot_window_sec)
+        self._envelope_bucket = None  # paksa envelope dibangun ulang
+        self._update_plot_from_buffer()
+        self.renderer.draw()
+
     def _on_filter_toggle(self):
         self._update_plot_from_buffer()
-        self.canvas.draw_idle()
+        self.renderer.draw()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modern EKG Monitoring")
+    parser.add_argument("--port", help="port serial (default: deteksi otomatis)")
+    parser.add_argument("--replay", help="putar rekaman (.csv/.ekgs) atau synthetic[:BPM] tanpa hardware")
+    parser.add_argument("--speed", type=float, default=REPLAY_SPEED,
+                        help="kecepatan replay: 1 = waktu nyata, N = N kali, 0 = secepat mungkin")
+    parser.add_argument("--perf-dump", help="simpan statistik performa (JSON) ke file ini saat Stop")
+    parser.add_argument("--model", help="model aritmia (.onnx atau .npz NumPy) untuk inferensi live")
+    args = parser.parse_args()
+    PERF_DUMP_PATH = args.perf_dump
+    MODEL_PATH = args.model
+    if args.replay:
+        SERIAL_PORT = replay_port(args.replay)
+        REPLAY_SPEED = args.speed
+    elif args.port:
+        SERIAL_PORT = args.port
     root = ttk.Window(themename=THEME_NAME)
     app = EkgApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,314 @@
+"""
+HRV (variabilitas denyut jantung) dari aliran waktu beat.
+
+StreamingHrv menerima satu waktu beat per pemanggilan dan memperbarui
+SDNN, RMSSD, pNN50 dan Poincare SD1/SD2 dalam O(1) (lihat running_stats),
+untuk seluruh sesi dan untuk jendela HRV_WINDOW_SEC terakhir. LF/HF berasal
+dari periodogram Lomb-Scargle (tanpa resampling) yang jumlah-jumlahnya
+diperbarui per beat (O(jumlah frekuensi)); pita daya dihitung ulang hanya
+jika ada beat baru. Biaya per beat tetap, jadi aman dijalankan setiap beat.
+
+Fungsi batch (`poincare`, `lf_hf`) dipakai pipeline.rr_summary, versi
+bertahap `SegmentedLfHf` dipakai pipeline.RrSummary (rekaman panjang).
+"""
+from collections import deque
+
+import numpy as np
+from running_stats import RunningStats, WindowStats
+
+RR_RANGE_SEC = (0.3, 2.0)  # interval R-R yang dianggap valid (200-30 BPM)
+HRV_WINDOW_SEC = 300.0  # jendela standar HRV jangka pendek (5 menit)
+NN50_MS = 50.0
+LF_BAND = (0.04, 0.15)
+HF_BAND = (0.15, 0.40)
+SPECTRUM_DF = 0.0025  # Hz, < 1/HRV_WINDOW_SEC agar puncak tidak lolos di antara grid
+SPECTRUM_FREQS = np.arange(LF_BAND[0], HF_BAND[1] + 1e-9, SPECTRUM_DF)
+LF_MASK = (SPECTRUM_FREQS >= LF_BAND[0]) & (SPECTRUM_FREQS < LF_BAND[1])
+HF_MASK = (SPECTRUM_FREQS >= HF_BAND[0]) & (SPECTRUM_FREQS <= HF_BAND[1])
+MIN_SPECTRUM_SEC = 60.0  # rentang minimum data untuk LF/HF
+MIN_SPECTRUM_BEATS = 32
+MIN_BAND_POWER_MS2 = 1e-3
+LS_REBUILD_BEATS = 5000  # hitung ulang jumlah Lomb-Scargle dari nol (buang galat pembulatan)
+HRV_KEYS = ("rr_ms", "sdnn_ms", "rmssd_ms", "pnn50", "sd1_ms", "sd2_ms", "lf_nu", "hf_nu", "lf_hf")
+
+
+def poincare(rr_ms):
+    """(SD1, SD2) dalam ms dari interval R-R berurutan."""
+    rr_ms = np.asarray(rr_ms, dtype=np.float64)
+    if len(rr_ms) < 3:
+        return np.nan, np.nan
+    sd1_sq = np.var(np.diff(rr_ms), ddof=1) / 2
+    sd2_sq = 2 * np.var(rr_ms, ddof=1) - sd1_sq
+    return float(np.sqrt(sd1_sq)), float(np.sqrt(max(sd2_sq, 0.0)))
+
+
+def _band_powers(power, n, span):
+    """Daya LF/HF (ms^2) + unit ternormalisasi dari periodogram di SPECTRUM_FREQS."""
+    # Skala: jumlah daya seluruh grid = varians sinyal (df x T bin per frekuensi independen)
+    power = power * (2.0 / n * SPECTRUM_DF * span)
+    return _bands(float(power[LF_MASK].sum()), float(power[HF_MASK].sum()))
+
+
+def _bands(lf, hf):
+    out = {"lf_ms2": lf, "hf_ms2": hf, "lf_nu": np.nan, "hf_nu": np.nan, "lf_hf": np.nan}
+    # Ritme tanpa variasi (mis. sinyal sintetis): rasio dari sisa pembulatan tidak bermakna
+    if lf + hf > MIN_BAND_POWER_MS2:
+        out.update(lf_nu=100 * lf / (lf + hf), hf_nu=100 * hf / (lf + hf))
+        if hf > 0:
+            out["lf_hf"] = lf / hf
+    return out
+
+
+def _empty_bands():
+    return dict.fromkeys(("lf_ms2", "hf_ms2", "lf_nu", "hf_nu", "lf_hf"), np.nan)
+
+
+def lf_hf(beat_times, rr_ms, segment_sec=HRV_WINDOW_SEC):
+    """
+    Daya LF dan HF (ms^2), unit ternormalisasi dan rasio LF/HF dari
+    periodogram Lomb-Scargle interval R-R (`rr_ms[i]` berakhir di
+    `beat_times[i]`). Rekaman panjang dipotong per `segment_sec` dan daya
+    dirata-rata antar segmen. Mengembalikan NaN jika data terlalu pendek.
+    """
+    t = np.asarray(beat_times, dtype=np.float64)
+    rr = np.asarray(rr_ms, dtype=np.float64)
+    if len(t) == 0:
+        return _empty_bands()
+    edges = np.searchsorted(t, np.arange(t[0], t[-1], segment_sec))
+    segments = [(a, b) for a, b in zip(edges, list(edges[1:]) + [len(t)])
+                if b - a >= MIN_SPECTRUM_BEATS and t[b - 1] - t[a] >= MIN_SPECTRUM_SEC]
+    if not segments:
+        return _empty_bands()
+    lf = hf = 0.0
+    for a, b in segments:
+        bands = _band_powers(lomb_scargle(t[a:b], rr[a:b] - rr[a:b].mean()), b - a, t[b - 1] - t[a])
+        lf += bands["lf_ms2"] / len(segments)
+        hf += bands["hf_ms2"] / len(segments)
+    return _bands(lf, hf)
+
+
+class SegmentedLfHf:
+    """
+    Versi bertahap dari lf_hf: R-R dikumpulkan per segmen `segment_sec`
+    (dihitung dari R-R pertama) dan daya segmen dihitung saat segmen
+    selesai. Memori sebanding satu segmen, berapa pun panjang rekaman.
+    """
+
+    def __init__(self, segment_sec=HRV_WINDOW_SEC):
+        self.segment_sec = segment_sec
+        self.reset()
+
+    def reset(self):
+        self._t0 = None
+        self._segment = 0
+        self._t = []
+        self._rr = []
+        self._lf = 0.0
+        self._hf = 0.0
+        self._n = 0
+
+    def push(self, beat_time, rr_ms):
+        if self._t0 is None:
+            self._t0 = beat_time
+        segment = int((beat_time - self._t0) // self.segment_sec)
+        if segment != self._segment:
+            self._close()
+            self._segment = segment
+        self._t.append(beat_time)
+        self._rr.append(rr_ms)
+
+    def _segment_bands(self):
+        n = len(self._t)
+        if n < MIN_SPECTRUM_BEATS or self._t[-1] - self._t[0] < MIN_SPECTRUM_SEC:
+            return None
+        t = np.asarray(self._t)
+        rr = np.asarray(self._rr)
+        return _band_powers(lomb_scargle(t, rr - rr.mean()), n, t[-1] - t[0])
+
+    def _close(self):
+        bands = self._segment_bands()
+        if bands is not None:
+            self._lf += bands["lf_ms2"]
+            self._hf += bands["hf_ms2"]
+            self._n += 1
+        self._t = []
+        self._rr = []
+
+    def result(self):
+        """Seperti lf_hf atas semua R-R yang sudah masuk (segmen terakhir ikut dihitung)."""
+        lf, hf, n = self._lf, self._hf, self._n
+        bands = self._segment_bands()
+        if bands is not None:
+            lf, hf, n = lf + bands["lf_ms2"], hf + bands["hf_ms2"], n + 1
+        if n == 0:
+            return _empty_bands()
+        return _bands(lf / n, hf / n)
+
+
+def lomb_scargle(t, y, freqs=None):
+    """Periodogram Lomb-Scargle klasik (dengan pergeseran tau) untuk y yang sudah dipusatkan."""
+    w = 2 * np.pi * (SPECTRUM_FREQS if freqs is None else freqs)
+    arg = np.outer(w, t)
+    c, s = np.cos(arg), np.sin(arg)
+    return _ls_power(c @ y, s @ y, c.sum(1), s.sum(1), (c * c - s * s).sum(1), (2 * s * c).sum(1),
+                     len(t), 0.0)
+
+
+def _ls_power(yc, ys, sc, ss, c2, s2, n, mean):
+    """
+    Daya dari jumlah per frekuensi: yc = sum y cos wt, ys = sum y sin wt,
+    sc/ss = sum cos/sin wt, c2/s2 = sum cos/sin 2wt. `mean` dikurangkan dari y.
+    """
+    yc = yc - mean * sc
+    ys = ys - mean * ss
+    two_tau = np.arctan2(s2, c2)  # 2 w tau
+    ct, st = np.cos(two_tau / 2), np.sin(two_tau / 2)
+    c2t, s2t = np.cos(two_tau), np.sin(two_tau)
+    cos_sq = 0.5 * (n + c2 * c2t + s2 * s2t)
+    sin_sq = n - cos_sq
+    with np.errstate(divide="ignore", invalid="ignore"):
+        power = 0.5 * ((yc * ct + ys * st) ** 2 / cos_sq + (ys * ct - yc * st) ** 2 / sin_sq)
+    return np.nan_to_num(power)
+
+
+class IncrementalLombScargle:
+    """
+    Lomb-Scargle atas jendela geser. Semua suku periodogram adalah jumlah
+    per sampel, jadi menambah/membuang satu interval R-R cukup O(jumlah
+    frekuensi), tanpa menghitung ulang seluruh jendela.
+    """
+
+    def __init__(self, freqs=SPECTRUM_FREQS):
+        self.w = 2 * np.pi * np.asarray(freqs, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self._sums = np.zeros((6, len(self.w)))  # yc, ys, sc, ss, c2, s2
+        self.n = 0
+        self.y_sum = 0.0
+
+    def _terms(self, t, y):
+        arg = self.w * t
+        c, s = np.cos(arg), np.sin(arg)
+        return np.stack((y * c, y * s, c, s, c * c - s * s, 2 * s * c))
+
+    def add(self, t, y):
+        self._sums += self._terms(t, y)
+        self.n += 1
+        self.y_sum += y
+
+    def remove(self, t, y):
+        self._sums -= self._terms(t, y)
+        self.n -= 1
+        self.y_sum -= y
+        if self.n == 0:
+            self.reset()  # buang sisa pembulatan
+
+    def power(self):
+        if self.n == 0:
+            return np.zeros(len(self.w))
+        return _ls_power(*self._sums, self.n, self.y_sum / self.n)
+
+
+class StreamingHrv:
+    """
+    HRV bertahap per beat. Interval di luar `rr_range` (beat terlewat/ganda)
+    diabaikan dan memutus pasangan beda berurutan (RMSSD, pNN50, SD1).
+    """
+
+    def __init__(self, window_sec=HRV_WINDOW_SEC, rr_range=RR_RANGE_SEC):
+        self.window_sec = window_sec
+        self.rr_range = rr_range
+        self.reset()
+
+    def reset(self):
+        self.session_rr = RunningStats()
+        self.session_diff = RunningStats()
+        self.session_diff_sq = RunningStats()
+        self.session_nn50 = RunningStats()
+        self.window_rr = WindowStats(self.window_sec)
+        self.window_diff = WindowStats(self.window_sec)
+        self.window_diff_sq = WindowStats(self.window_sec)
+        self.window_nn50 = WindowStats(self.window_sec)
+        self._spectrum_window = deque()  # (waktu beat, rr_ms) dalam jendela
+        self._ls = IncrementalLombScargle()
+        self._ls_updates = 0
+        self._last_beat = None
+        self._last_rr = None
+        self.rejected = 0
+        self.version = 0
+        self._spectrum_version = -1
+        self._spectrum = _empty_bands()
+
+    def push(self, beat_time):
+        """Tambahkan satu beat. Mengembalikan interval R-R (ms) atau None."""
+        last, self._last_beat = self._last_beat, beat_time
+        if last is None:
+            return None
+        rr = beat_time - last
+        if not self.rr_range[0] <= rr <= self.rr_range[1]:
+            self.rejected += 1
+            self._last_rr = None
+            return None
+        rr_ms = rr * 1000.0
+        self.session_rr.push(rr_ms)
+        self.window_rr.push(beat_time, rr_ms)
+        if self._last_rr is not None:
+            d = rr_ms - self._last_rr
+            nn50 = 1.0 if abs(d) > NN50_MS else 0.0
+            self.session_diff.push(d)
+            self.session_diff_sq.push(d * d)
+            self.session_nn50.push(nn50)
+            self.window_diff.push(beat_time, d)
+            self.window_diff_sq.push(beat_time, d * d)
+            self.window_nn50.push(beat_time, nn50)
+        self._last_rr = rr_ms
+        self._push_spectrum(beat_time, rr_ms)
+        self.version += 1
+        return rr_ms
+
+    def _push_spectrum(self, beat_time, rr_ms):
+        window = self._spectrum_window
+        window.append((beat_time, rr_ms))
+        self._ls.add(beat_time, rr_ms)
+        while window and window[0][0] < beat_time - self.window_sec:
+            self._ls.remove(*window.popleft())
+        self._ls_updates += 1
+        if self._ls_updates >= LS_REBUILD_BEATS:
+            self._ls_updates = 0
+            self._ls.reset()
+            for t, rr in window:
+                self._ls.add(t, rr)
+
+    def spectrum(self):
+        """LF/HF atas jendela terakhir; dihitung ulang hanya jika ada beat baru."""
+        if self._spectrum_version != self.version:
+            self._spectrum_version = self.version
+            window = self._spectrum_window
+            span = window[-1][0] - window[0][0] if window else 0.0
+            if len(window) >= MIN_SPECTRUM_BEATS and span >= MIN_SPECTRUM_SEC:
+                self._spectrum = _band_powers(self._ls.power(), len(window), span)
+            else:
+                self._spectrum = _empty_bands()
+        return self._spectrum
+
+    def metrics(self, window=True, spectrum=True):
+        """Metrik HRV terkini (jendela atau sesi) sebagai dict HRV_KEYS (+ daya LF/HF)."""
+        rr = self.window_rr if window else self.session_rr
+        diff = self.window_diff if window else self.session_diff
+        diff_sq = self.window_diff_sq if window else self.session_diff_sq
+        nn50 = self.window_nn50 if window else self.session_nn50
+        out = {
+            "rr_ms": self._last_rr if self._last_rr is not None else np.nan,
+            "sdnn_ms": rr.std if rr.count > 1 else np.nan,
+            "rmssd_ms": np.sqrt(diff_sq.mean) if diff_sq.count else np.nan,
+            "pnn50": 100.0 * nn50.mean if nn50.count else np.nan,
+            "sd1_ms": np.nan, "sd2_ms": np.nan,
+        }
+        if diff.count > 1:
+            sd1_sq = diff.variance / 2
+            out["sd1_ms"] = np.sqrt(sd1_sq)
+            out["sd2_ms"] = np.sqrt(max(2 * rr.variance - sd1_sq, 0.0))
+        if spectrum:
+            out.update(self.spectrum())
+        return out
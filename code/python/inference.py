@@ -0,0 +1,290 @@
+"""
+Inferensi model aritmia secara live, di proses terpisah (CPU saja).
+
+Sisi GUI (InferenceStage) hanya memotong jendela dari sinyal terfilter
+yang sudah dihitung untuk plot dan mengirimnya ke antrean berbatas;
+`push` tidak pernah menunggu. Proses worker memuat model, mengambil semua
+jendela yang menunggu, membuang yang basi (lebih tua dari MAX_AGE_SEC atau
+di luar MAX_BATCH terbaru), menjalankan satu batch, lalu mengirim hasil.
+GUI membaca hasil lewat `poll()` dari loop Tk.
+
+Model:
+    .onnx  ONNX Runtime (CPUExecutionProvider, 1 thread), input (n, 1, panjang)
+    .npz   CNN 1-D NumPy murni (save_numpy_model), tanpa dependensi tambahan
+Metadata model (fs, window_sec, normalize, classes) disimpan di .npz atau
+di metadata_props ONNX; nama kelas sebaiknya memakai label rhythm.py.
+"""
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from dataset import normalize_windows
+from instrumentation import LatencyHistogram
+from ring_buffer import RingBuffer
+
+STRIDE_SEC = 1.0  # satu jendela baru per detik sinyal
+QUEUE_WINDOWS = 8  # kapasitas antrean GUI -> worker
+MAX_BATCH = 4  # jendela terbaru yang diproses per batch; sisanya dibuang
+MAX_AGE_SEC = 2.0  # jendela lebih tua dari ini dianggap basi
+DEFAULT_META = {"fs": 250.0, "window_sec": 5.0, "normalize": "zscore", "classes": ["normal"]}
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class NumpyCnn:
+    """
+    CNN 1-D sederhana: blok (conv -> ReLU -> max-pool) lalu global average
+    pool dan dense + softmax. Bobot dari .npz: conv{i}_w (keluar, masuk, k),
+    conv{i}_b, pool{i}, dense_w (kelas, kanal), dense_b, meta (JSON).
+    """
+
+    backend = "numpy"
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.meta = dict(DEFAULT_META, **json.loads(str(data["meta"])))
+            self.layers = []
+            i = 0
+            while f"conv{i}_w" in data:
+                self.layers.append((data[f"conv{i}_w"].astype(np.float32),
+                                    data[f"conv{i}_b"].astype(np.float32), int(data[f"pool{i}"])))
+                i += 1
+            self.dense_w = data["dense_w"].astype(np.float32)
+            self.dense_b = data["dense_b"].astype(np.float32)
+
+    def predict(self, batch):
+        x = batch[:, None, :]
+        for w, b, pool in self.layers:
+            k = w.shape[2]
+            # Konvolusi valid sebagai satu tensordot atas jendela geser (tanpa loop)
+            x = np.einsum("nclk,ock->nol", sliding_window_view(x, k, axis=2), w, optimize=True)
+            x = np.maximum(x + b[None, :, None], 0)
+            if pool > 1:
+                n, c, length = x.shape
+                x = x[:, :, :length // pool * pool].reshape(n, c, length // pool, pool).max(axis=3)
+        return _softmax(x.mean(axis=2) @ self.dense_w.T + self.dense_b)
+
+
+class OnnxModel:
+    backend = "onnxruntime"
+
+    def __init__(self, path):
+        import onnxruntime as ort  # opsional, hanya di proses worker
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1  # satu core cukup; sisakan CPU untuk GUI
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        props = self.session.get_modelmeta().custom_metadata_map
+        self.meta = dict(DEFAULT_META, **json.loads(props.get("ekg", "{}")))
+
+    def predict(self, batch):
+        probs = self.session.run(None, {self.input_name: batch[:, None, :].astype(np.float32)})[0]
+        return np.asarray(probs, dtype=np.float32)
+
+
+def load_model(path):
+    if path.endswith(".onnx"):
+        return OnnxModel(path)
+    return NumpyCnn(path)
+
+
+def model_meta(path):
+    """Metadata model tanpa memuat runtime (untuk menyiapkan jendela di GUI)."""
+    if path.endswith(".onnx"):
+        meta_path = os.path.splitext(path)[0] + ".json"
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                return dict(DEFAULT_META, **json.load(f))
+        return None  # dibaca dari model oleh worker
+    with np.load(path) as data:
+        return dict(DEFAULT_META, **json.loads(str(data["meta"])))
+
+
+def save_numpy_model(path, convs, dense_w, dense_b, meta):
+    """Simpan bobot CNN (daftar (w, b, pool)) sebagai .npz untuk NumpyCnn."""
+    arrays = {"dense_w": dense_w, "dense_b": dense_b, "meta": json.dumps(dict(DEFAULT_META, **meta))}
+    for i, (w, b, pool) in enumerate(convs):
+        arrays[f"conv{i}_w"], arrays[f"conv{i}_b"], arrays[f"pool{i}"] = w, b, pool
+    np.savez(path, **arrays)
+
+
+def _worker(model_path, in_q, out_q):
+    """Loop proses worker: batch jendela terbaru, buang yang basi, kirim hasil."""
+    try:
+        model = load_model(model_path)
+    except Exception as e:
+        out_q.put(("error", str(e)))
+        return
+    out_q.put(("ready", model.backend, model.meta))
+    classes = model.meta["classes"]
+    while True:
+        item = in_q.get()
+        if item is None:
+            break
+        items = [item]
+        while True:
+            try:
+                item = in_q.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return
+            items.append(item)
+        now = time.time()
+        fresh = [it for it in items[-MAX_BATCH:] if now - it[1] <= MAX_AGE_SEC]
+        dropped = len(items) - len(fresh)
+        if not fresh:
+            out_q.put(("dropped", dropped))
+            continue
+        start = time.perf_counter()
+        probs = model.predict(np.stack([it[2] for it in fresh]))
+        infer_sec = time.perf_counter() - start
+        results = [(t_end, submitted, classes[int(np.argmax(p))], float(np.max(p)))
+                   for (t_end, submitted, _), p in zip(fresh, probs)]
+        out_q.put(("result", results, infer_sec, dropped))
+
+
+class InferenceStage:
+    """
+    Tahap inferensi untuk EkgApp. `push(t, y)` dipanggil dengan blok sinyal
+    terfilter baru; tiap STRIDE_SEC satu jendela (window_sec terakhir)
+    dinormalisasi dan dikirim ke worker tanpa menunggu (antrean penuh ->
+    jendela dibuang). `poll()` mengembalikan prediksi baru:
+    (t akhir jendela, label, probabilitas). Latensi dicatat ke `latency`
+    (push -> hasil) dan `infer` (waktu model per batch), juga ke `probe`.
+    """
+
+    def __init__(self, model_path, fs, probe=None):
+        self.model_path = model_path
+        self.fs = fs
+        self.probe = probe
+        self.meta = model_meta(model_path) or dict(DEFAULT_META, fs=fs)
+        self.backend = None
+        self.error = None
+        self._fs_mismatch = False
+        self.latency = LatencyHistogram()
+        self.infer = LatencyHistogram()
+        self.dropped = 0
+        self.stride = max(1, int(round(STRIDE_SEC * fs)))
+        self._configure_window()
+        self._process = None
+        self._in_q = None
+        self._out_q = None
+
+    def start(self):
+        # spawn: fork dari proses yang menjalankan Tk + thread serial tidak aman
+        ctx = mp.get_context("spawn")
+        self._in_q = ctx.Queue(QUEUE_WINDOWS)
+        self._out_q = ctx.Queue()
+        self._process = ctx.Process(target=_worker, args=(self.model_path, self._in_q, self._out_q),
+                                    daemon=True)
+        self._process.start()
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            self._in_q.put_nowait(None)
+        except queue.Full:
+            pass
+        self._process.join(timeout=1)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+    def _configure_window(self):
+        mismatch = abs(self.meta["fs"] - self.fs) > 0.01 * self.fs
+        if mismatch:
+            self.error = f"fs model {self.meta['fs']:g} Hz != fs akuisisi {self.fs:g} Hz"
+        elif self._fs_mismatch:
+            self.error = None
+        self._fs_mismatch = mismatch
+        self.window_len = int(round(self.meta["window_sec"] * self.fs))
+        self._buffer = RingBuffer(2 * self.window_len, np.dtype([("t", "f8"), ("y", "f4")]))
+        self._next_emit = self.window_len
+
+    def reset(self):
+        self._buffer.clear()
+        self._next_emit = self.window_len
+
+    def set_fs(self, fs):
+        """Pakai laju sampel akuisisi terukur: jendela dan stride disusun ulang (buffer dikosongkan)."""
+        if fs == self.fs:
+            return
+        self.fs = fs
+        self.stride = max(1, int(round(STRIDE_SEC * fs)))
+        self._configure_window()
+
+    def push(self, t, y):
+        if self._process is None or self.error:
+            return
+        block = np.empty(len(y), dtype=self._buffer.dtype)
+        block["t"] = t
+        block["y"] = y
+        # Potong per window_len agar titik emisi selalu masih di dalam buffer
+        for start in range(0, len(block), self.window_len):
+            part = block[start:start + self.window_len]
+            self._buffer.extend(part)
+            total = self._buffer.total
+            while self._next_emit <= total:
+                lag = total - self._next_emit
+                window = self._buffer.view(self.window_len + lag)[:self.window_len]
+                self._submit(float(window["t"][-1]), window["y"])
+                self._next_emit += self.stride
+
+    def _submit(self, t_end, y):
+        window = normalize_windows(np.array(y, dtype=np.float32)[None, :], self.meta["normalize"])[0]
+        try:
+            self._in_q.put_nowait((t_end, time.time(), window))
+        except queue.Full:
+            self._drop(1)
+
+    def _drop(self, n):
+        self.dropped += n
+        if self.probe is not None:
+            self.probe.count("infer_dropped", n)
+
+    def poll(self):
+        """Hasil baru dari worker (non-blocking)."""
+        predictions = []
+        if self._out_q is None:
+            return predictions
+        while True:
+            try:
+                message = self._out_q.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "ready":
+                self.backend, meta = message[1], message[2]
+                if meta != self.meta:
+                    self.meta.update(meta)
+                    self._configure_window()
+            elif kind == "error":
+                self.error = message[1]
+            elif kind == "dropped":
+                self._drop(message[1])
+            elif kind == "result":
+                results, infer_sec, dropped = message[1:]
+                self._drop(dropped)
+                self.infer.record(infer_sec)
+                now = time.time()
+                for t_end, submitted, label, prob in results:
+                    self.latency.record(now - submitted)
+                    if self.probe is not None:
+                        self.probe.record("infer_e2e", now - submitted)
+                    predictions.append((t_end, label, prob))
+                if self.probe is not None:
+                    self.probe.record("infer", infer_sec)
+        return predictions
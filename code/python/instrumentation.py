@@ -0,0 +1,215 @@
+"""
+Instrumentasi hot path yang cukup murah untuk dibiarkan aktif.
+
+Durasi tiap tahap dicatat ke histogram berukuran tetap (bin logaritmik
+1 us - 10 s, 8 bin per dekade), jadi memori dan biaya per catatan konstan
+berapa pun lama sesi: satu perf_counter, satu bisect, satu increment.
+Persentil dibaca dari histogram (resolusi satu bin, +-15%). Tiap metrik
+hanya ditulis oleh satu thread, jadi tidak perlu lock.
+
+    perf = Instrumentation()
+    with perf.timed("plot"):
+        ...
+    perf.gauge("queue_depth", q.depth)
+    perf.frame()  # satu frame tergambar
+    perf.dump("perf.json")
+"""
+import bisect
+import json
+import math
+import time
+from collections import deque
+
+BINS_PER_DECADE = 8
+MIN_SEC = 1e-6
+DECADES = 7  # 1 us .. 10 s
+BIN_EDGES = [MIN_SEC * 10 ** (i / BINS_PER_DECADE) for i in range(DECADES * BINS_PER_DECADE + 1)]
+FPS_WINDOW = 64  # frame terakhir yang dipakai menghitung fps
+
+
+class LatencyHistogram:
+    """Histogram durasi (detik) dengan bin logaritmik tetap."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Bin 0: < MIN_SEC, bin terakhir: >= batas atas
+        self.counts = [0] * (len(BIN_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_right(BIN_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """Perkiraan persentil q (0-100): titik tengah geometris bin-nya."""
+        if not self.count:
+            return 0.0
+        target = q / 100.0 * self.count
+        cum = 0
+        for i, c in enumerate(self.counts):
+            cum += c
+            if c and cum >= target:
+                break
+        if i == 0:
+            return min(MIN_SEC, self.max)
+        if i >= len(BIN_EDGES):
+            return self.max
+        return min(math.sqrt(BIN_EDGES[i - 1] * BIN_EDGES[i]), self.max)
+
+    def as_dict(self):
+        bins = {f"{BIN_EDGES[i - 1] * 1000:.4g}" if i else "0": c
+                for i, c in enumerate(self.counts) if c}
+        return {
+            "count": self.count, "mean_ms": self.mean * 1000,
+            "p50_ms": self.percentile(50) * 1000, "p90_ms": self.percentile(90) * 1000,
+            "p99_ms": self.percentile(99) * 1000, "max_ms": self.max * 1000,
+            "bins_ms": bins,  # batas bawah bin (ms): jumlah
+        }
+
+
+class FpsMeter:
+    """Frame per detik dari FPS_WINDOW frame terakhir."""
+
+    def __init__(self):
+        self._times = deque(maxlen=FPS_WINDOW)
+        self.frames = 0
+
+    def tick(self):
+        self._times.append(time.perf_counter())
+        self.frames += 1
+
+    @property
+    def fps(self):
+        times = self._times
+        if len(times) < 2:
+            return 0.0
+        # Jendela dipotong ke 2 detik terakhir agar fps turun saat plot berhenti
+        now = time.perf_counter()
+        recent = [t for t in times if now - t <= 2.0]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / (now - recent[0])
+
+
+class _Timer:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    """
+    Kumpulan histogram per tahap, counter, gauge (nilai terakhir + maksimum)
+    dan fps render. `enabled=False` membuat semua hook menjadi no-op.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.gauge_max = {}
+        self.render = FpsMeter()
+        self.started = time.time()
+
+    def histogram(self, name):
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = LatencyHistogram()
+        return hist
+
+    def timed(self, name):
+        """Context manager yang mencatat durasi blok ke histogram `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).record(seconds)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+            if name not in self.gauge_max or value > self.gauge_max[name]:
+                self.gauge_max[name] = value
+
+    def frame(self):
+        if self.enabled:
+            self.render.tick()
+
+    def reset(self):
+        self.stages.clear()
+        self.counters.clear()
+        self.gauges.clear()
+        self.gauge_max.clear()
+        self.render = FpsMeter()
+        self.started = time.time()
+
+    def snapshot(self):
+        # list(): thread lain bisa menambah tahap baru selama iterasi
+        return {
+            "started": self.started,
+            "uptime_sec": time.time() - self.started,
+            "stages": {name: hist.as_dict() for name, hist in list(self.stages.items())},
+            "counters": dict(self.counters),
+            "gauges": {name: {"last": value, "max": self.gauge_max.get(name, value)}
+                       for name, value in list(self.gauges.items())},
+            "render": {"fps": self.render.fps, "frames": self.render.frames},
+        }
+
+    def summary_lines(self):
+        """Ringkasan teks untuk panel overlay."""
+        lines = [f"{'tahap':<12}{'p50':>8}{'p99':>8}{'maks':>8} ms"]
+        for name, hist in list(self.stages.items()):
+            lines.append(f"{name:<12}{hist.percentile(50) * 1000:>8.2f}"
+                         f"{hist.percentile(99) * 1000:>8.2f}{hist.max * 1000:>8.1f}")
+        lines.append(f"render {self.render.fps:.1f} fps ({self.render.frames} frame)")
+        for name, value in list(self.gauges.items()):
+            lines.append(f"{name} {value:g} (maks {self.gauge_max.get(name, value):g})")
+        for name, value in list(self.counters.items()):
+            lines.append(f"{name} {value}")
+        return lines
+
+    def dump(self, path):
+        """Simpan snapshot sebagai JSON."""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2, default=str)
+        return path
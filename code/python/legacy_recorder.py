@@ -0,0 +1,96 @@
+"""
+Inti perekam PyQtGraph di root repo ("Pembambilan data base EKG.py",
+"Pengambila data base EKG 2.py"), per tick timer Qt:
+
+    semua byte yang menunggu dibaca sekaligus -> didecode per batch
+    -> EMA + detektor beat per blok -> ring buffer tampilan (prealokasi)
+    -> baris CSV per blok lewat RecordingWriter (thread penulis, buffer besar)
+
+Script hanya memanggil `poll()` lalu satu `setData(core.display.view())`
+per tick, bukan satu salinan list + upload kurva per sampel.
+Format CSV sama dengan versi lama: dataset_ekg.csv (timestamp, raw, ema,
+diff, label) dan bpm_log.csv (timestamp, bpm; satu baris per beat).
+"""
+import time
+
+import numpy as np
+
+from ekg_signal import AdaptiveBeatDetector, Ema
+from recorder import RecordingWriter
+from ring_buffer import RingBuffer
+
+EKG_DTYPE = np.dtype([("timestamp", "f8"), ("raw", "i2"), ("ema", "i2"), ("diff", "i2"), ("label", "i2")])
+EKG_COLUMNS = list(EKG_DTYPE.names)
+EKG_FMT = "%.6f,%d,%d,%d,%d"
+BPM_DTYPE = np.dtype([("timestamp", "f8"), ("bpm", "i2")])
+BPM_COLUMNS = list(BPM_DTYPE.names)
+BPM_FMT = "%.6f,%d"
+MAX_READ_BYTES = 1 << 16  # batas satu read agar satu tick tidak terlalu lama
+
+
+class RecorderCore:
+    """
+    `poll()` memproses semua sampel yang sudah tiba dan mengembalikan
+    (jumlah sampel baru, array BPM_DTYPE beat baru). Baris hanya ditulis
+    ke CSV selama `recording` True; filter dan detektor selalu berjalan
+    agar state-nya runtut.
+    """
+
+    def __init__(self, ser, decoder, fs, threshold, display_len=500,
+                 ekg_path="dataset_ekg.csv", bpm_path="bpm_log.csv"):
+        self.ser = ser
+        self.decoder = decoder
+        self.fs = fs
+        self.recording = False
+        self.ema = Ema(alpha=0.1, initial=512)
+        self.detector = AdaptiveBeatDetector(fs, min_threshold=threshold)
+        self.display = RingBuffer(display_len, np.float32)
+        self.ekg_writer = RecordingWriter(ekg_path, EKG_COLUMNS, EKG_FMT)
+        self.bpm_writer = RecordingWriter(bpm_path, BPM_COLUMNS, BPM_FMT)
+
+    def poll(self):
+        data = self.ser.read(min(self.ser.in_waiting, MAX_READ_BYTES))
+        values, _, _ = self.decoder.feed(data) if data else (None, None, None)
+        no_beats = np.empty(0, dtype=BPM_DTYPE)
+        if values is None or len(values) == 0:
+            return 0, no_beats
+        values = values[values >= 0]  # -1 = elektroda lepas (dulu dilewati oleh isdigit)
+        n = len(values)
+        if n == 0:
+            return 0, no_beats
+        now = time.time()
+        # Sampel dalam satu batch tiba bersamaan: waktu disebar mundur dengan 1/fs
+        timestamps = now - (n - 1 - np.arange(n)) / self.fs
+        ema = self.ema.process(values.astype(np.float64)).astype(np.int16)
+        diff = values - ema
+        beats, _ = self.detector.process(diff)
+        self.display.extend(values)
+
+        bpm_rows = no_beats
+        if len(beats):
+            # BPM setelah tiap beat di blok (biasanya hanya satu beat per tick)
+            bpm = self.detector.bpm
+            bpm_rows = np.empty(len(beats), dtype=BPM_DTYPE)
+            bpm_rows["timestamp"] = timestamps[beats]
+            bpm_rows["bpm"] = int(round(bpm))
+            bpm_rows = bpm_rows[bpm_rows["bpm"] > 0]
+        if self.recording:
+            rows = np.empty(n, dtype=EKG_DTYPE)
+            rows["timestamp"] = timestamps
+            rows["raw"] = values
+            rows["ema"] = ema
+            rows["diff"] = diff
+            rows["label"] = 0
+            try:
+                self.ekg_writer.write(rows)
+                if len(bpm_rows):
+                    self.bpm_writer.write(bpm_rows)
+            except OSError:
+                self.recording = False  # penulis gagal (mis. disk penuh): error dilaporkan sekali
+                raise
+        return n, bpm_rows
+
+    def close(self):
+        """Tulis sisa baris dan tutup kedua file. Mengembalikan error penulis pertama (atau None)."""
+        errors = [self.ekg_writer.close(), self.bpm_writer.close()]
+        return next((e for e in errors if e), None)
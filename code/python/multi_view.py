@@ -0,0 +1,153 @@
+import time
+import tkinter as tk
+from tkinter import messagebox
+
+import numpy as np
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from acquisition import AcquisitionManager
+from decimate import MinMaxDecimator
+from plot_renderer import BlitRenderer
+
+TRACE_COLORS = ("cyan", "lime", "orange", "magenta", "yellow", "deepskyblue", "salmon", "violet")
+POLL_INTERVAL_MS = 20
+STATUS_INTERVAL_SEC = 1.0
+
+
+class MultiDeviceWindow:
+    """
+    Jendela monitor multi-perangkat: satu trace terfilter per kanal,
+    ditumpuk dengan sumbu waktu bersama. Satu callback `after` memproses
+    semua kanal lalu menggambar ulang dengan blitting, jadi beban loop Tk
+    tidak bertambah per perangkat selain biaya menggambar garisnya.
+    """
+
+    def __init__(self, master, ports, fs, window_sec, filter_params, record_prefix=None):
+        self.top = ttk.Toplevel(master)
+        self.top.title(f"Monitor Multi Perangkat ({len(ports)} kanal)")
+        self.window_sec = window_sec
+        self.fs = fs
+        self.manager = AcquisitionManager(ports, fs, window_sec, *filter_params)
+        self._last_status = 0.0
+        self._running = False
+        self._build(ports)
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+        self.manager.start(record_prefix)
+        self._running = True
+        self.top.after(POLL_INTERVAL_MS, self._tick)
+
+    def _build(self, ports):
+        frame = ttk.Frame(self.top, padding=10)
+        frame.grid(row=0, column=0, sticky="nsew")
+        self.top.rowconfigure(0, weight=1)
+        self.top.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+
+        n = len(ports)
+        self.fig = Figure(figsize=(12, max(3, 1.6 * n)), dpi=100)
+        self.fig.patch.set_facecolor('#2a2a2a')
+        self.axes = []
+        self.lines = []
+        for i, ch in enumerate(self.manager.channels):
+            ax = self.fig.add_subplot(n, 1, i + 1, sharex=self.axes[0] if self.axes else None)
+            ax.set_facecolor('#3a3a3a')
+            ax.set_ylabel(ch.name, color='white')
+            ax.tick_params(axis='x', colors='white', labelbottom=(i == n - 1))
+            ax.tick_params(axis='y', colors='white')
+            for spine in ax.spines.values():
+                spine.set_color('white')
+            line, = ax.plot([], [], color=TRACE_COLORS[i % len(TRACE_COLORS)], lw=1.0)
+            self.axes.append(ax)
+            self.lines.append(line)
+        self.axes[-1].set_xlabel("Waktu (detik)", color='white')
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=frame)
+        self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+        self.fig.tight_layout()
+        self.renderer = BlitRenderer(self.canvas, self.axes)
+        self._envelopes = None
+        self._envelope_bucket = None
+
+        # Status per kanal: BPM, antrian, fs, error
+        status = ttk.Frame(frame, padding=(10, 0))
+        status.grid(row=0, column=1, sticky="ns")
+        self.status_vars = []
+        for i, ch in enumerate(self.manager.channels):
+            var = tk.StringVar(value=f"{ch.name}: membuka port...")
+            ttk.Label(status, textvariable=var, font=("Helvetica", 9), justify=LEFT).grid(
+                row=i, column=0, sticky=W, pady=4)
+            self.status_vars.append(var)
+        ttk.Button(status, text="Stop", command=self.close, bootstyle="danger").grid(
+            row=len(ports), column=0, sticky="ew", pady=(10, 0))
+
+    def _ensure_envelopes(self):
+        px = max(100, int(self.axes[0].bbox.width))
+        bucket = max(1, int(self.window_sec * self.fs) // px)
+        if bucket == self._envelope_bucket:
+            return
+        self._envelope_bucket = bucket
+        capacity = int(self.window_sec * self.fs / bucket) + 2
+        self._envelopes = []
+        for ch in self.manager.channels:
+            env = MinMaxDecimator(bucket, capacity)
+            view = ch.buffer.view()
+            env.push(view["t"], view["filtered"])
+            self._envelopes.append(env)
+
+    def _tick(self):
+        if not self._running:
+            return
+        updates = self.manager.poll()
+        self._ensure_envelopes()
+        for ch, env in zip(self.manager.channels, self._envelopes):
+            records = updates.get(ch)
+            if records is not None:
+                env.push(records["t"], records["filtered"])
+        if updates:
+            self._update_plot()
+            self.renderer.draw()
+        now = time.time()
+        if now - self._last_status >= STATUS_INTERVAL_SEC:
+            self._last_status = now
+            self._update_status()
+        self.top.after(max(POLL_INTERVAL_MS, self.renderer.interval_ms), self._tick)
+
+    def _update_plot(self):
+        t_max = self.manager.t_latest
+        t_min = t_max - self.window_sec
+        for ax, line, env in zip(self.axes, self.lines, self._envelopes):
+            t, y = env.view()
+            start = np.searchsorted(t, t_min, side="left")
+            t, y = t[start:], y[start:]
+            line.set_data(t, y)
+            if len(y):
+                self.renderer.fit_y(ax, float(y.min()), float(y.max()), 10)
+        # sharex: cukup geser satu axes, semua ikut
+        self.renderer.scroll_x(self.axes[0], t_max, self.window_sec)
+
+    def _update_status(self):
+        for var, ch in zip(self.status_vars, self.manager.channels):
+            st = ch.stats()
+            if st["error"]:
+                var.set(f"{st['name']}: ERROR {st['error']}")
+                continue
+            if ch.decoder is None:
+                continue  # port masih dibuka
+            fs_text = f"{st['fs']:.0f} Hz" if st["fs"] else "-"
+            bpm_text = f"{st['bpm']:.0f}" if st["bpm"] > 0 else "--"
+            var.set(f"{st['name']}: BPM {bpm_text}\n"
+                    f"fs {fs_text} | antrian {st['queue']} | gap {st['gaps']}")
+
+    def close(self):
+        if not self._running:
+            return
+        self._running = False
+        errors = self.manager.stop()
+        if errors:
+            text = "\n".join(f"{name}: {e}" for name, e in errors.items())
+            messagebox.showerror("Error File", f"Gagal menyimpan rekaman:\n{text}")
+        self.top.destroy()
@@ -0,0 +1,201 @@
+"""
+Pipeline analisis EKG tanpa GUI: muat rekaman, filter, deteksi R-peak,
+BPM per sampel dan ringkasan BPM/HRV. Dipakai oleh EkgApp (ekspor) dan
+oleh analyze.py (analisis batch satu direktori).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from beat_detector import MIN_BEAT_INTERVAL_SEC, detect_beats, instantaneous_bpm
+from hrv import NN50_MS, RR_RANGE_SEC, SegmentedLfHf, lf_hf, poincare
+from rhythm import classify_signal, rhythm_summary
+from running_stats import RunningStats
+from session_format import SESSION_EXT, SIGNAL_COLUMNS, TIME_COLUMNS, SessionReader, parse_subject_filename
+from streaming_filter import filtfilt_offline
+
+DEFAULT_FS = 250.0
+DEFAULT_SETTINGS = {
+    "lowcut": 0.5,
+    "highcut": 40.0,
+    "notch": 50.0,
+    "threshold": None,  # None = otomatis dari amplitudo sinyal terfilter
+    "min_interval": MIN_BEAT_INTERVAL_SEC,
+}
+AUTO_THRESHOLD_RATIO = 0.6  # threshold otomatis = rasio x persentil 99.5 sinyal terfilter
+RR_SUMMARY_KEYS = ("bpm_mean", "bpm_min", "bpm_max", "rr_mean_ms", "sdnn_ms", "rmssd_ms", "pnn50",
+                   "sd1_ms", "sd2_ms", "lf_ms2", "hf_ms2", "lf_hf")
+
+
+def load_recording(path, fs=DEFAULT_FS):
+    """
+    Muat rekaman CSV (GUI: time,signal,...; perekam: timestamp,raw,...) atau
+    sesi .ekgs. Mengembalikan (t detik sejak awal, sinyal float64, fs).
+    Jika kolom waktu tidak naik tegas (mis. timestamp per detik), waktu
+    dibangun ulang dari n / fs.
+    """
+    if path.endswith(SESSION_EXT):
+        reader = SessionReader(path)
+        name = next(c for c in SIGNAL_COLUMNS if c in reader.column_names)
+        signal = np.asarray(reader.read(columns=[name])[name], dtype=np.float64)
+        return np.arange(len(signal)) / reader.fs, signal, reader.fs
+    header = list(pd.read_csv(path, nrows=0).columns)
+    signal_col = next((c for c in SIGNAL_COLUMNS if c in header), None)
+    if signal_col is None:
+        raise ValueError(f"Kolom sinyal tidak ditemukan di {os.path.basename(path)}")
+    time_col = next((c for c in TIME_COLUMNS if c in header), None)
+    usecols = [signal_col] + ([time_col] if time_col else [])
+    df = pd.read_csv(path, usecols=usecols)
+    signal = df[signal_col].to_numpy(dtype=np.float64)
+    if time_col:
+        t = df[time_col].to_numpy(dtype=np.float64)
+        if len(t) > 1 and np.all(np.diff(t) > 0):
+            t = t - t[0]
+            return t, signal, (len(t) - 1) / (t[-1] - t[0])
+    return np.arange(len(signal)) / fs, signal, fs
+
+
+def filter_signal(signal, fs, lowcut, highcut, notch):
+    """Filter zero-phase (band-pass + notch) untuk analisis offline."""
+    return filtfilt_offline(signal, lowcut, highcut, notch, fs)
+
+
+def auto_threshold(filtered):
+    return AUTO_THRESHOLD_RATIO * float(np.percentile(filtered, 99.5))
+
+
+def bpm_from_signal(t, signal, threshold, min_interval=MIN_BEAT_INTERVAL_SEC):
+    """Indeks beat dan BPM instan per sampel untuk seluruh sinyal."""
+    beats = detect_beats(t, signal, threshold, min_interval)
+    return beats, instantaneous_bpm(t, beats, len(signal))
+
+
+def rr_summary(beat_times):
+    """
+    Ringkasan BPM dan HRV (domain waktu, Poincare, LF/HF rata-rata per
+    segmen 5 menit) dari waktu beat (detik).
+    Interval R-R di luar RR_RANGE_SEC (beat terlewat/ganda) diabaikan.
+    """
+    beat_times = np.asarray(beat_times, dtype=np.float64)
+    rr = np.diff(beat_times)
+    valid = (rr >= RR_RANGE_SEC[0]) & (rr <= RR_RANGE_SEC[1])
+    rr_times = beat_times[1:][valid]
+    rr = rr[valid]
+    summary = {"n_beats": len(beat_times), "n_rr": len(rr)}
+    if len(rr) < 2:
+        summary.update(dict.fromkeys(RR_SUMMARY_KEYS, np.nan))
+        return summary
+    bpm = 60.0 / rr
+    drr = np.diff(rr)
+    summary.update({
+        "bpm_mean": 60.0 / rr.mean(),
+        "bpm_min": bpm.min(),
+        "bpm_max": bpm.max(),
+        "rr_mean_ms": rr.mean() * 1000,
+        "sdnn_ms": rr.std(ddof=1) * 1000,
+        "rmssd_ms": np.sqrt(np.mean(drr ** 2)) * 1000,
+        "pnn50": 100.0 * np.mean(np.abs(drr) > 0.05),
+    })
+    summary["sd1_ms"], summary["sd2_ms"] = poincare(rr * 1000)
+    bands = lf_hf(rr_times, rr * 1000)
+    summary.update(lf_ms2=bands["lf_ms2"], hf_ms2=bands["hf_ms2"], lf_hf=bands["lf_hf"])
+    return summary
+
+
+class RrSummary:
+    """
+    Versi bertahap dari rr_summary untuk rekaman yang tidak muat di memori:
+    `push(beat_times)` per blok, `summary()` di akhir. Statistik R-R dan
+    beda berurutan dihitung berjalan (Welford), LF/HF per segmen 5 menit
+    (SegmentedLfHf), jadi waktu beat tidak disimpan. Seperti rr_summary,
+    beda berurutan dihitung antar R-R valid yang berurutan.
+    """
+
+    def __init__(self):
+        self.n_beats = 0
+        self.rr_ms = RunningStats()
+        self.diff_ms = RunningStats()
+        self._diff_sq = 0.0
+        self._nn50 = 0
+        self._spectrum = SegmentedLfHf()
+        self._last_beat = None
+        self._last_rr = None
+
+    def push(self, beat_times):
+        for beat_time in np.atleast_1d(beat_times).tolist():
+            self.n_beats += 1
+            last, self._last_beat = self._last_beat, beat_time
+            if last is None or not RR_RANGE_SEC[0] <= beat_time - last <= RR_RANGE_SEC[1]:
+                continue
+            rr_ms = (beat_time - last) * 1000.0
+            if self._last_rr is not None:
+                d = rr_ms - self._last_rr
+                self.diff_ms.push(d)
+                self._diff_sq += d * d
+                self._nn50 += abs(d) > NN50_MS
+            self.rr_ms.push(rr_ms)
+            self._spectrum.push(beat_time, rr_ms)
+            self._last_rr = rr_ms
+
+    def summary(self):
+        rr, diff = self.rr_ms, self.diff_ms
+        summary = {"n_beats": self.n_beats, "n_rr": rr.count}
+        if rr.count < 2:
+            summary.update(dict.fromkeys(RR_SUMMARY_KEYS, np.nan))
+            return summary
+        summary.update({
+            "bpm_mean": 60000.0 / rr.mean,
+            "bpm_min": 60000.0 / rr.max,
+            "bpm_max": 60000.0 / rr.min,
+            "rr_mean_ms": rr.mean,
+            "sdnn_ms": rr.std,
+            "rmssd_ms": np.sqrt(self._diff_sq / diff.count),
+            "pnn50": 100.0 * self._nn50 / diff.count,
+            "sd1_ms": np.nan, "sd2_ms": np.nan,
+        })
+        if diff.count > 1:
+            sd1_sq = diff.variance / 2
+            summary["sd1_ms"] = np.sqrt(sd1_sq)
+            summary["sd2_ms"] = np.sqrt(max(2 * rr.variance - sd1_sq, 0.0))
+        bands = self._spectrum.result()
+        summary.update(lf_ms2=bands["lf_ms2"], hf_ms2=bands["hf_ms2"], lf_hf=bands["lf_hf"])
+        return summary
+
+
+def analyze_signal(t, signal, fs, settings=None):
+    """
+    Jalankan pipeline lengkap pada satu sinyal. Mengembalikan dict berisi
+    filtered, beats, bpm (per sampel), threshold, summary dan episode ritme.
+    """
+    s = dict(DEFAULT_SETTINGS, **(settings or {}))
+    filtered = filter_signal(signal, fs, s["lowcut"], s["highcut"], s["notch"])
+    threshold = auto_threshold(filtered) if s["threshold"] is None else s["threshold"]
+    beats, bpm = bpm_from_signal(t, filtered, threshold, s["min_interval"])
+    summary = rr_summary(t[beats])
+    summary["threshold"] = threshold
+    # Morfologi (lebar QRS, ST) diukur pada sinyal terfilter zero-phase
+    episodes = classify_signal(t, filtered, beats, fs)
+    summary.update(rhythm_summary(episodes))
+    return {"filtered": filtered, "beats": beats, "bpm": bpm, "threshold": threshold, "summary": summary,
+            "episodes": episodes}
+
+
+def analyze_file(path, settings=None, fs=DEFAULT_FS):
+    """
+    Satu baris tabel ringkasan untuk satu rekaman. Error dicatat di kolom
+    `error`, tidak dilempar, supaya satu file rusak tidak menghentikan batch.
+    """
+    row = {"file": os.path.basename(path)}
+    row.update(parse_subject_filename(path))
+    try:
+        t, signal, file_fs = load_recording(path, fs)
+        row["fs"] = file_fs
+        row["duration_s"] = len(signal) / file_fs
+        if len(signal) <= 10:
+            raise ValueError("Rekaman terlalu pendek")
+        row.update(analyze_signal(t, signal, file_fs, settings)["summary"])
+        row["error"] = ""
+    except Exception as e:
+        row["error"] = str(e)
+    return row
@@ -0,0 +1,104 @@
+import time
+
+
+class BlitRenderer:
+    """
+    Renderer cepat untuk FigureCanvasTkAgg berbasis blitting.
+
+    Background tiap axes (judul, tick, label, grid) di-cache setelah full draw.
+    Redraw biasa hanya me-restore background lalu menggambar ulang Line2D,
+    tanpa merender teks/tick. Full draw hanya terjadi bila batas axis berubah
+    (dengan histeresis, lihat `scroll_x`/`fit_y`), saat resize, atau bila
+    diminta lewat `invalidate()`. `tight_layout` hanya dijalankan saat resize.
+    """
+
+    def __init__(self, canvas, axes, min_interval_ms=33, max_interval_ms=200, cost_factor=3.0):
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.axes = list(axes)
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.cost_factor = cost_factor  # interval = cost_factor x biaya gambar
+        self.draw_cost = 0.0  # rata-rata eksponensial biaya satu redraw (detik)
+        self.full_draws = 0
+        self.blits = 0
+        self._backgrounds = {}
+        self._dirty = True
+        for ax in self.axes:
+            for line in ax.get_lines():
+                line.set_animated(True)
+        canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.mpl_connect("resize_event", self._on_resize)
+
+    @property
+    def interval_ms(self):
+        """Interval redraw berikutnya, menyesuaikan biaya gambar yang terukur."""
+        ms = int(self.draw_cost * 1000 * self.cost_factor)
+        return max(self.min_interval_ms, min(self.max_interval_ms, ms))
+
+    def invalidate(self):
+        """Minta full draw pada redraw berikutnya (mis. visibilitas axes berubah)."""
+        self._dirty = True
+
+    def scroll_x(self, ax, t_last, window, step_frac=0.2):
+        """
+        Sumbu waktu bergeser per langkah (step_frac x window), bukan setiap
+        frame, jadi tick/label hanya dirender ulang saat langkah terjadi.
+        """
+        lo, hi = ax.get_xlim()
+        span_ok = hi - lo <= window and (lo == 0 or hi - lo >= window * (1 - step_frac))
+        if lo <= t_last <= hi and span_ok:
+            return
+        step = window * step_frac
+        new_hi = t_last + step
+        ax.set_xlim(max(0.0, new_hi - window), new_hi)
+        self._dirty = True
+
+    def fit_y(self, ax, y_min, y_max, min_pad, floor=None, shrink=0.4):
+        """
+        Ubah batas y hanya jika data keluar dari batas sekarang, atau rentang
+        data menyusut di bawah `shrink` x rentang batas. Batas baru diberi
+        margin ekstra agar perubahan kecil berikutnya tidak memicu full draw.
+        """
+        lo, hi = ax.get_ylim()
+        span = y_max - y_min
+        if lo <= y_min and y_max <= hi and shrink * (hi - lo) <= span + 2 * min_pad:
+            return
+        pad = max(min_pad, span * 0.2)
+        new_lo = y_min - pad
+        if floor is not None:
+            new_lo = max(floor, new_lo)
+        ax.set_ylim(new_lo, y_max + pad)
+        self._dirty = True
+
+    def draw(self):
+        start = time.perf_counter()
+        if self._dirty or not self._backgrounds:
+            self._dirty = False
+            self.canvas.draw()  # memicu _on_draw: cache background + gambar garis
+            self.full_draws += 1
+        else:
+            for ax, background in self._backgrounds.items():
+                self.canvas.restore_region(background)
+                self._draw_lines(ax)
+                self.canvas.blit(ax.bbox)
+            self.blits += 1
+        cost = time.perf_counter() - start
+        self.draw_cost = cost if self.draw_cost == 0 else 0.8 * self.draw_cost + 0.2 * cost
+
+    def _draw_lines(self, ax):
+        for line in ax.get_lines():
+            if line.get_visible():
+                ax.draw_artist(line)
+
+    def _on_draw(self, event):
+        self._backgrounds = {
+            ax: self.canvas.copy_from_bbox(ax.bbox) for ax in self.axes if ax.get_visible()
+        }
+        for ax in self._backgrounds:
+            self._draw_lines(ax)
+        self.canvas.blit(self.fig.bbox)
+
+    def _on_resize(self, event):
+        self.fig.tight_layout()
+        self._dirty = True
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class RecordingWriter:
+    """
+    Penulis rekaman CSV di thread terpisah.
+
+    GUI cukup memanggil `write(block)` dengan array structured per blok;
+    thread penulis menggabungkan blok yang menunggu dan menulisnya sekaligus
+    setiap `flush_interval` detik, lalu fsync setiap `fsync_interval` detik.
+    Jika aplikasi crash, data yang hilang maksimal sekitar
+    flush_interval + fsync_interval detik terakhir. Memori tetap konstan
+    berapa pun panjang sesi, karena blok dibuang setelah ditulis.
+
+    Jika thread penulis berhenti karena error (disk penuh, I/O), error
+    disimpan di `error` dan `write()` berikutnya menolak blok dengan
+    OSError, jadi blok tidak menumpuk di memori tanpa ada yang tahu.
+    """
+
+    def __init__(self, filename, columns, fmt, flush_interval=0.5, fsync_interval=2.0):
+        self.filename = filename
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        self.error = None
+        self._blocks = deque()
+        self._stop = threading.Event()
+        self._last_fsync = time.time()
+        self._file = open(filename, "w", newline="", buffering=1 << 20)
+        self._file.write(",".join(columns) + "\n")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Jumlah blok yang belum ditulis."""
+        return len(self._blocks)
+
+    def write(self, block):
+        if self.error is not None:
+            raise OSError(f"Penulis rekaman {self.filename} berhenti: {self.error}") from self.error
+        if len(block):
+            self._blocks.append(block)
+
+    def close(self):
+        """
+        Tulis sisa blok, fsync, tutup file. Mengembalikan error dari thread
+        penulis (None jika sukses).
+        """
+        self._stop.set()
+        self._thread.join()
+        return self.error
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self._flush()
+            self._flush(sync=True)
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self._file.close()
+            except OSError as e:
+                # Setelah disk penuh, close() ikut gagal saat flush sisa buffer
+                self.error = self.error or e
+
+    def _flush(self, sync=False):
+        blocks = []
+        while True:
+            try:
+                blocks.append(self._blocks.popleft())
+            except IndexError:
+                break
+        if blocks:
+            data = blocks[0] if len(blocks) == 1 else np.concatenate(blocks)
+            np.savetxt(self._file, data, fmt=self.fmt)
+            self.rows_written += len(data)
+            self._file.flush()
+        now = time.time()
+        if sync or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
@@ -0,0 +1,363 @@
+"""
+Sumber replay deterministik untuk pengujian tanpa hardware.
+
+- `SyntheticEkg`: port generator P-QRS-T dari code/test/test.ino
+  (EKG_BEAT + baseline wander 0.3 Hz + dengung 50 Hz + noise acak),
+  deterministik per indeks sampel (hasil sama berapa pun ukuran bloknya).
+- `ReplaySerial`: objek mirip serial.Serial yang memutar rekaman atau
+  sinyal sintetis sebagai byte firmware (frame biner atau ASCII), jadi
+  EkgApp dan SerialSource menjalankan jalur yang sama persis seperti
+  dengan board asli (decoder, timeline, antrian, filter, plot).
+- `SyntheticSource`: sumber asyncio (lihat async_sources) untuk pipeline headless.
+
+`speed` 1.0 = waktu nyata, N = N kali lebih cepat, 0 = secepat mungkin.
+Karena replay sengaja tidak seiring jam host, timeline untuk port replay
+memakai jam perangkat saja (`replay_timeline`): waktu sampel = waktu
+rekaman, berapa pun speed-nya.
+
+Contoh:
+    python gui.py --replay dataset_ekg.csv --speed 4
+    python gui.py --replay synthetic:90
+    python replay.py synthetic --duration 600 --speed 0
+    python replay.py synthetic:90 --duration 60 --check
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from acquisition import AUTO_THRESHOLD_SEC
+from async_sources import FileReplaySource, SerialSource
+from beat_detector import StreamingBeatDetector
+from pipeline import DEFAULT_FS, DEFAULT_SETTINGS, auto_threshold
+from serial_protocol import (CMD_ASCII, CMD_BINARY, FLAG_LEADS_OFF, AsciiLineDecoder,
+                             BinaryFrameDecoder, encode_frames)
+from session_format import iter_recording_blocks
+from streaming_filter import StreamingFilter
+from timeline import TimelineReconstructor
+
+# Satu gelombang P-QRS-T bersih, sama dengan EKG_BEAT di code/test/test.ino
+EKG_BEAT = np.array([
+    512, 512, 512, 515, 520, 522, 520, 515, 512,  # gelombang P
+    510, 508, 512, 512,  # segmen PR
+    505, 480, 450, 400, 350, 450, 750, 950, 700, 500,  # kompleks QRS
+    512, 512, 515, 525, 540, 550, 555, 550, 540, 525, 515, 512,  # gelombang T
+    512, 512, 512, 512, 512, 512, 512, 512, 512, 512,  # garis isoelektrik
+], dtype=np.float64)
+BASELINE = 512
+SYNTHETIC_BPM = 75
+NOISE_TABLE_SIZE = 1 << 16
+
+REPLAY_PREFIX = "replay:"
+SYNTHETIC_PREFIX = "synthetic"
+CHECK_SPEEDS = (0.0, 1.0, 4.0)
+CHECK_BEAT_TOLERANCE = 0.02  # selisih relatif jumlah beat yang masih diterima
+
+
+class SyntheticEkg:
+    """
+    Generator sinyal seperti test.ino. Waktu untuk noise sinus diambil dari
+    indeks sampel (n / fs), bukan millis(), dan noise acak dari tabel
+    berbasis `seed`, jadi keluaran sepenuhnya deterministik.
+    """
+
+    def __init__(self, fs=DEFAULT_FS, bpm=SYNTHETIC_BPM, seed=0, wander=30.0, powerline=25.0, noise=8):
+        self.fs = fs
+        self.samples_per_beat = int(60.0 / bpm * fs)
+        self.wander = wander
+        self.powerline = powerline
+        self._noise = np.random.default_rng(seed).integers(-noise, noise + 1, NOISE_TABLE_SIZE)
+        self._next = 0
+
+    def samples(self, start, n):
+        """Sampel [start, start + n) sebagai (t detik, nilai ADC int16)."""
+        idx = start + np.arange(n)
+        pos = idx % self.samples_per_beat
+        clean = np.full(n, BASELINE, dtype=np.float64)
+        in_beat = pos < len(EKG_BEAT)
+        clean[in_beat] = EKG_BEAT[pos[in_beat]]
+        t = idx / self.fs
+        signal = (clean + self.wander * np.sin(2 * np.pi * 0.3 * t)
+                  + self.powerline * np.sin(2 * np.pi * 50.0 * t)
+                  + self._noise[idx % NOISE_TABLE_SIZE])
+        # int() di firmware membulatkan ke arah nol, lalu constrain(0, 1023)
+        return t, np.clip(np.trunc(signal), 0, 1023).astype(np.int16)
+
+    def next(self, n):
+        t, values = self.samples(self._next, n)
+        self._next += n
+        return t, values
+
+    def chunks(self, duration_sec=None, chunk_sec=10.0):
+        """Potongan (t, nilai) berurutan; tanpa batas jika duration_sec None."""
+        total = None if duration_sec is None else int(duration_sec * self.fs)
+        step = int(chunk_sec * self.fs)
+        while total is None or self._next < total:
+            n = step if total is None else min(step, total - self._next)
+            yield self.next(n)
+
+
+def recording_chunks(path, fs=DEFAULT_FS, chunk_sec=10.0):
+    for t, signal, _ in iter_recording_blocks(path, int(chunk_sec * fs), fs):
+        yield t, signal.astype(np.int16)
+
+
+class ReplaySerial:
+    """
+    Pengganti serial.Serial untuk replay. Byte dihasilkan saat sampel
+    "jatuh tempo" menurut jam dinding x `speed`. Seperti firmware, mulai
+    dalam ASCII dan beralih ke frame biner saat host mengirim 'B'. Frame
+    biner membawa t_us dari waktu rekaman, jadi timeline host memakai jam
+    perangkat dan waktu sampel tidak bergantung jitter host.
+    """
+
+    def __init__(self, chunks, speed=1.0, timeout=0.05, port="replay"):
+        self.port = port
+        self.speed = speed
+        self.timeout = timeout
+        self.is_open = True
+        self.binary = False
+        self._chunks = iter(chunks)
+        self._t = np.empty(0)
+        self._values = np.empty(0, dtype=np.int16)
+        self._pos = 0
+        self._seq = 0
+        self._buf = bytearray()
+        self._start = None
+        self._exhausted = False
+
+    @property
+    def in_waiting(self):
+        self._fill()
+        return len(self._buf)
+
+    def _due_time(self):
+        if self._start is None:
+            self._start = time.time()
+        if not self.speed:
+            return np.inf
+        return (time.time() - self._start) * self.speed
+
+    def _fill(self):
+        due = self._due_time()
+        while True:
+            if self._pos >= len(self._values):
+                try:
+                    self._t, self._values = next(self._chunks)
+                    self._pos = 0
+                except StopIteration:
+                    self._exhausted = True
+                    return
+                continue
+            end = int(np.searchsorted(self._t, due, side="right"))
+            if not np.isfinite(due):
+                end = min(len(self._values), self._pos + 4096)  # batasi ukuran satu read
+            if end <= self._pos:
+                return
+            self._encode(self._t[self._pos:end], self._values[self._pos:end])
+            self._pos = end
+            if not np.isfinite(due):
+                return
+
+    def _encode(self, t, values):
+        if self.binary:
+            leads_off = values < 0
+            flags = np.where(leads_off, FLAG_LEADS_OFF, 0).astype(np.uint8)
+            t_us = np.round(t * 1e6).astype(np.uint64)
+            self._buf.extend(encode_frames(np.where(leads_off, 0, values), self._seq, t_us, flags))
+            self._seq = (self._seq + len(values)) & 0xFFFF
+        else:
+            self._buf.extend(b"".join(b"%d\r\n" % v for v in values.tolist()))
+
+    def _next_due_delay(self):
+        if not self.speed or self._pos >= len(self._t):
+            return 0.0
+        return max(0.0, self._start + self._t[self._pos] / self.speed - time.time())
+
+    def read(self, size=1):
+        deadline = time.time() + (self.timeout or 0)
+        while self.is_open:
+            self._fill()
+            if self._buf:
+                break
+            if self._exhausted:
+                self.is_open = False  # rekaman habis: sama seperti port tertutup
+                break
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, self._next_due_delay() or remaining))
+        out = bytes(self._buf[:size])
+        del self._buf[:size]
+        return out
+
+    def write(self, data):
+        if CMD_BINARY in data:
+            self.binary = True
+            self._seq = 0
+        elif CMD_ASCII in data:
+            self.binary = False
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._buf.clear()
+
+    def close(self):
+        self.is_open = False
+
+
+def is_replay_port(port):
+    return bool(port) and (port.startswith(REPLAY_PREFIX) or port.startswith(SYNTHETIC_PREFIX))
+
+
+def replay_port(spec):
+    """Nama port replay dari argumen CLI: path rekaman atau 'synthetic[:BPM]'."""
+    return spec if spec.startswith(SYNTHETIC_PREFIX) else REPLAY_PREFIX + spec
+
+
+def synthetic_bpm(port):
+    """BPM port 'synthetic[:BPM]', atau None untuk replay rekaman."""
+    if not port.startswith(SYNTHETIC_PREFIX):
+        return None
+    _, _, bpm = port.partition(":")
+    return float(bpm) if bpm else SYNTHETIC_BPM
+
+
+def replay_chunks(port, fs=DEFAULT_FS, duration_sec=None):
+    if port.startswith(SYNTHETIC_PREFIX):
+        return SyntheticEkg(fs, synthetic_bpm(port)).chunks(duration_sec)
+    return recording_chunks(port[len(REPLAY_PREFIX):], fs)
+
+
+def replay_timeline(fs=DEFAULT_FS):
+    """Timeline untuk port replay: jam perangkat (waktu rekaman) tanpa fit ke jam host."""
+    return TimelineReconstructor(fs, device_clock_only=True)
+
+
+def open_replay(port, speed=1.0, fs=DEFAULT_FS, binary=True, duration_sec=None):
+    """
+    Padanan open_serial untuk port replay. Mengembalikan (ser, decoder)
+    dengan protokol biner secara default (jam perangkat = waktu rekaman).
+    """
+    ser = ReplaySerial(replay_chunks(port, fs, duration_sec), speed, port=port)
+    if binary:
+        ser.write(CMD_BINARY)
+        return ser, BinaryFrameDecoder()
+    return ser, AsciiLineDecoder()
+
+
+class SyntheticSource(FileReplaySource):
+    """Sumber asyncio sinyal sintetis (tanpa file) dengan pacing yang sama."""
+
+    def __init__(self, fs=DEFAULT_FS, bpm=SYNTHETIC_BPM, speed=1.0, duration_sec=None, seed=0, **kwargs):
+        super().__init__(f"synthetic:{bpm:g}", fs, speed, **kwargs)
+        self.name = self.stats.name = f"synthetic:{bpm:g}"
+        self.generator = SyntheticEkg(fs, bpm, seed)
+        self.duration_sec = duration_sec
+
+    def _chunks(self):
+        return self.generator.chunks(self.duration_sec)
+
+
+async def run_headless(port, speed=0.0, fs=DEFAULT_FS, duration_sec=None, settings=None):
+    """
+    Pipeline headless lengkap lewat jalur serial (ReplaySerial -> SerialSource
+    -> decoder -> timeline -> filter streaming -> detektor beat). Mengembalikan
+    throughput dan latensi pemrosesan per blok, plus pemeriksaan timeline
+    (`t_monotonic`) dan jumlah beat yang diharapkan untuk sinyal sintetis.
+    """
+    s = dict(DEFAULT_SETTINGS, **(settings or {}))
+    ser, decoder = open_replay(port, speed, fs, duration_sec=duration_sec)
+    source = SerialSource(ser=ser, decoder=decoder, fs=fs, timeline=replay_timeline(fs))
+    stream_filter = StreamingFilter(fs, s["lowcut"], s["highcut"], s["notch"], capacity=1)
+    detector = StreamingBeatDetector(s["threshold"], s["min_interval"])
+    latencies = []
+    n_samples = 0
+    bpm_sum = 0.0
+    bpm_n = 0
+    last_t = -np.inf
+    monotonic = True
+    warmup = []  # blok (t, y) sebelum threshold otomatis ditetapkan
+    start = time.perf_counter()
+    async for block in source:
+        t_block = time.perf_counter()
+        t = block["t"]
+        monotonic = monotonic and bool(t[0] > last_t and np.all(np.diff(t) > 0))
+        last_t = t[-1]
+        y = stream_filter.process(block["value"])
+        n_samples += len(block)
+        if detector.threshold is None:
+            # Seperti acquisition.DeviceChannel: tunggu cukup data terfilter (blok awal bisa sangat kecil)
+            warmup.append((t, y))
+            if sum(len(w[1]) for w in warmup) < AUTO_THRESHOLD_SEC * fs:
+                latencies.append(time.perf_counter() - t_block)
+                continue
+            t, y = (np.concatenate(parts) for parts in zip(*warmup))
+            warmup = []
+            detector.threshold = auto_threshold(y)
+        _, bpm = detector.process(t, y)
+        latencies.append(time.perf_counter() - t_block)
+        valid = bpm[bpm > 0]
+        bpm_sum += float(valid.sum())
+        bpm_n += len(valid)
+    elapsed = time.perf_counter() - start
+    lat = np.asarray(latencies) * 1000
+    bpm = synthetic_bpm(port)
+    return {
+        "samples": n_samples,
+        "wall_sec": elapsed,
+        "samples_per_sec": n_samples / elapsed if elapsed else 0.0,
+        "blocks": len(latencies),
+        "block_ms_p50": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "block_ms_p99": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+        "beats": detector.beat_count,
+        "expected_beats": n_samples / fs * bpm / 60.0 if bpm else None,
+        "t_monotonic": monotonic,
+        "bpm_mean": bpm_sum / bpm_n if bpm_n else 0.0,
+        "fs_estimate": source.timeline.fs_estimate,
+        "decoder": decoder.stats(),
+    }
+
+
+def check_result(result):
+    """Daftar masalah pada hasil run_headless (kosong = lolos)."""
+    problems = []
+    if not result["t_monotonic"]:
+        problems.append("timestamp tidak naik monoton")
+    expected = result["expected_beats"]
+    if expected and abs(result["beats"] - expected) > CHECK_BEAT_TOLERANCE * expected:
+        problems.append(f"beat {result['beats']} != perkiraan {expected:.0f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay EKG headless tanpa hardware")
+    parser.add_argument("source", help="file rekaman (.csv/.ekgs) atau synthetic[:BPM]")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = waktu nyata, 0 = secepat mungkin")
+    parser.add_argument("--duration", type=float, help="durasi sinyal sintetis (detik)")
+    parser.add_argument("--fs", type=float, default=DEFAULT_FS)
+    parser.add_argument("--check", action="store_true",
+                        help=f"jalankan pada speed {', '.join(f'{s:g}' for s in CHECK_SPEEDS)} "
+                             "dan periksa timestamp + jumlah beat")
+    args = parser.parse_args()
+    duration = args.duration if args.duration else (60.0 if args.source.startswith(SYNTHETIC_PREFIX) else None)
+    port = replay_port(args.source)
+    failed = False
+    for speed in (CHECK_SPEEDS if args.check else (args.speed,)):
+        result = asyncio.run(run_headless(port, speed, args.fs, duration))
+        if args.check:
+            problems = check_result(result)
+            failed = failed or bool(problems)
+            print(f"speed {speed:g}: beats {result['beats']} (perkiraan {result['expected_beats']}), "
+                  f"monoton {result['t_monotonic']}" + (f" -> GAGAL: {'; '.join(problems)}" if problems else ""))
+            continue
+        for key, value in result.items():
+            print(f"{key}: {value}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
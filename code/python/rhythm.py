@@ -0,0 +1,330 @@
+"""
+Klasifikasi ritme berbasis aturan, bertahap per beat.
+
+Input: sinyal per blok (mentah atau terfilter zero-phase) + indeks beat
+dari StreamingBeatDetector (crossing threshold naik). Untuk tiap beat, setelah POST_SEC sampel
+sesudahnya tersedia, diukur posisi puncak R, lebar QRS (deviasi dari
+garis dasar segmen PR), dan deviasi ST (ST60 terhadap garis dasar). Aturan
+mengikuti tabel ritme di README:
+
+    vtach       >= VTACH_MIN_BEATS QRS lebar berturut-turut, laju > 100
+    afib        R-R tidak teratur (RMSSD/rerata R-R > AFIB_NRMSSD)
+    flutter     takikardia QRS sempit yang sangat teratur di FLUTTER_BPM
+                (konduksi 2:1; hanya dari R-R, tanpa analisis gelombang F)
+    bradikardia / takikardia / normal   pita laju < 60, > 100, selain itu
+    pvc         beat tunggal QRS lebar yang datang lebih awal
+    st          median deviasi ST beberapa beat > ST_DEVIATION_MV
+
+Ritme hanya berganti jika label baru bertahan CONFIRM_BEATS beat
+(histeresis), lalu episode sebelumnya ditutup. Semua state dibatasi:
+riwayat sinyal HISTORY_SEC dan WINDOW_BEATS beat terakhir.
+
+Ini alat penapisan sederhana, bukan diagnosis.
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+ADC_COUNTS_PER_MV = 341.0  # AD8232 (gain 1100) ke ADC 10-bit 3.3 V: 1.1 V/mV -> ~341 count
+WINDOW_BEATS = 16
+CONFIRM_BEATS = 4
+POST_SEC = 0.35  # sampel sesudah crossing yang dibutuhkan untuk mengukur satu beat
+HISTORY_SEC = 1.5
+PRE_SEC = 0.30  # sampel sebelum crossing yang dipakai (segmen PR + marjin)
+R_SEARCH_SEC = (-0.05, 0.10)  # puncak R relatif terhadap crossing threshold
+PR_BASELINE_SEC = (-0.20, -0.08)  # garis dasar relatif terhadap puncak R
+QRS_MAX_HALF_SEC = 0.15
+QRS_EDGE_FRAC = 0.15  # batas QRS: deviasi < fraksi ini x amplitudo R ...
+QRS_QUIET_SEC = 0.02  # ... selama minimal ini (bukan sekadar memotong garis dasar Q->R)
+QRS_WIDE_SEC = 0.12
+MAINS_HZ = 50.0
+ST_OFFSET_SEC = 0.06  # ST60: 60 ms setelah akhir QRS (titik J)
+ST_DEVIATION_MV = 0.1
+ST_BEATS = 8
+PREMATURE_RATIO = 0.85  # R-R < rasio ini x rerata R-R beat normal
+VTACH_MIN_BEATS = 3
+AFIB_NRMSSD = 0.10
+FLUTTER_BPM = (140, 160)
+FLUTTER_MAX_CV = 0.02
+RR_MAX_SEC = 2.0  # jeda lebih lama: episode diputus (elektroda lepas / asistol)
+
+RHYTHM_NAMES = {
+    "normal": "Irama Sinus Normal",
+    "bradikardia": "Bradikardia Sinus",
+    "takikardia": "Takikardia Sinus",
+    "afib": "Fibrilasi Atrium",
+    "flutter": "Flutter Atrium",
+    "vtach": "Takikardia Ventrikel",
+    "pvc": "PVC",
+    "st": "Perubahan Segmen ST",
+    "unknown": "Belum terklasifikasi",
+}
+EPISODE_COLUMNS = ["label", "start", "end", "beats"]
+EPISODES_SUFFIX = "_episodes.csv"  # file episode pendamping rekaman GUI
+
+
+def measure_beat(x, r_guess, fs):
+    """
+    Fitur satu beat dari sinyal `x` (mentah atau terfilter zero-phase; filter
+    kausal menggeser bentuk QRS) di sekitar indeks crossing `r_guess`.
+    Mengembalikan (indeks R, lebar QRS detik, deviasi ST dalam satuan
+    sinyal) atau None jika sampel sebelum beat tidak cukup.
+    """
+    start = r_guess - int(PRE_SEC * fs)
+    if start < 0:
+        return None
+    seg = np.asarray(x[start:r_guess + int(POST_SEC * fs)], dtype=np.float64)
+    # Rata-rata bergerak terpusat 1/MAINS_HZ: meredam jala-jala tanpa menggeser fase
+    k = max(1, int(round(fs / MAINS_HZ)))
+    if k > 1:
+        seg = np.convolve(seg, np.ones(k) / k, "same")
+    lo = r_guess - start + int(R_SEARCH_SEC[0] * fs)
+    hi = min(len(seg), r_guess - start + int(R_SEARCH_SEC[1] * fs))
+    if hi <= lo:
+        return None
+    r = lo + int(np.argmax(seg[lo:hi]))
+    baseline = float(np.median(seg[r + int(PR_BASELINE_SEC[0] * fs):r + int(PR_BASELINE_SEC[1] * fs)]))
+    dev = np.abs(seg - baseline)
+    edge = QRS_EDGE_FRAC * dev[r]
+    half = int(QRS_MAX_HALF_SEC * fs)
+    quiet = max(1, int(QRS_QUIET_SEC * fs))
+    # Awal/akhir QRS: dari R ke luar, sampel pertama yang tetap dekat garis dasar
+    onset = _first_quiet(dev[max(0, r - half - quiet):r + 1][::-1] < edge, quiet)
+    offset = _first_quiet(dev[r:r + half + quiet + 1] < edge, quiet)
+    onset, offset = min(onset, half), min(offset, half)
+    width = (onset + offset) / fs
+    j = r + offset + int(ST_OFFSET_SEC * fs)
+    st = float(seg[j] - baseline) if j < len(seg) else 0.0
+    return start + r, width, st
+
+
+def _first_quiet(below, run):
+    """Indeks pertama tempat `below` bernilai True `run` sampel berturut-turut."""
+    if len(below) < run:
+        return len(below)
+    hits = np.convolve(below.astype(np.int8), np.ones(run, dtype=np.int8), "valid") == run
+    return int(np.argmax(hits)) if hits.any() else len(below)
+
+
+class RhythmClassifier:
+    """
+    Pemanggilan `process(t, y, beats)` per blok (beats = indeks di dalam blok)
+    mengembalikan episode yang baru ditutup. `flush()` menutup episode yang
+    masih terbuka di akhir rekaman. Episode: dict label, start, end, beats.
+    """
+
+    def __init__(self, fs, counts_per_mv=ADC_COUNTS_PER_MV):
+        self.fs = fs
+        self.st_threshold = ST_DEVIATION_MV * counts_per_mv
+        self.reset()
+
+    def reset(self):
+        self._hist = np.empty(0)
+        self._hist_t = np.empty(0)
+        self._hist_start = 0  # indeks absolut sampel pertama di riwayat
+        self._total = 0
+        self._pending = deque()  # indeks absolut crossing yang menunggu sampel sesudahnya
+        self._beats = deque(maxlen=WINDOW_BEATS)  # (t, rr, lebar, premature, pvc)
+        self._st = deque(maxlen=ST_BEATS)
+        self._last_r_time = None
+        self._candidate = None  # (label, waktu beat pertama, jumlah beat, waktu beat terakhir)
+        self._wide_run = None  # (jumlah, waktu beat lebar pertama, waktu beat sebelumnya)
+        self.rhythm = None  # episode ritme terbuka
+        self.st_episode = None
+        self.episodes = []
+        self.pvc_count = 0
+
+    @property
+    def current(self):
+        return self.rhythm["label"] if self.rhythm else "unknown"
+
+    def process(self, t, y, beats=()):
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self._pending.extend(self._total + np.asarray(beats, dtype=np.intp))
+        self._hist = np.concatenate((self._hist, y))
+        self._hist_t = np.concatenate((self._hist_t, t))
+        self._total += len(y)
+        closed = []
+        post = int(POST_SEC * self.fs)
+        while self._pending and self._pending[0] + post <= self._total:
+            idx = self._pending.popleft() - self._hist_start
+            if idx < 0:
+                continue  # sudah keluar dari riwayat (blok sangat besar)
+            features = measure_beat(self._hist, idx, self.fs)
+            if features is not None:
+                r, width, st = features
+                closed.extend(self._on_beat(float(self._hist_t[r]), width, st))
+        keep = int(HISTORY_SEC * self.fs)
+        if self._pending:
+            keep = max(keep, self._total - self._pending[0] + int(PRE_SEC * self.fs) + 1)
+        if len(self._hist) > keep:
+            drop = len(self._hist) - keep
+            self._hist = self._hist[drop:]
+            self._hist_t = self._hist_t[drop:]
+            self._hist_start += drop
+        return closed
+
+    def _on_beat(self, t, width, st):
+        closed = []
+        rr = t - self._last_r_time if self._last_r_time is not None else None
+        self._last_r_time = t
+        if rr is not None and rr > RR_MAX_SEC:
+            # Jeda panjang: ritme sebelumnya berakhir di beat terakhir sebelum jeda
+            closed.extend(self._close_rhythm())
+            self._beats.clear()
+            rr = None
+        normal_rr = [b[1] for b in self._beats if b[1] is not None and not b[4]]
+        mean_rr = float(np.mean(normal_rr)) if normal_rr else None
+        wide = width > QRS_WIDE_SEC
+        premature = rr is not None and mean_rr is not None and rr < PREMATURE_RATIO * mean_rr
+        wide_run = 1
+        for b in reversed(self._beats):
+            if b[2] <= QRS_WIDE_SEC:
+                break
+            wide_run += 1
+        # Beat lebar ke-VTACH_MIN_BEATS dst. dalam satu deret adalah bagian V-Tach, bukan PVC tunggal
+        pvc = wide and premature and wide_run < VTACH_MIN_BEATS
+        self._beats.append((t, rr, width, premature, pvc))
+        if pvc:
+            self.pvc_count += 1
+            event = {"label": "pvc", "start": t, "end": t, "beats": 1}
+            self.episodes.append(event)
+            closed.append(event)
+        closed.extend(self._update_st(t, st))
+        closed.extend(self._update_rhythm(t, self._classify()))
+        return closed
+
+    def _classify(self):
+        beats = list(self._beats)
+        run = 0
+        for b in reversed(beats):
+            if b[2] <= QRS_WIDE_SEC:
+                break
+            run += 1
+        recent = [b[1] for b in beats[-run:] if b[1] is not None] if run else []
+        if run >= VTACH_MIN_BEATS and recent and 60.0 / np.mean(recent) > 100:
+            self._wide_run = (run, beats[-run][0], beats[-run - 1][0] if len(beats) > run else None)
+            return "vtach"
+        # R-R beat QRS sempit saja, tanpa beat sesudah PVC (jeda kompensasi)
+        rr = [b[1] for i, b in enumerate(beats) if b[1] is not None and b[2] <= QRS_WIDE_SEC
+              and not (i > 0 and beats[i - 1][4])]
+        if len(rr) < CONFIRM_BEATS:
+            return "unknown"
+        rr = np.asarray(rr)
+        mean_rr = rr.mean()
+        bpm = 60.0 / mean_rr
+        if len(rr) >= 8:
+            nrmssd = np.sqrt(np.mean(np.diff(rr) ** 2)) / mean_rr
+            if nrmssd > AFIB_NRMSSD:
+                return "afib"
+            if FLUTTER_BPM[0] <= bpm <= FLUTTER_BPM[1] and rr.std() / mean_rr < FLUTTER_MAX_CV:
+                return "flutter"
+        if bpm < 60:
+            return "bradikardia"
+        if bpm > 100:
+            return "takikardia"
+        return "normal"
+
+    def _update_rhythm(self, t, label):
+        rhythm, cand = self.rhythm, self._candidate
+        if rhythm and label == rhythm["label"]:
+            if cand:
+                rhythm["beats"] += cand[2]  # kandidat batal: beatnya tetap milik ritme lama
+            self._candidate = None
+            rhythm["end"] = t
+            rhythm["beats"] += 1
+            return []
+        if rhythm is None and label == "unknown":
+            self._candidate = None
+            return []
+        # Kandidat: (label, waktu beat pertama, jumlah beat, waktu beat terakhir)
+        if cand and cand[0] == label:
+            cand = (label, cand[1], cand[2] + 1, t)
+        else:
+            if cand and rhythm:
+                rhythm["end"] = cand[3]
+                rhythm["beats"] += cand[2]
+            cand = (label, t, 1, t)
+        # V-Tach sudah menuntut VTACH_MIN_BEATS beat lebar, jadi langsung berlaku
+        if cand[2] < (1 if label == "vtach" else CONFIRM_BEATS):
+            self._candidate = cand
+            return []
+        start, n = cand[1], cand[2]
+        if label == "vtach":
+            # Episode V-Tach dimulai dari beat lebar pertama; beat itu bukan PVC tunggal
+            n, start, prev = self._wide_run
+            if rhythm and prev is not None and prev >= rhythm["start"]:
+                rhythm["end"] = prev
+                rhythm["beats"] = max(1, rhythm["beats"] - (n - 1))
+            pvcs = [ep for ep in self.episodes if ep["label"] == "pvc" and ep["start"] >= start]
+            for ep in pvcs:
+                self.episodes.remove(ep)
+            self.pvc_count -= len(pvcs)
+        closed = self._close_rhythm()
+        if label != "unknown":
+            self.rhythm = {"label": label, "start": start, "end": t, "beats": n}
+        return closed
+
+    def _close_rhythm(self):
+        self._candidate = None
+        if self.rhythm is None:
+            return []
+        episode, self.rhythm = self.rhythm, None
+        self.episodes.append(episode)
+        return [episode]
+
+    def _update_st(self, t, st):
+        self._st.append(st)
+        deviated = len(self._st) == ST_BEATS and abs(float(np.median(self._st))) > self.st_threshold
+        if deviated:
+            if self.st_episode is None:
+                self.st_episode = {"label": "st", "start": t, "end": t, "beats": 0}
+            self.st_episode["end"] = t
+            self.st_episode["beats"] += 1
+            return []
+        if self.st_episode is not None:
+            episode, self.st_episode = self.st_episode, None
+            self.episodes.append(episode)
+            return [episode]
+        return []
+
+    def flush(self):
+        """Tutup episode terbuka (akhir rekaman). Mengembalikan episode yang ditutup."""
+        closed = self._close_rhythm()
+        if self.st_episode is not None:
+            self.episodes.append(self.st_episode)
+            closed.append(self.st_episode)
+            self.st_episode = None
+        return closed
+
+
+def classify_signal(t, filtered, beats, fs, counts_per_mv=ADC_COUNTS_PER_MV):
+    """Versi batch: seluruh sinyal sekaligus. Mengembalikan daftar episode."""
+    classifier = RhythmClassifier(fs, counts_per_mv)
+    classifier.process(t, filtered, beats)
+    classifier.flush()
+    return classifier.episodes
+
+
+def write_episodes(path, episodes):
+    """Simpan episode (urut waktu mulai) sebagai CSV."""
+    rows = sorted(episodes, key=lambda ep: ep["start"])
+    pd.DataFrame(rows, columns=EPISODE_COLUMNS).to_csv(path, index=False, float_format="%.3f")
+
+
+def rhythm_summary(episodes):
+    """Ringkasan untuk tabel analisis: ritme dominan (durasi), jumlah PVC, durasi per ritme."""
+    durations = {}
+    for ep in episodes:
+        if ep["label"] not in ("pvc", "st"):
+            durations[ep["label"]] = durations.get(ep["label"], 0.0) + ep["end"] - ep["start"]
+    summary = {
+        "rhythm": max(durations, key=durations.get) if durations else "unknown",
+        "n_pvc": sum(1 for ep in episodes if ep["label"] == "pvc"),
+        "st_sec": sum(ep["end"] - ep["start"] for ep in episodes if ep["label"] == "st"),
+    }
+    for label in ("afib", "flutter", "vtach"):
+        summary[f"{label}_sec"] = durations.get(label, 0.0)
+    return summary
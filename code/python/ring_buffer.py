@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Buffer melingkar berkapasitas tetap berbasis NumPy (structured array).
+
+    Setiap record ditulis dua kali (posisi p dan p + capacity), sehingga
+    n record terakhir selalu berada dalam satu potongan memori yang
+    kontigu. Append bernilai O(1) dan `view()` tidak pernah menyalin data.
+    """
+
+    def __init__(self, capacity, dtype):
+        if capacity <= 0:
+            raise ValueError("capacity harus > 0")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self._head = 0  # posisi tulis berikutnya (0..capacity-1)
+        self._size = 0
+        self.total = 0  # jumlah record yang pernah masuk sejak clear()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, record):
+        head = self._head
+        self._data[head] = record
+        self._data[head + self.capacity] = record
+        self._head = (head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self.total += 1
+
+    def extend(self, records):
+        """
+        Tambahkan banyak record sekaligus (array structured dengan dtype sama).
+        """
+        records = np.asarray(records, dtype=self.dtype)
+        n = len(records)
+        if n == 0:
+            return
+        self.total += n
+        if n >= self.capacity:
+            # Hanya `capacity` record terakhir yang tersisa
+            records = records[-self.capacity:]
+            self._data[:self.capacity] = records
+            self._data[self.capacity:] = records
+            self._head = 0
+            self._size = self.capacity
+            return
+        head = self._head
+        first = min(n, self.capacity - head)
+        self._data[head:head + first] = records[:first]
+        self._data[head + self.capacity:head + self.capacity + first] = records[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = records[first:]
+            self._data[self.capacity:self.capacity + rest] = records[first:]
+        self._head = (head + n) % self.capacity
+        self._size = min(self.capacity, self._size + n)
+
+    def view(self, n=None):
+        """
+        View kontigu (tanpa salinan) dari n record terakhir, urut dari terlama.
+        Jangan simpan view ini lama-lama: isinya berubah saat append berikutnya.
+        """
+        if n is None or n > self._size:
+            n = self._size
+        end = self._head + self.capacity
+        return self._data[end - n:end]
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self.total = 0
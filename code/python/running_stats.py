@@ -0,0 +1,160 @@
+"""
+Statistik berjalan dengan biaya O(1) per nilai baru, tanpa memindai ulang buffer.
+
+RunningStats: rata-rata/varians Welford + min/maks sepanjang sesi.
+WindowStats:  statistik yang sama untuk nilai dalam `window_sec` terakhir.
+              Nilai kedaluwarsa dikeluarkan dengan Welford terbalik; min/maks
+              dari deque monoton (amortized O(1) per nilai).
+BpmStats:     pasangan sesi + jendela untuk satu aliran BPM per beat.
+"""
+import math
+from collections import deque
+
+
+class RunningStats:
+    """Statistik sesi (Welford), numerik stabil untuk sesi panjang."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class WindowStats:
+    """
+    Statistik atas nilai bertimestamp dalam jendela waktu geser. Nilai harus
+    masuk berurutan waktu. Memori sebanding jumlah nilai dalam jendela.
+    """
+
+    def __init__(self, window_sec):
+        self.window_sec = window_sec
+        self.reset()
+
+    def reset(self):
+        self._values = deque()
+        self._min = deque()  # (t, x) dengan x naik dari depan ke belakang
+        self._max = deque()  # (t, x) dengan x turun dari depan ke belakang
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, t, x):
+        self._values.append((t, x))
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((t, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((t, x))
+        self.expire(t)
+
+    def expire(self, t_now):
+        """Keluarkan nilai yang lebih tua dari t_now - window_sec. True jika ada."""
+        cutoff = t_now - self.window_sec
+        values = self._values
+        expired = False
+        while values and values[0][0] < cutoff:
+            _, x = values.popleft()
+            self._remove(x)
+            expired = True
+        while self._min and self._min[0][0] < cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] < cutoff:
+            self._max.popleft()
+        return expired
+
+    def _remove(self, x):
+        if self.count <= 1:
+            self.count = 0
+            self.mean = 0.0
+            self._m2 = 0.0
+            return
+        n = self.count - 1
+        mean = (self.count * self.mean - x) / n
+        self._m2 = max(0.0, self._m2 - (x - self.mean) * (x - mean))
+        self.mean = mean
+        self.count = n
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else math.inf
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else -math.inf
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class BpmStats:
+    """
+    Statistik BPM per beat untuk seluruh sesi dan untuk jendela tampilan.
+    `version` naik setiap kali angka berubah, jadi tampilan cukup diperbarui
+    bila versinya berbeda (laju beat, bukan laju redraw).
+    """
+
+    def __init__(self, window_sec):
+        self.session = RunningStats()
+        self.window = WindowStats(window_sec)
+        self.version = 0
+
+    def reset(self):
+        self.session.reset()
+        self.window.reset()
+        self.version += 1
+
+    def set_window(self, window_sec):
+        # Jendela membesar: nilai yang sudah dibuang tidak kembali, jendela terisi bertahap
+        self.window.window_sec = window_sec
+        self.version += 1
+
+    def push(self, t, bpm):
+        self.session.push(bpm)
+        self.window.push(t, bpm)
+        self.version += 1
+
+    def expire(self, t_now):
+        if self.window.expire(t_now):
+            self.version += 1
+
+    @staticmethod
+    def row(stats):
+        """(rata-rata, maks, min, jumlah) sebagai teks untuk Treeview."""
+        if stats.count == 0:
+            return ("--", "--", "--", "0")
+        return (f"{stats.mean:.1f}", f"{stats.max:.0f}", f"{stats.min:.0f}", str(stats.count))
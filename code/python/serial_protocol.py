@@ -0,0 +1,215 @@
+import time
+
+import numpy as np
+import serial
+
+BAUD_RATE = 115200  # firmware baru (code/test/test.ino, code/arduino/arduino2.ino)
+LEGACY_BAUD_RATE = 9600  # firmware lama, hanya ASCII
+
+CMD_BINARY = b"B"
+CMD_ASCII = b"A"
+
+# Frame biner little-endian, 12 byte:
+# sync(2) seq(2) t_us(4) sampel 10-bit(2) flags(1) crc8(1)
+FRAME_DTYPE = np.dtype([
+    ("sync", "<u2"), ("seq", "<u2"), ("t_us", "<u4"),
+    ("value", "<u2"), ("flags", "u1"), ("crc", "u1"),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+SYNC_BYTES = b"\xa5\x5a"
+SYNC_WORD = int.from_bytes(SYNC_BYTES, "little")
+FLAG_LEADS_OFF = 0x01
+LEADS_OFF_VALUE = -1  # sama seperti firmware ASCII saat elektroda lepas
+
+
+def _make_crc8_table(poly=0x07):
+    table = np.zeros(256, dtype=np.uint8)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & 0x80 else (crc << 1)
+        table[i] = crc & 0xFF
+    return table
+
+
+CRC8_TABLE = _make_crc8_table()
+
+
+def crc8_frames(frame_bytes):
+    """
+    CRC-8 untuk banyak frame sekaligus. `frame_bytes` berbentuk (n, FRAME_SIZE);
+    loop hanya atas 9 kolom byte (seq..flags), vektor atas semua frame.
+    """
+    crc = np.zeros(len(frame_bytes), dtype=np.uint8)
+    for col in range(2, FRAME_SIZE - 1):
+        crc = CRC8_TABLE[crc ^ frame_bytes[:, col]]
+    return crc
+
+
+def encode_frames(values, seq_start=0, t_us=None, flags=None):
+    """
+    Bangun frame biner (sama seperti firmware). Dipakai untuk simulasi/replay.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    frames = np.zeros(n, dtype=FRAME_DTYPE)
+    frames["sync"] = SYNC_WORD
+    frames["seq"] = (seq_start + np.arange(n)) & 0xFFFF
+    frames["t_us"] = 0 if t_us is None else np.asarray(t_us, dtype=np.uint64) & 0xFFFFFFFF
+    frames["value"] = np.clip(values, 0, 1023)
+    if flags is not None:
+        frames["flags"] = flags
+    raw = frames.view(np.uint8).reshape(n, FRAME_SIZE)
+    frames["crc"] = crc8_frames(raw)
+    return frames.tobytes()
+
+
+class BinaryFrameDecoder:
+    """
+    Decoder frame biner. `feed` menerima byte mentah dalam jumlah berapa pun,
+    memparse semua frame utuh dengan np.frombuffer dan menyimpan sisa byte
+    untuk pemanggilan berikutnya. Frame rusak memicu resync ke sync word
+    berikutnya; semua kejadian dicatat sebagai counter.
+    """
+    mode = "binary"
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._last_seq = None
+        self.frames = 0
+        self.crc_errors = 0
+        self.resyncs = 0
+        self.bytes_skipped = 0
+        self.dropped = 0  # sampel hilang menurut loncatan nomor urut
+
+    def feed(self, data):
+        """
+        Mengembalikan (values, seq, t_us) sebagai array NumPy.
+        """
+        self._buf.extend(data)
+        raw = np.frombuffer(bytes(self._buf), dtype=np.uint8)
+        pos = 0
+        chunks = []
+        while len(raw) - pos >= FRAME_SIZE:
+            n = (len(raw) - pos) // FRAME_SIZE
+            block = raw[pos:pos + n * FRAME_SIZE]
+            frames = block.view(FRAME_DTYPE)
+            ok = (frames["sync"] == SYNC_WORD) & (crc8_frames(block.reshape(n, FRAME_SIZE)) == frames["crc"])
+            if ok.all():
+                chunks.append(frames)
+                pos += n * FRAME_SIZE
+                break
+            bad = int(np.argmin(ok))
+            if bad:
+                chunks.append(frames[:bad])
+                pos += bad * FRAME_SIZE
+            if frames["sync"][bad] == SYNC_WORD:
+                self.crc_errors += 1
+            # Cari sync word berikutnya setelah posisi frame rusak
+            nxt = self._buf.find(SYNC_BYTES, pos + 1)
+            self.resyncs += 1
+            if nxt < 0:
+                # Simpan byte terakhir: bisa jadi awal sync word yang terpotong
+                skip_to = max(pos, len(raw) - 1)
+                self.bytes_skipped += skip_to - pos
+                pos = skip_to
+                break
+            self.bytes_skipped += nxt - pos
+            pos = nxt
+        del self._buf[:pos]
+
+        if not chunks:
+            empty = np.empty(0, dtype=np.int16)
+            return empty, np.empty(0, dtype=np.uint16), np.empty(0, dtype=np.uint32)
+        frames = np.concatenate(chunks) if len(chunks) > 1 else chunks[0].copy()
+        self.frames += len(frames)
+        self._count_drops(frames["seq"])
+        values = frames["value"].astype(np.int16)
+        values[(frames["flags"] & FLAG_LEADS_OFF) != 0] = LEADS_OFF_VALUE
+        return values, frames["seq"], frames["t_us"]
+
+    def _count_drops(self, seq):
+        seq = seq.astype(np.int64)
+        if self._last_seq is not None:
+            seq = np.concatenate(([self._last_seq], seq))
+        gaps = (np.diff(seq) - 1) % 0x10000
+        self.dropped += int(gaps.sum())
+        self._last_seq = int(seq[-1])
+
+    def stats(self):
+        return {
+            "mode": self.mode, "frames": self.frames, "dropped": self.dropped,
+            "resyncs": self.resyncs, "crc_errors": self.crc_errors,
+            "bytes_skipped": self.bytes_skipped,
+        }
+
+
+class AsciiLineDecoder:
+    """
+    Decoder mode ASCII lama (satu angka desimal per baris), tetapi diparse per
+    batch: semua baris lengkap dikonversi sekaligus oleh NumPy.
+    """
+    mode = "ascii"
+
+    def __init__(self):
+        self._tail = b""
+        self.frames = 0
+        self.parse_errors = 0
+
+    def feed(self, data):
+        data = self._tail + bytes(data)
+        lines = data.split(b"\n")
+        self._tail = lines.pop()
+        lines = [ln.strip() for ln in lines]
+        lines = [ln for ln in lines if ln and ln != b"!"]
+        if not lines:
+            return np.empty(0, dtype=np.int16), None, None
+        try:
+            values = np.array(lines).astype(np.int16)
+        except ValueError:
+            # Ada baris non-angka (mis. pesan firmware): parse satu per satu
+            parsed = []
+            for ln in lines:
+                try:
+                    parsed.append(int(ln))
+                except ValueError:
+                    self.parse_errors += 1
+            values = np.array(parsed, dtype=np.int16)
+        self.frames += len(values)
+        return values, None, None
+
+    def stats(self):
+        return {"mode": self.mode, "frames": self.frames, "parse_errors": self.parse_errors}
+
+
+def open_serial(port, mode="auto", baud_rate=BAUD_RATE, legacy_baud_rate=LEGACY_BAUD_RATE,
+                probe_sec=0.5, timeout=0.05):
+    """
+    Buka port serial dan tentukan protokol secara otomatis.
+
+    mode="auto": buka pada `baud_rate`, minta mode biner ('B') dan cari frame
+    valid selama `probe_sec`. Jika tidak ada, pakai ASCII pada baud yang sama
+    bila ada angka yang terbaca; jika tidak, buka ulang pada `legacy_baud_rate`
+    (firmware lama 9600 baud). Mengembalikan (ser, decoder).
+    """
+    ser = serial.Serial(port, baud_rate, timeout=timeout)
+    time.sleep(2)  # Arduino reset saat port dibuka
+    if mode == "ascii":
+        return ser, AsciiLineDecoder()
+
+    ser.reset_input_buffer()
+    ser.write(CMD_BINARY)
+    probe = bytearray()
+    deadline = time.time() + probe_sec
+    while time.time() < deadline:
+        probe.extend(ser.read(max(1, ser.in_waiting)))
+    binary = BinaryFrameDecoder()
+    values, _, _ = binary.feed(probe)
+    if len(values) >= 2 or mode == "binary":
+        return ser, BinaryFrameDecoder()  # decoder baru: counter mulai dari nol
+    if len(AsciiLineDecoder().feed(probe)[0]) >= 2:
+        return ser, AsciiLineDecoder()
+    ser.close()
+    ser = serial.Serial(port, legacy_baud_rate, timeout=timeout)
+    time.sleep(2)
+    return ser, AsciiLineDecoder()
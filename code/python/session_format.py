@@ -0,0 +1,315 @@
+"""
+Format sesi biner EKG (.ekgs) dan konverter dari CSV lama.
+
+Tata letak file:
+    magic "EKGSESS1" (8 byte)
+    panjang header (uint32 little-endian)
+    header JSON (utf-8), dipad spasi sampai HEADER_RESERVED byte
+    chunk data: tiap chunk berisi CHUNK_SAMPLES sampel per kolom, kolom
+    disimpan berurutan (kolom-per-chunk), lebar tetap (int16/float32/float64)
+
+Header berisi metadata subjek, fs, pengaturan filter, mode firmware, daftar
+kolom dan jumlah sampel. Karena semua chunk berukuran tetap, sampel ke-i
+ada di chunk i // CHUNK_SAMPLES, sehingga `SessionReader` bisa memotong
+rentang waktu mana pun lewat np.memmap tanpa memuat seluruh file.
+
+Contoh:
+    python session_format.py convert dataset_ekg.csv --fs 250
+    python session_format.py info dataset_ekg.ekgs
+"""
+import argparse
+import json
+import os
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"EKGSESS1"
+FORMAT_VERSION = 1
+HEADER_RESERVED = 4096  # header ditulis ulang saat close(), jadi ukurannya tetap
+CHUNK_SAMPLES = 1024
+SESSION_EXT = ".ekgs"
+SIGNAL_COLUMNS = ("signal", "raw")  # GUI / perekam PyQtGraph
+TIME_COLUMNS = ("time", "timestamp")
+
+# Kolom bawaan rekaman GUI (time relatif terhadap start_time di header)
+SESSION_COLUMNS = [("time", "<f8"), ("signal", "<i2"), ("bpm", "<f4")]
+
+# Tipe kolom yang dikenal di CSV lama; kolom lain disimpan sebagai float32
+KNOWN_COLUMN_DTYPES = {
+    "time": "<f8", "timestamp": "<f8",
+    "signal": "<i2", "raw": "<i2", "ema": "<i2", "diff": "<i2", "label": "<i2",
+    "bpm": "<f4", "signal_filtered": "<f4", "bpm_filtered": "<f4",
+}
+
+
+def parse_subject_filename(filename):
+    """
+    Metadata subjek dari nama file {label}_{gender}_{age}_{condition}.csv,
+    atau dict kosong jika nama file tidak mengikuti konvensi itu.
+    """
+    name = os.path.splitext(os.path.basename(filename))[0]
+    parts = name.split("_")
+    if len(parts) < 4:
+        return {}
+    return {"label": parts[0], "gender": parts[1], "age": parts[2], "condition": "_".join(parts[3:])}
+
+
+def _chunk_dtype(columns, chunk_samples):
+    return np.dtype([(name, dtype, (chunk_samples,)) for name, dtype in columns])
+
+
+class SessionWriter:
+    """
+    Penulis sesi biner secara streaming: `append` menerima blok structured
+    (nama field = nama kolom), chunk penuh langsung ditulis, sisa chunk
+    disimpan sampai penuh atau sampai `close()`.
+    """
+
+    def __init__(self, path, fs, columns=SESSION_COLUMNS, metadata=None, chunk_samples=CHUNK_SAMPLES):
+        self.path = path
+        self.columns = [(name, np.dtype(dtype).str) for name, dtype in columns]
+        self.chunk_samples = chunk_samples
+        self.n_samples = 0
+        self.header = {
+            "version": FORMAT_VERSION,
+            "fs": float(fs),
+            "columns": self.columns,
+            "chunk_samples": chunk_samples,
+            "n_samples": 0,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.header.update(metadata or {})
+        self._chunk = np.zeros(1, dtype=_chunk_dtype(self.columns, chunk_samples))
+        self._fill = 0
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        self.header["n_samples"] = self.n_samples
+        payload = json.dumps(self.header).encode("utf-8")
+        if len(payload) > HEADER_RESERVED - len(MAGIC) - 4:
+            raise ValueError("Header sesi terlalu besar")
+        self._file.seek(0)
+        self._file.write(MAGIC + struct.pack("<I", len(payload)))
+        self._file.write(payload.ljust(HEADER_RESERVED - len(MAGIC) - 4, b" "))
+
+    def append(self, block):
+        names = [name for name, _ in self.columns]
+        pos = 0
+        n = len(block)
+        while pos < n:
+            take = min(n - pos, self.chunk_samples - self._fill)
+            for name in names:
+                self._chunk[name][0, self._fill:self._fill + take] = block[name][pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self.chunk_samples:
+                self._flush_chunk()
+        self.n_samples += n
+
+    def _flush_chunk(self):
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(self._chunk.tobytes())
+        self._chunk = np.zeros_like(self._chunk)
+        self._fill = 0
+
+    def close(self):
+        if self._fill:
+            self._flush_chunk()  # chunk terakhir dipad nol; n_samples di header membatasinya
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionReader:
+    """
+    Pembaca sesi biner berbasis np.memmap. Hanya chunk yang dibutuhkan
+    oleh `read`/`read_time` yang benar-benar dibaca dari disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} bukan file sesi EKG")
+            (length,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(length).decode("utf-8"))
+        self.fs = self.header["fs"]
+        self.columns = [(name, dtype) for name, dtype in self.header["columns"]]
+        self.chunk_samples = self.header["chunk_samples"]
+        self.n_samples = self.header["n_samples"]
+        n_chunks = -(-self.n_samples // self.chunk_samples)
+        if n_chunks:
+            self._chunks = np.memmap(path, dtype=_chunk_dtype(self.columns, self.chunk_samples),
+                                     mode="r", offset=HEADER_RESERVED, shape=(n_chunks,))
+        else:
+            self._chunks = np.zeros(0, dtype=_chunk_dtype(self.columns, self.chunk_samples))
+
+    def __len__(self):
+        return self.n_samples
+
+    @property
+    def column_names(self):
+        return [name for name, _ in self.columns]
+
+    @property
+    def duration(self):
+        return self.n_samples / self.fs
+
+    def read(self, start=0, stop=None, columns=None):
+        """
+        Sampel [start, stop) sebagai dict nama kolom -> array.
+        """
+        stop = self.n_samples if stop is None else min(stop, self.n_samples)
+        start = max(0, start)
+        names = columns or self.column_names
+        if stop <= start:
+            return {name: np.empty(0, dtype=dict(self.columns)[name]) for name in names}
+        c0 = start // self.chunk_samples
+        c1 = (stop - 1) // self.chunk_samples + 1
+        chunks = self._chunks[c0:c1]
+        offset = c0 * self.chunk_samples
+        return {name: chunks[name].reshape(-1)[start - offset:stop - offset] for name in names}
+
+    def read_time(self, t_start, t_end, columns=None):
+        """
+        Potong berdasarkan waktu (detik sejak awal sesi) dengan indeks n = t * fs, O(1).
+        """
+        return self.read(int(t_start * self.fs), int(np.ceil(t_end * self.fs)), columns)
+
+    def iter_blocks(self, block_samples=CHUNK_SAMPLES * 16, columns=None):
+        """Iterasi seluruh sesi per blok (untuk pemrosesan out-of-core)."""
+        for start in range(0, self.n_samples, block_samples):
+            yield start, self.read(start, start + block_samples, columns)
+
+
+def iter_recording_blocks(path, block_samples, fs=250.0):
+    """
+    Blok (t, sinyal, records) dari CSV atau .ekgs. `records` adalah array
+    structured berisi semua kolom asli blok itu (untuk diteruskan ke output).
+    Waktu diambil dari kolom waktu jika naik tegas, selain itu dari n / fs.
+    """
+    if path.endswith(SESSION_EXT):
+        reader = SessionReader(path)
+        fs = reader.fs
+        dtype = np.dtype(reader.columns)
+        signal_col = next(c for c in SIGNAL_COLUMNS if c in reader.column_names)
+        blocks = reader.iter_blocks(block_samples)
+        time_col = None  # kolom waktu .ekgs relatif terhadap header; pakai n / fs
+    else:
+        header = list(pd.read_csv(path, nrows=0).columns)
+        signal_col = next((c for c in SIGNAL_COLUMNS if c in header), None)
+        if signal_col is None:
+            raise ValueError(f"Kolom sinyal tidak ditemukan di {os.path.basename(path)}")
+        time_col = next((c for c in TIME_COLUMNS if c in header), None)
+        dtype = None
+        blocks = _csv_blocks(path, block_samples)
+
+    use_time = None
+    t0 = None
+    last_t = None
+    for start, cols in blocks:
+        n = len(cols[signal_col])
+        if dtype is None:
+            rec = cols.to_records(index=False)
+        else:
+            rec = np.empty(n, dtype=dtype)
+            for name in dtype.names:
+                rec[name] = cols[name]
+        signal = np.asarray(cols[signal_col], dtype=np.float64)
+        if use_time is None:
+            t_col = np.asarray(cols[time_col], dtype=np.float64) if time_col else None
+            use_time = t_col is not None and n > 1 and bool(np.all(np.diff(t_col) > 0))
+            if use_time:
+                t0 = t_col[0]
+        if use_time:
+            t = np.asarray(cols[time_col], dtype=np.float64) - t0
+            if last_t is not None and t[0] <= last_t:
+                raise ValueError("Kolom waktu tidak naik tegas antar blok")
+            last_t = t[-1]
+        else:
+            t = (start + np.arange(n)) / fs
+        yield t, signal, rec
+
+
+def _csv_blocks(path, block_samples):
+    start = 0
+    for df in pd.read_csv(path, chunksize=block_samples):
+        yield start, df
+        start += len(df)
+
+
+def convert_csv(csv_path, out_path=None, fs=250.0, firmware_mode=None, filter_settings=None,
+                rows_per_read=100_000):
+    """
+    Konversi CSV lama (`timestamp,raw,ema,diff,label` dari perekam PyQtGraph
+    atau `time,signal,bpm,...` dari GUI) ke format sesi biner, per potongan
+    baris sehingga CSV besar tidak dimuat sekaligus.
+    """
+    out_path = out_path or os.path.splitext(csv_path)[0] + SESSION_EXT
+    header_cols = list(pd.read_csv(csv_path, nrows=0).columns)
+    columns = [(name, KNOWN_COLUMN_DTYPES.get(name, "<f4")) for name in header_cols]
+    time_col = "timestamp" if "timestamp" in header_cols else ("time" if "time" in header_cols else None)
+    metadata = {
+        "subject": parse_subject_filename(csv_path),
+        "source": os.path.basename(csv_path),
+        "firmware_mode": firmware_mode,
+        "filter": filter_settings,
+    }
+    writer = None
+    try:
+        for df in pd.read_csv(csv_path, chunksize=rows_per_read):
+            if writer is None:
+                t0 = float(df[time_col].iloc[0]) if time_col and len(df) else 0.0
+                # timestamp epoch disimpan relatif terhadap start_time di header
+                metadata["start_time"] = t0 if time_col == "timestamp" else None
+                writer = SessionWriter(out_path, fs, columns, metadata)
+            block = np.empty(len(df), dtype=[(name, dtype) for name, dtype in columns])
+            for name, _ in columns:
+                values = df[name].to_numpy()
+                if name == "timestamp":
+                    values = values - t0
+                block[name] = values
+            writer.append(block)
+        if writer is None:
+            writer = SessionWriter(out_path, fs, columns, metadata)
+    finally:
+        if writer is not None:
+            writer.close()
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Format sesi biner EKG")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_conv = sub.add_parser("convert", help="Konversi CSV ke .ekgs")
+    p_conv.add_argument("csv", nargs="+")
+    p_conv.add_argument("-o", "--output", help="file output (hanya untuk satu input)")
+    p_conv.add_argument("--fs", type=float, default=250.0, help="laju sampel (Hz)")
+    p_info = sub.add_parser("info", help="Tampilkan header file .ekgs")
+    p_info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.cmd == "convert":
+        for path in args.csv:
+            out = convert_csv(path, args.output if len(args.csv) == 1 else None, fs=args.fs)
+            csv_size = os.path.getsize(path)
+            out_size = os.path.getsize(out)
+            print(f"{path} -> {out} ({csv_size} -> {out_size} byte)")
+    else:
+        reader = SessionReader(args.path)
+        print(json.dumps(reader.header, indent=2))
+        print(f"durasi: {reader.duration:.1f} detik")
+
+
+if __name__ == "__main__":
+    main()
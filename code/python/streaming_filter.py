@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, iirnotch, sosfilt, sosfilt_zi, sosfiltfilt, tf2sos
+
+from ring_buffer import RingBuffer
+
+FILTERED_DTYPE = np.dtype([("t", "f8"), ("signal", "f4")])
+
+
+@lru_cache(maxsize=32)
+def design_sos(lowcut, highcut, notch, fs, order=5, notch_q=30):
+    """
+    Desain koefisien band-pass Butterworth + notch dalam bentuk second-order
+    sections (SOS). Hasil di-cache per (lowcut, highcut, notch, fs), jadi
+    `butter`/`iirnotch` hanya dijalankan saat parameter berubah.
+    Notch dilewati jika frekuensinya <= 0 atau di atas Nyquist.
+    """
+    nyq = 0.5 * fs
+    sos = butter(order, [lowcut / nyq, highcut / nyq], btype="band", output="sos")
+    if 0 < notch < nyq:
+        b, a = iirnotch(notch, notch_q, fs)
+        sos = np.vstack([sos, tf2sos(b, a)])
+    return sos  # dibagi antar pemanggil lewat cache: jangan diubah in-place
+
+
+def filtfilt_offline(signal, lowcut, highcut, notch, fs):
+    """
+    Filter zero-phase (maju-mundur) untuk ekspor/analisis offline.
+    Tidak dipakai di jalur realtime karena butuh seluruh sinyal.
+    """
+    sos = design_sos(float(lowcut), float(highcut), float(notch), float(fs))
+    return sosfiltfilt(sos, np.asarray(signal, dtype=np.float64))
+
+
+class StreamingFilter:
+    """
+    Filter kausal bertahap: hanya sampel baru yang difilter, state `zi`
+    dibawa antar pemanggilan, dan hasilnya disimpan ke ring buffer sendiri.
+    """
+
+    def __init__(self, fs, lowcut, highcut, notch, capacity):
+        self.buffer = RingBuffer(capacity, FILTERED_DTYPE)
+        self._params = None
+        self.sos = None
+        self._zi = None
+        self.configure(fs, lowcut, highcut, notch)
+
+    def configure(self, fs, lowcut, highcut, notch):
+        """
+        Ganti parameter filter. State dan buffer hasil di-reset hanya jika
+        parameter benar-benar berubah. Mengembalikan True jika di-reset.
+        """
+        params = (float(lowcut), float(highcut), float(notch), float(fs))
+        if params == self._params:
+            return False
+        self.sos = design_sos(*params)
+        self._params = params
+        self.reset()
+        return True
+
+    def reset(self):
+        self._zi = None
+        self.buffer.clear()
+
+    def process(self, x):
+        """
+        Filter blok sampel baru dan kembalikan hasilnya (float64).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if len(x) == 0:
+            return x
+        if self._zi is None:
+            # Mulai dari kondisi tunak pada sampel pertama agar tidak ada lonjakan awal
+            self._zi = sosfilt_zi(self.sos) * x[0]
+        y, self._zi = sosfilt(self.sos, x, zi=self._zi)
+        return y
+
+    def push(self, t, x):
+        """
+        Filter blok baru dan simpan (t, hasil) ke buffer hasil filter.
+        """
+        y = self.process(x)
+        if len(y):
+            block = np.empty(len(y), dtype=FILTERED_DTYPE)
+            block["t"] = t
+            block["signal"] = y
+            self.buffer.extend(block)
+        return y
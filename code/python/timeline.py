@@ -0,0 +1,163 @@
+from collections import deque
+
+import numpy as np
+
+
+class TimelineReconstructor:
+    """
+    Rekonstruksi waktu per sampel dari blok yang datang lewat serial.
+
+    - Jika perangkat mengirim nomor urut + timestamp mikrodetik (mode biner),
+      waktu diambil dari jam perangkat (di-unwrap), lalu dipetakan ke jam
+      host dengan model linear (drift + offset) yang di-fit ke waktu
+      kedatangan blok, offset dari lower envelope seperti mode host.
+      Sampel hilang terdeteksi dari loncatan nomor urut.
+      `device_clock_only=True` (replay): jam perangkat dipakai apa adanya,
+      hanya dijangkarkan sekali ke kedatangan blok pertama, karena replay
+      dengan speed != 1 sengaja tidak berjalan seiring jam host.
+    - Jika tidak (mode ASCII), dipakai model jam linear t = t0 + n / fs yang
+      di-fit ke waktu kedatangan blok. Latensi USB selalu positif, jadi offset
+      diambil dari batas bawah (lower envelope) residu, bukan dari rata-rata.
+      Celah waktu yang tidak bisa dijelaskan jumlah sampel dianggap gap.
+
+    Properti `fs_estimate` berisi laju sampel sebenarnya yang terukur.
+    Waktu yang dikembalikan selalu naik tegas, juga antar blok: sampel yang
+    tidak naik (timestamp perangkat ganda/mundur, model jam diperbarui)
+    digeser ke sampel sebelumnya + 0.5 / fs dan dihitung di `nonmonotonic`.
+    """
+
+    MAX_DRIFT = 0.01  # |rasio jam host/perangkat - 1| yang masih dianggap drift kristal
+
+    def __init__(self, nominal_fs, history=256, gap_sec=0.2, min_fit_span_sec=2.0, device_clock_only=False):
+        self.nominal_fs = float(nominal_fs)
+        self.gap_sec = gap_sec
+        self.min_fit_span_sec = min_fit_span_sec
+        self.device_clock_only = device_clock_only
+        self._history = deque(maxlen=history)  # (indeks sampel terakhir, waktu datang)
+        self._dev_history = deque(maxlen=history)  # (detik perangkat terakhir, waktu datang)
+        self.reset()
+
+    def reset(self):
+        self._history.clear()
+        self._dev_history.clear()
+        self._t_first = None  # waktu datang blok pertama (referensi numerik)
+        self._next_index = 0  # indeks sampel berikutnya di timeline
+        self._last_t = None
+        self._slope = 1.0 / self.nominal_fs
+        self._offset = 0.0
+        # State mode perangkat
+        self._seq = None
+        self._dev_us = None
+        self._dev_first = None  # (seq64, detik perangkat) sampel pertama
+        self._dev_slope = 1.0  # detik host per detik perangkat
+        self._dev_offset = 0.0  # waktu host (relatif _t_first) untuk detik perangkat pertama
+        self.fs_estimate = None
+        self.gaps = 0
+        self.dropped = 0
+        self.nonmonotonic = 0  # sampel yang waktunya dikoreksi agar naik tegas
+
+    def push(self, arrival_time, n, seq=None, t_us=None):
+        """
+        Waktu (epoch detik) untuk n sampel yang datang bersama di `arrival_time`.
+        """
+        if n == 0:
+            return np.empty(0, dtype=np.float64)
+        if t_us is not None and len(t_us) == n:
+            t = self._push_device(arrival_time, np.asarray(seq), np.asarray(t_us))
+        else:
+            t = self._push_host(arrival_time, n)
+        t = self._monotonic(t)
+        self._last_t = t[-1]
+        return t
+
+    def _monotonic(self, t):
+        """t'[i] = max(t[i], t'[i-1] + langkah minimum), dengan t'[-1] = waktu terakhir blok sebelumnya."""
+        step = 0.5 / self.nominal_fs
+        ramp = np.arange(len(t)) * step
+        prev = -np.inf if self._last_t is None else self._last_t + step
+        fixed = np.maximum.accumulate(np.maximum(t - ramp, prev)) + ramp
+        self.nonmonotonic += int(np.count_nonzero(fixed != t))
+        return fixed
+
+    # --- Mode perangkat: nomor urut + timestamp mikrodetik ---
+    def _push_device(self, arrival_time, seq, t_us):
+        seq = seq.astype(np.int64)
+        t_us = t_us.astype(np.int64)
+        prev_seq = seq[0] - 1 if self._seq is None else self._seq[1]
+        prev_us = t_us[0] if self._dev_us is None else self._dev_us[1]
+        base_seq = 0 if self._seq is None else self._seq[0]
+        base_us = 0 if self._dev_us is None else self._dev_us[0]
+
+        seq_steps = np.diff(np.concatenate(([prev_seq], seq))) % 0x10000
+        us_steps = np.diff(np.concatenate(([prev_us], t_us))) % 0x100000000
+        seq64 = base_seq + np.cumsum(seq_steps)
+        dev_s = (base_us + np.cumsum(us_steps)) * 1e-6
+        self._seq = (int(seq64[-1]), int(seq[-1]))
+        self._dev_us = (int(base_us + us_steps.sum()), int(t_us[-1]))
+
+        missing = seq_steps - 1
+        self.gaps += int(np.count_nonzero(missing))
+        self.dropped += int(missing.sum())
+
+        if self._dev_first is None:
+            self._dev_first = (int(seq64[0]), float(dev_s[0]))
+            self._t_first = arrival_time
+        x = dev_s - self._dev_first[1]  # detik perangkat sejak sampel pertama
+        y = arrival_time - self._t_first
+        if self.device_clock_only:
+            if not self._dev_history:
+                self._dev_history.append((x[-1], y))
+                self._dev_offset = y - x[-1]
+        else:
+            self._dev_history.append((x[-1], y))
+            self._fit_device()
+        span = x[-1]
+        if span >= self.min_fit_span_sec:
+            self.fs_estimate = (seq64[-1] - self._dev_first[0]) / (span * self._dev_slope)
+        return self._t_first + self._dev_offset + self._dev_slope * x
+
+    def _fit_device(self):
+        hist = np.asarray(self._dev_history, dtype=np.float64)
+        x, y = hist[:, 0], hist[:, 1]
+        if x[-1] - x[0] >= self.min_fit_span_sec and len(hist) >= 3:
+            slope = np.polyfit(x, y, 1)[0]
+            if abs(slope - 1.0) < self.MAX_DRIFT:
+                self._dev_slope = slope
+        # Latensi USB selalu positif: offset dari batas bawah residu
+        self._dev_offset = float(np.min(y - x * self._dev_slope))
+
+    # --- Mode host: fit model jam linear ke waktu kedatangan ---
+    def _push_host(self, arrival_time, n):
+        if self._t_first is None:
+            self._t_first = arrival_time
+            self._offset = -(n - 1) * self._slope
+        y = arrival_time - self._t_first
+        last_index = self._next_index + n - 1
+        # Celah: blok datang jauh lebih lambat dari yang dijelaskan jumlah sampel
+        predicted = self._offset + last_index * self._slope
+        lateness = y - predicted
+        if self._history and lateness > self.gap_sec:
+            missing = int(round(lateness / self._slope))
+            self.gaps += 1
+            self.dropped += missing
+            self._next_index += missing
+            last_index += missing
+            self._offset = y - last_index * self._slope
+        self._history.append((last_index, y))
+        self._fit()
+
+        idx = np.arange(self._next_index, self._next_index + n, dtype=np.float64)
+        t = self._t_first + self._offset + idx * self._slope
+        self._next_index += n
+        return t
+
+    def _fit(self):
+        hist = np.asarray(self._history, dtype=np.float64)
+        x, y = hist[:, 0], hist[:, 1]
+        if y[-1] - y[0] >= self.min_fit_span_sec and len(hist) >= 3:
+            slope = np.polyfit(x, y, 1)[0]
+            # Tolak estimasi yang tidak masuk akal (mis. saat data tersendat)
+            if 0.5 / self.nominal_fs < slope < 2.0 / self.nominal_fs:
+                self._slope = slope
+                self.fs_estimate = 1.0 / slope
+        self._offset = float(np.min(y - x * self._slope))
@@ -14,6 +14,15 @@
  * - Menggunakan timer `micros()` untuk timing yang presisi, bukan `delay()`.
  * ******************************************************************************/
 
+// --- KONFIGURASI SERIAL ---
+// Default mengirim ASCII (satu angka per baris). Jika host mengirim karakter 'B',
+// firmware beralih ke frame biner 12 byte (lihat sendSample); 'A' kembali ke ASCII.
+const long BAUD_RATE = 115200;     // Harus sama dengan BAUD_RATE di gui.py
+const byte SYNC_0 = 0xA5;
+const byte SYNC_1 = 0x5A;
+bool binaryMode = false;
+uint16_t seqNo = 0;
+
 // --- KONFIGURASI SINYAL ---
 const int BPM = 75;              // Denyut per menit yang disimulasikan
 const int SAMPLE_RATE_HZ = 250; // Laju sampling (1000 Hz = interval 1 ms)
@@ -35,8 +44,56 @@ const unsigned long SAMPLE_INTERVAL_US = 1000000 / SAMPLE_RATE_HZ; // Interval d
 int beatIndex = 0;
 int samplesPerBeat; // Akan dihitung di setup()
 
+// CRC-8 (polinom 0x07) atas byte seq..flags
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+// Cek perintah mode dari host ('B' = biner, 'A' = ASCII)
+void checkHostCommand() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == 'B') {
+      binaryMode = true;
+      seqNo = 0;
+    } else if (c == 'A') {
+      binaryMode = false;
+    }
+  }
+}
+
+// Frame biner (little-endian): sync(2) seq(2) t_us(4) sampel 10-bit(2) flags(1) crc(1)
+void sendSample(int value, unsigned long tUs, uint8_t flags) {
+  if (!binaryMode) {
+    Serial.println(value);
+    return;
+  }
+  uint8_t frame[12];
+  frame[0] = SYNC_0;
+  frame[1] = SYNC_1;
+  frame[2] = seqNo & 0xFF;
+  frame[3] = seqNo >> 8;
+  frame[4] = tUs & 0xFF;
+  frame[5] = (tUs >> 8) & 0xFF;
+  frame[6] = (tUs >> 16) & 0xFF;
+  frame[7] = (tUs >> 24) & 0xFF;
+  frame[8] = value & 0xFF;
+  frame[9] = (value >> 8) & 0x03;
+  frame[10] = flags;
+  frame[11] = crc8(frame + 2, 9);
+  Serial.write(frame, 12);
+  seqNo++;
+}
+
 void setup() {
-  Serial.begin(9600); // Pastikan baud rate ini sama dengan di Python
+  Serial.begin(BAUD_RATE); // Pastikan baud rate ini sama dengan di Python
   
   // Hitung berapa banyak sampel yang dibutuhkan untuk satu siklus detak jantung
   // (60 detik / BPM) * laju sampling
@@ -44,6 +101,8 @@ void setup() {
 }
 
 void loop() {
+  checkHostCommand();
+
   // Gunakan micros() untuk timing yang presisi, HINDARI delay()
   unsigned long currentTime = micros();
   if (currentTime - lastSampleTime >= SAMPLE_INTERVAL_US) {
@@ -79,7 +138,7 @@ void loop() {
     finalSignal = constrain(finalSignal, 0, 1023);
     
     // Kirim data ke port serial, sama seperti sensor asli
-    Serial.println(finalSignal);
+    sendSample(finalSignal, currentTime, 0);
     
     // Pindah ke sampel berikutnya
     beatIndex++;
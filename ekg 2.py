@@ -1,8 +1,14 @@
-import serial
+import os
+import sys
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from collections import deque
 
+# Filter dan protokol serial bersama ada di code/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "code", "python"))
+from ekg_signal import Ema
+from serial_protocol import open_serial
+
 # ----------------------
 # Konfigurasi Serial
 # ----------------------
@@ -10,7 +16,7 @@ port = 'COM5'        # Ganti dengan port Arduino kamu
 baudrate = 9600
 
 try:
-    ser = serial.Serial(port, baudrate)
+    ser, _ = open_serial(port, "ascii", baud_rate=baudrate, timeout=None)
     print(f"Terhubung ke {port} dengan baudrate {baudrate}")
 except Exception as e:
     print("Gagal membuka port serial:", e)
@@ -34,14 +40,7 @@ ax.set_ylabel("Amplitudo (analogRead)")
 # ----------------------
 # EMA Filter
 # ----------------------
-alpha = 0.1
-prev_ema = 512
-
-def exponential_moving_average(new_value):
-    global prev_ema
-    ema = (alpha * new_value) + (1 - alpha) * prev_ema
-    prev_ema = ema
-    return int(ema)
+ema_filter = Ema(alpha=0.1, initial=512)
 
 # ----------------------
 # Fungsi Update Grafik
@@ -54,7 +53,7 @@ def update(frame):
         value = ser.readline().decode('utf-8').strip()
         if value.isdigit():
             raw = int(value)
-            ema = exponential_moving_average(raw)
+            ema = int(ema_filter.process(raw))
 
             # Jika lonjakan (misal: lebih tinggi dari EMA + threshold)
             if raw > ema + threshold:
@@ -1,8 +1,14 @@
-import serial
+import os
+import sys
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from collections import deque
 
+# Filter dan protokol serial bersama ada di code/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "code", "python"))
+from ekg_signal import MovingAverage
+from serial_protocol import open_serial
+
 # ----------------------
 # Konfigurasi Serial
 # ----------------------
@@ -10,7 +16,7 @@ port = 'COM5'        # Ganti dengan port Arduino kamu (cek di Device Manager)
 baudrate = 9600
 
 try:
-    ser = serial.Serial(port, baudrate)
+    ser, _ = open_serial(port, "ascii", baud_rate=baudrate, timeout=None)
     print(f"Terhubung ke {port} dengan baudrate {baudrate}")
 except Exception as e:
     print("Gagal membuka port serial:", e)
@@ -35,10 +41,7 @@ ax.set_ylabel("Amplitudo (analogRead)")
 # ----------------------
 # Filter Moving Average
 # ----------------------
-def moving_average(signal_list, window_size=5):
-    if len(signal_list) < window_size:
-        return signal_list[-1]
-    return sum(list(signal_list)[-window_size:]) // window_size
+moving_average = MovingAverage(window=5)
 
 # ----------------------
 # Fungsi Update Grafik
@@ -50,7 +53,7 @@ def update(frame):
         if value.isdigit():
             raw = int(value)
             data.append(raw)  # Masukkan data mentah terlebih dahulu
-            filtered = moving_average(data, window_size=5)
+            filtered = moving_average.process(raw)
             line.set_ydata(list(data))  # Tampilkan sinyal yang sudah difilter
             print("Data masuk:", raw)   # Debug: pastikan data masuk
     except Exception as e: